@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Load-test the AI path against the mock Groq server in reddit_bot/mock_groq.py
+
+*   Cleans a batch of posts (built from the saved fixtures) with the scraper's
+    own functions: clean_text_with_ai followed by
+    generate_youtube_content_with_ai, or the single combined request with
+    --task combined
+*   Runs the batch once per concurrency level, with as many requests in
+    flight as posts in progress (as llm_max_in_flight does in the scraper)
+*   Prints throughput and per-post latency percentiles for every level, with
+    the retries caused by the mock's 429s
+
+Without --url the mock is started in-process with the latency and 429
+options given here; with --url, a mock (or real server) started elsewhere
+is used.  No Groq quota is spent either way.
+"""
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from reddit_bot import scraper
+from reddit_bot.groq import GroqClient
+from reddit_bot.mock_groq import add_arguments, server_from_args
+from reddit_bot.model_router import ModelRouter
+from reddit_bot.normalize import noise_score
+from reddit_bot.reddit_parser import parse_listing, parse_post_content
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_FOLDER = ROOT_DIR / "fixtures" / "old-reddit"
+
+
+def load_posts(count):
+    """``count`` (title, content) pairs: the fixture listing's titles with the fixture post's body"""
+    titles = [post['title'] for post in parse_listing((FIXTURES_FOLDER / "listing_new.html").read_bytes())]
+    content = parse_post_content((FIXTURES_FOLDER / "permalink_short.html").read_bytes())
+    titles = titles or ["AITA for asking my sister to pay me back"]
+    return [(titles[i % len(titles)], content) for i in range(count)]
+
+
+def percentile(ordered, share):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))] if ordered else 0.0
+
+
+def process_post(title, content, task):
+    """Run one post through the AI path; returns its latency in seconds"""
+    started = time.perf_counter()
+    noise = noise_score(f"{title}\n{content}")
+    if task == "combined":
+        scraper.clean_and_describe_with_ai(title, content, "", noise)
+    else:
+        text = scraper.clean_text_with_ai(title, content, "", noise)
+        scraper.generate_youtube_content_with_ai(text)
+    return time.perf_counter() - started
+
+
+def run_level(url, posts, concurrency, task, max_retries):
+    """Process ``posts`` with ``concurrency`` workers; returns the figures for one table row"""
+    client = GroqClient("mock", url=url, max_in_flight=concurrency, max_retries=max_retries, name="mock")
+    scraper.llm_client = client
+    latencies, failed = [], 0
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(process_post, title, content, task) for title, content in posts]
+            for future in futures:
+                try:
+                    latencies.append(future.result())
+                except Exception:
+                    failed += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        client.close()
+    calls = client.metrics
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "posts/s": len(latencies) / elapsed if elapsed else 0.0,
+        "requests/s": len(calls) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "retries": sum(call["attempts"] - 1 for call in calls),
+        # Every attempt that didn't get a 200, whether or not a retry then succeeded
+        "non-200": sum(call["attempts"] - (call["status"] == 200) for call in calls),
+        "failed": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI cleaning path against a mock Groq server.")
+    parser.add_argument("--url", help="Chat-completions URL of a running server (default: start the mock here)")
+    parser.add_argument("--posts", "-n", type=int, default=24, help="Posts per concurrency level (default: 24)")
+    parser.add_argument("--concurrency", "-c", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Concurrency levels to run (default: 1 2 4 8)")
+    parser.add_argument("--task", choices=["separate", "combined"], default="separate",
+                        help="Cleaning plus a metadata request per post, or one combined request (default: separate)")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per request (default: 5)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show the client's retry messages")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = server_from_args(args).start()
+        url = server.url
+        print(f"🧪 Mock Groq on {url}: latency {args.latency}s ±{args.jitter}s + {args.token_latency}s/token, "
+              f"{args.rpm or 'no'} rpm limit, {args.rate_limit:.0%} random 429s, {args.errors:.0%} 503s")
+
+    # The scraper's AI path as run() sets it up, minus the response cache and the token budget
+    scraper.configure({'llm_cache': False, 'llm_budget': False})
+    scraper.llm_cache = None
+    scraper.router = ModelRouter()
+    posts = load_posts(args.posts)
+
+    print(f"\n{args.posts} posts per level, task '{args.task}'\n")
+    print(f"{'concurrency':>11} {'posts/s':>8} {'requests/s':>11} {'p50':>7} {'p95':>7} {'p99':>7} {'retries':>8} {'non-200':>8} {'failed':>7}")
+    try:
+        for concurrency in args.concurrency:
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with output:
+                row = run_level(url, posts, max(1, concurrency), args.task, args.max_retries)
+            print(f"{row['concurrency']:>11} {row['posts/s']:>8.2f} {row['requests/s']:>11.2f} "
+                  f"{row['p50']:>6.2f}s {row['p95']:>6.2f}s {row['p99']:>6.2f}s {row['retries']:>8} {row['non-200']:>8} {row['failed']:>7}")
+    finally:
+        if server is not None:
+            print(f"\n{server.summary()}")
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML parser backends in reddit_bot/reddit_parser.py
+
+*   Runs every backend over the old.reddit pages in fixtures/old-reddit
+    (the bundled ones are synthetic: old.reddit's markup, generated text)
+*   Checks that each backend extracts exactly what html.parser extracts
+*   Prints the average time per page for every backend
+
+Files named listing_*.html are parsed as listing pages, everything else as
+permalink pages.  Use --save to snapshot a live old.reddit page as a new fixture.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from reddit_bot.reddit_parser import HAS_LXML, PARSER_BACKENDS, parse_listing, parse_post_content
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_FOLDER = ROOT_DIR / "fixtures" / "old-reddit"
+
+
+def save_fixture(url, name):
+    """Download ``url`` and store it as a fixture called ``name``"""
+    import requests
+
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'}
+    response = requests.get(url, headers=headers, timeout=30)
+    response.raise_for_status()
+    path = FIXTURES_FOLDER / name
+    path.write_bytes(response.content)
+    print(f"✓ Saved {url} → {path}")
+
+
+def time_backend(parse, markup, backend, rounds):
+    """Return (seconds per parse, result of the last parse)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = parse(markup, backend)
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends over saved old.reddit pages.")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_FOLDER, help="Folder with saved *.html pages")
+    parser.add_argument("--rounds", "-n", type=int, default=20, help="Parses per backend per page (default: 20)")
+    parser.add_argument("--save", nargs=2, metavar=("URL", "NAME"), help="Save a live page as a fixture and exit")
+    args = parser.parse_args()
+
+    if args.save:
+        save_fixture(*args.save)
+        return
+
+    pages = sorted(args.fixtures.glob("*.html"))
+    if not pages:
+        print(f"❌ No *.html fixtures found in {args.fixtures}")
+        return
+
+    backends = [b for b in PARSER_BACKENDS if b != "lxml" or HAS_LXML]
+    if not HAS_LXML:
+        print("⚠ lxml is not installed; skipping the lxml backend (restricted uses html.parser)\n")
+
+    totals = {backend: 0.0 for backend in backends}
+    mismatches = 0
+
+    print(f"{'page':<32} {'size':>8}  " + "  ".join(f"{b:>12}" for b in backends))
+    for page in pages:
+        markup = page.read_bytes()
+        parse = parse_listing if page.name.startswith("listing_") else parse_post_content
+
+        timings = {}
+        expected = None
+        for backend in backends:
+            seconds, result = time_backend(parse, markup, backend, args.rounds)
+            timings[backend] = seconds
+            totals[backend] += seconds
+            if expected is None:
+                expected = result
+            elif result != expected:
+                mismatches += 1
+                print(f"✗ {page.name}: {backend} extracted different results than {backends[0]}")
+
+        size = f"{len(markup) // 1024}KB"
+        print(f"{page.name:<32} {size:>8}  " + "  ".join(f"{timings[b] * 1000:>10.2f}ms" for b in backends))
+
+    print()
+    baseline = totals[backends[0]]
+    for backend in backends:
+        speedup = baseline / totals[backend] if totals[backend] else 0
+        print(f"{backend:<12} total {totals[backend] * 1000:>9.2f}ms per round  ({speedup:.1f}x vs {backends[0]})")
+
+    if mismatches:
+        print(f"\n❌ {mismatches} extraction mismatch(es) between backends")
+    else:
+        print("\n✅ All backends extracted identical results")
+
+
+if __name__ == "__main__":
+    main()
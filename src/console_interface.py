@@ -121,6 +121,10 @@ def main():
     except ValueError:
         config['sort_type'] = "new"
     
+    # Ask for listing mode
+    use_json_listing = get_boolean_input("Read posts from the JSON listing (one request per subreddit instead of one per post)", True)
+    config['listing_mode'] = 'json' if use_json_listing else 'html'
+    
     # Ask for post limit
     default_limit = "25"
     limit_input = get_user_input("Number of posts to scrape per subreddit", default_limit)
@@ -129,6 +133,14 @@ def main():
     except ValueError:
         config['limit'] = 25
         
+    # Ask how many posts to keep from each subreddit
+    default_target = "3"
+    target_input = get_user_input("Number of posts to save per subreddit (more listing pages are read if needed)", default_target)
+    try:
+        config['posts_per_subreddit'] = int(target_input)
+    except ValueError:
+        config['posts_per_subreddit'] = 3
+        
     # Ask for maximum character count
     default_chars = "1500"
     chars_input = get_user_input("Maximum post length in characters (~1500 chars ≈ 1 minute reading time)", default_chars)
@@ -143,7 +155,9 @@ def main():
     print(f"• Subreddits: {', '.join(config['subreddits'])}")
     print(f"• Auto-generate Audio: {'Yes' if config['auto_generate_audio'] else 'No'}")
     print(f"• Sort Type: {config['sort_type']}")
+    print(f"• Listing Mode: {config['listing_mode'].upper()}")
     print(f"• Posts Per Subreddit: {config['limit']}")
+    print(f"• Posts To Save Per Subreddit: {config['posts_per_subreddit']}")
     print(f"• Maximum Character Count: {config['max_chars']} characters (~{config['max_chars'] // 1500} minute(s) reading time)")
     print("="*60)
     
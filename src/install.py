@@ -79,10 +79,16 @@ def main():
     required_packages = {
         "requests": "For web requests",
         "beautifulsoup4": "For HTML parsing",
+        "aiohttp": "For pooled Groq API requests",
         "edge-tts": "For text-to-speech functionality",
         "pysrt": "For subtitle file creation",
     }
 
+    # Versions the code is known to work with (tts_session.py uses edge-tts internals)
+    pinned_versions = {
+        "edge-tts": "edge-tts>=7.2,<8",
+    }
+
     installed = get_installed_packages()
     
     packages_to_install = []
@@ -90,6 +96,9 @@ def main():
         package_lower = package.lower()
         if package_lower not in installed:
             packages_to_install.append(package)
+        elif package in pinned_versions and installed[package_lower] not in pkg_resources.Requirement.parse(pinned_versions[package]):
+            print(f"⚠ {package} {installed[package_lower]} is outside {pinned_versions[package]}, it will be replaced")
+            packages_to_install.append(package)
     
     if not packages_to_install:
         print("✅ All required packages are already installed!")
@@ -98,7 +107,17 @@ def main():
         for package in packages_to_install:
             description = required_packages.get(package, "")
             print(f"\n➤ Installing {package} - {description}")
-            install_package(package)
+            install_package(pinned_versions.get(package, package))
+    
+    # Nice to have; everything works without them
+    optional_packages = {
+        "lxml": "For faster HTML parsing (optional)",
+    }
+    for package, description in optional_packages.items():
+        if package not in installed:
+            print(f"\n➤ Installing {package} - {description}")
+            if not install_package(package):
+                print(f"   {package} is optional, continuing without it")
     
     # Create required directories
     print("\nChecking required directories...")
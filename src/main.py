@@ -1,569 +1,20 @@
-import time
-import random
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import os
-from pathlib import Path
-import subprocess
-import sys
-import json
-
-# Default Configuration
-TTS_SCRIPT_NAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "voice-over.py")  # Full path to TTS script
-SUBTITLES_SCRIPT_NAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "create-subtitles.py")  # Full path to subtitles script
-
-config_json = os.environ.get("REDDIT_BOT_CONFIG", "{}")
-try:
-    config = json.loads(config_json)
-    # Use config values or fall back to defaults
-    subreddits = config.get('subreddits', ['AmITheAsshole', 'AmIOverreacting'])
-    USE_AI_CLEANING = config.get('use_ai_cleaning', True)
-    AUTO_GENERATE_AUDIO = config.get('auto_generate_audio', True)
-    OUTPUT_FOLDER = config.get('output_folder', "get-audio")
-    SORT_TYPE = config.get('sort_type', 'new')
-    POST_LIMIT = config.get('limit', 25)
-    MAX_CHARS = config.get('max_chars', 1500)  # New parameter for max characters
-    
-    print(f"Using configuration from console interface")
-    
-except json.JSONDecodeError:
-    # Default configuration if no valid config found
-    subreddits = ['AmITheAsshole', 'AmIOverreacting']
-    USE_AI_CLEANING = True  # Set to False to disable AI processing
-    AUTO_GENERATE_AUDIO = True  # Set to False to disable automatic audio generation
-    OUTPUT_FOLDER = "get-audio"  # Folder where text files will be saved
-    SORT_TYPE = 'new'
-    POST_LIMIT = 25
-    MAX_CHARS = 1500  # Default max characters
-
-# API Key (reads from api_key.txt file, or falls back to environment variable)
-def load_api_key():
-    """Load API key from api_key.txt file or environment variable"""
-    # Get the path to the root directory
-    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    api_key_path = os.path.join(root_dir, 'api_key.txt')
-    
-    # Try to read from file first
-    try:
-        with open(api_key_path, 'r') as f:
-            key = f.read().strip()
-            if key:
-                return key
-    except FileNotFoundError:
-        pass
-    
-    # Fall back to environment variable
-    return os.getenv("GROQ_API_KEY", "")
-
-GROQ_API_KEY = load_api_key()
-
-if not GROQ_API_KEY:
-    print("⚠ Warning: No API key found. Please create 'api_key.txt' with your Groq API key or set GROQ_API_KEY environment variable.")
-    print("AI cleaning will be disabled.")
-    USE_AI_CLEANING = False
-
-def generate_youtube_content_with_ai(post):
-    """Generate YouTube Shorts titles, description, and hashtags"""
-    if not USE_AI_CLEANING or not GROQ_API_KEY:
-        return "", "", ""
-    
-    prompt = f"""Based on this Reddit post, create content for a YouTube Shorts video:
-
-1. Generate 5-7 relevant hashtags for YouTube.
-Focus on: the main topic, emotions, relationships, conflicts, and general AITA/Reddit content.
-Make sure all hashtags are LOWERCASE.
-
-2. Create 5-6 engaging YouTube Shorts titles (40-50 characters each).
-Each title should end with 2 or 3 of the most relevant hashtags from above.
-Make titles catchy and clickable but not clickbait.
-
-3. Create a YouTube Shorts description (1-2 sentences) that incorporates the hashtags naturally at the end.
-
-Format your response exactly like this:
----HASHTAGS---
-hashtag1 hashtag2 hashtag3 hashtag4 hashtag5
-
----TITLES---
-Title 1 #relevanthashtag
-Title 2 #anotherhashtag
-Title 3 #relevanthashtag
-[etc.]
-
----DESCRIPTION---
-A compelling description sentence or two. #hashtag1 #hashtag2 #hashtag3 #hashtag4 #hashtag5
-
-Post: {post}
 """
+Command-line entry point of the scraper.  The configuration comes from the
+REDDIT_BOT_CONFIG environment variable (set by console_interface.py); the
+scraping itself lives in reddit_bot/scraper.py.
+"""
+import json
+import os
 
-    try:
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": "llama-3.3-70b-versatile",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
-            "max_tokens": 500
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-        content = result['choices'][0]['message']['content'].strip()
-        
-        # Parse the response to extract hashtags, titles, and description
-        hashtags = ""
-        titles = []
-        description = ""
-        
-        current_section = None
-        for line in content.split('\n'):
-            if line.strip() == "---HASHTAGS---":
-                current_section = "hashtags"
-            elif line.strip() == "---TITLES---":
-                current_section = "titles"
-            elif line.strip() == "---DESCRIPTION---":
-                current_section = "description"
-            elif line.strip() and current_section == "hashtags":
-                hashtags = line.strip()
-            elif line.strip() and current_section == "titles":
-                titles.append(line.strip())
-            elif line.strip() and current_section == "description":
-                if description:
-                    description += "\n" + line.strip()
-                else:
-                    description = line.strip()
-        
-        return hashtags, titles, description
-    except Exception as e:
-        print(f"⚠ YouTube content generation failed: {e}")
-        return "", [], ""
-
-
-def generate_hashtags_with_ai(post):
-    """Use AI to generate relevant hashtags for social media (legacy function)"""
-    if not USE_AI_CLEANING or not GROQ_API_KEY:
-        return ""
-    
-    # Call the new comprehensive function and just return the hashtags
-    hashtags, _, _ = generate_youtube_content_with_ai(post)
-    return hashtags
-
-def clean_text_with_ai(title, content):
-    """Cleans and tags a whole post (title + content) at once"""
-    combined_text = f"{title}. {content}"
-    
-    if not USE_AI_CLEANING or not combined_text:
-        return title, content
-    
-    prompt = f"""You are a grammar and spelling corrector. Fix ALL errors in this text:
-- Correct ALL spelling mistakes
-- Fix ALL grammar errors (verb tenses, subject-verb agreement, pronouns, etc.)
-- Expand common abbreviations (like "2" to "to", "ur" to "your", "bro" to "brother")
-- Fix punctuation errors
-- Make "AIO" be "Am I overreacting"
-- Make "AITA" be "Am I the asshole"
-- A number followed by an M or an F should be changed to: XXM = XX male, XXF = XX female, XXm = XX male, XXf = XX female
-- If the text makes it clear the speaker is **male** (e.g., says "I (21M)" or "I am a dad"), prepend the ENTIRE text with: <<MALE>> .
-- If the text makes it clear the speaker is **female** (e.g., says "I (19F)" or "I am a mom"), prepend the ENTIRE text with: <<FEMALE>> .
-- If gender is not clear, prepend the ENTIRE text with: <<MALE>> .
-- Put the content on multiple lines so it is easier to read
-
-IMPORTANT:
-- Only insert one gender tag (at the very start).
-- Keep the exact same tone, style, and meaning. Do not rewrite sentences.
-- Return ONLY the corrected text with no explanations.
-
-Text to correct:
-{combined_text}"""
-
-    try:
-        return clean_with_groq(prompt)
-    except Exception as e:
-        print(f"⚠ AI cleaning failed: {e}, using original text")
-        return content
-
-def clean_with_groq(prompt):
-    """Use Groq's free API (very fast)"""
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": "llama-3.3-70b-versatile",  # Fast and free
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.3,
-        "max_tokens": 2000
-    }
-    
-    response = requests.post(url, headers=headers, json=data, timeout=30)
-    response.raise_for_status()
-    result = response.json()
-    return result['choices'][0]['message']['content'].strip()
-
-def get_random_headers():
-    # More varied and up-to-date user agents
-    user_agents = [
-        # Chrome on Windows
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        # Chrome on Mac
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        # Firefox on Windows
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0',
-        # Firefox on Mac
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/109.0',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:120.0) Gecko/20100101 Firefox/120.0',
-        # Safari
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Safari/605.1.15',
-        # Edge
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0'
-    ]
-    
-    # Random accept language with appropriate weighting
-    accept_languages = [
-        'en-US,en;q=0.9',
-        'en-US,en;q=0.8',
-        'en-GB,en;q=0.9,en-US;q=0.8',
-        'en-CA,en;q=0.9,en-US;q=0.8',
-        'en;q=0.9',
-    ]
-    
-    # Randomize some header values to appear more human-like
-    headers = {
-        'User-Agent': random.choice(user_agents),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-        'Accept-Language': random.choice(accept_languages),
-        'Accept-Encoding': 'gzip, deflate, br',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': random.choice(['none', 'same-origin']),
-        'Sec-Fetch-User': '?1',
-        'Referer': 'https://www.google.com/' if random.random() > 0.5 else 'https://old.reddit.com/',
-        'Cache-Control': 'max-age=0',
-        # Add some randomness to the headers
-        'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"', 
-        'Sec-Ch-Ua-Mobile': '?0',
-        'Sec-Ch-Ua-Platform': '"' + random.choice(['Windows', 'macOS', 'Linux']) + '"',
-    }
-    
-    return headers
-
-session = requests.Session()
+from reddit_bot import scraper
 
-def get_post_content(permalink):
-    """Get the full content of a Reddit post"""
-    if not permalink:
-        return None, 0
-    
-    print(f"Getting content from: {permalink}")
-    headers = get_random_headers()
-    
+if __name__ == "__main__":
+    config_json = os.environ.get("REDDIT_BOT_CONFIG", "{}")
     try:
-        response = session.get(permalink, headers=headers, timeout=30)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            post_container = soup.find('div', {'data-type': 'link'})
-            if post_container:
-                content_div = post_container.find('div', class_='usertext-body')
-                if content_div:
-                    content_p = content_div.find('div', class_='md')
-                    if content_p:
-                        content = content_p.get_text(separator='\n', strip=True)
-                        return content, len(content)
-                    else:
-                        content = content_div.get_text(strip=True)
-                        return content, len(content)
-            
-            expando = soup.find('div', class_='expando')
-            if expando:
-                content_div = expando.find('div', class_='usertext-body')
-                if content_div:
-                    content_p = content_div.find('div', class_='md')
-                    if content_p:
-                        content = content_p.get_text(separator='\n', strip=True)
-                        return content, len(content)
-            
-            thing_div = soup.find('div', class_='thing', attrs={'data-type': 'link'})
-            if thing_div:
-                usertext = thing_div.find('div', class_='usertext-body')
-                if usertext:
-                    md_div = usertext.find('div', class_='md')
-                    if md_div:
-                        content = md_div.get_text(separator='\n', strip=True)
-                        return content, len(content)
-            
-            return None, 0
-        else:
-            return None, 0
-    except Exception as e:
-        print(f"Error fetching content: {e}")
-        return None, 0
-
-def save_post_to_file(title, post_content, filename):
-    """Save post data to a text file with AI-cleaned content"""    
-    # Clean content and title with AI before saving
-    if USE_AI_CLEANING:
-        print(f"🤖 Cleaning title and content with AI...")
-        cleaned_post = clean_text_with_ai(title, post_content)
-        
-        print(f"🎬 Generating YouTube Shorts content...")
-        hashtags, shorts_titles, shorts_description = generate_youtube_content_with_ai(cleaned_post)
-    else:
-        cleaned_title = title
-        cleaned_content = post_content
-        hashtags = ""
-        shorts_titles = []
-        shorts_description = ""
-    
-    with open(filename, 'a', encoding='utf-8') as f:
-        f.write(f"---POST_SEPARATOR---\n")
-        if USE_AI_CLEANING:
-            f.write(f"{cleaned_post}\n")
-        else:
-            f.write(f"{cleaned_title}\n")
-            f.write(f"{cleaned_content}\n")
-        
-        # Add YouTube content sections
-        if hashtags:
-            # Add # to each hashtag
-            formatted_hashtags = ' '.join([f'#{tag}' for tag in hashtags.split()])
-            f.write(f"\n---HASHTAGS---\n{formatted_hashtags}\n")
-        
-        if shorts_titles:
-            f.write(f"\n---SHORTS_TITLES---\n")
-            for title in shorts_titles:
-                f.write(f"{title}\n")
-        
-        if shorts_description:
-            f.write(f"\n---SHORTS_DESCRIPTION---\n{shorts_description}\n")
-
-def process_response(response, filename, subreddit):
-    print(f"Status Code: {response.status_code}")
-    
-    if response.status_code == 200:
-        try:
-            # Check if the page might indicate a banned subreddit
-            if 'banned' in response.text[:1000].lower():
-                print(f"\n⚠️ Warning: Subreddit r/{subreddit} appears to be banned or inaccessible")
-                print("Skipping this subreddit. Try another one or check if it exists.\n")
-                return
-                
-            soup = BeautifulSoup(response.content, 'html.parser')
-            posts = soup.find_all('div', class_='thing')
-            
-            regular_posts = []
-            for post in posts:
-                author_elem = post.find('a', class_='author')
-                author = author_elem.get_text() if author_elem else 'Unknown'
-                
-                if not any(mod_indicator in author.lower() for mod_indicator in ['mod', 'automod', 'aitamod']):
-                    if not post.find('span', class_='stickied-tagline'):
-                        regular_posts.append(post)
-            
-            posts_processed = 0
-            posts_checked = 0
-            
-            for post in regular_posts:
-                if posts_processed >= 3:
-                    break
-                    
-                posts_checked += 1
-                
-                try:
-                    title_elem = post.find('a', class_='title')
-                    title = title_elem.get_text() if title_elem else 'No title'
-                    
-                    score_elem = post.find('div', class_='score unvoted')
-                    if not score_elem:
-                        score_elem = post.find('div', class_='score likes')
-                    if not score_elem:
-                        score_elem = post.find('div', class_='score dislikes')
-                    score = score_elem.get_text() if score_elem else '0'
-                    
-                    author_elem = post.find('a', class_='author')
-                    author = author_elem.get_text() if author_elem else 'Unknown'
-                    
-                    link_elem = post.find('a', class_='title')
-                    url = link_elem.get('href') if link_elem else ''
-                    
-                    permalink = post.get('data-permalink', '')
-                    if permalink:
-                        full_permalink = f"https://old.reddit.com{permalink}"
-                        
-                        time.sleep(random.uniform(3, 6))
-                        post_content, content_length = get_post_content(full_permalink)
-                        
-                        if post_content and content_length <= MAX_CHARS:  # Using MAX_CHARS from config
-                            save_post_to_file(title, post_content, filename)
-                            print(f"✓ Saved post: '{title}' ({content_length} chars)")
-                            posts_processed += 1
-                        else:
-                            if content_length > MAX_CHARS:
-                                print(f"✗ Skipping post '{title}' - too long ({content_length} characters)")
-                            else:
-                                print(f"✗ Skipping post '{title}' - no content found")
-                    
-                except Exception as e:
-                    print(f"Error parsing post: {e}")
-                    continue
-            
-            print(f"Checked {posts_checked} posts, saved {posts_processed} posts under {MAX_CHARS} characters")
-                
-        except Exception as e:
-            print(f"Error parsing HTML: {e}")
-            print("Response content:", response.text[:500])
-    else:
-        print(f"Request failed with status code: {response.status_code}")
-        print("Response content:", response.text[:500])
-
-def respectful_delay():
-    """Adds a respectful delay between requests to avoid overloading servers
-    and to reduce the chance of being detected as a bot"""
-    # More randomized delay between 20-35 seconds
-    base_delay = random.uniform(20, 35)
-    
-    # Add small random noise to make the pattern less predictable
-    noise = random.uniform(-2, 2)
-    
-    # Ensure minimum delay is at least 18 seconds
-    total_delay = max(18, base_delay + noise)
-    
-    print(f"Waiting for {total_delay:.1f} seconds to be respectful to Reddit's servers...")
-    time.sleep(total_delay)
-
-def scrape_with_delays(urls, filename):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    ai_status = f"AI Cleaning: {'ENABLED (Groq)' if USE_AI_CLEANING else 'DISABLED'}"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"REDDIT SCRAPER LOG - Started: {timestamp}\n")
-        f.write(f"Subreddits: {subreddits}\n")
-        f.write(f"Filter: Posts under {MAX_CHARS} characters\n")
-        f.write(f"{ai_status}\n")
-    
-    print("Establishing session...")
-    home_response = session.get('https://old.reddit.com/', headers=get_random_headers())
-    print(f"Homepage status: {home_response.status_code}")
-    time.sleep(random.uniform(3, 7))
-    
-    total_urls = len(urls)
-    
-    # Skip delays completely if there's only one subreddit
-    if total_urls == 1:
-        # Just process the single subreddit without delays
-        url = urls[0]
-        subreddit = "unknown"
-        try:
-            subreddit = url.split('/r/')[1].split('/')[0]
-        except IndexError:
-            pass
-            
-        print(f"Scraping: {url} (r/{subreddit})")
-        headers = get_random_headers()
-        response = session.get(url, headers=headers, timeout=30)
-        process_response(response, filename, subreddit)
-        print("Processing complete. Moving on...")
-        return
-        
-    # If we have multiple subreddits, process them with delays
-    for i, url in enumerate(urls):
-        # Extract subreddit name for error reporting
-        subreddit = "unknown"
-        try:
-            subreddit = url.split('/r/')[1].split('/')[0]
-        except IndexError:
-            pass
-            
-        print(f"Scraping: {url} (r/{subreddit})")
-        headers = get_random_headers()
-        response = session.get(url, headers=headers, timeout=30)
-        process_response(response, filename, subreddit)
-        
-        # Only wait if this isn't the last subreddit
-        if i < total_urls - 1:
-            respectful_delay()
-        else:
-            print("All subreddits processed. Moving on...")
-
-# Function to generate Reddit URLs for the given subreddits
-def generate_reddit_urls(subreddits, sort_type='new', limit=25):
-    urls = []
-    for subreddit in subreddits:
-        url = f'https://old.reddit.com/r/{subreddit}/{sort_type}/?limit={limit}'
-        urls.append(url)
-    return urls
-
-# Get the path to the root directory
-root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-# Create get-audio folder if it doesn't exist (in root directory)
-output_dir = os.path.join(root_dir, OUTPUT_FOLDER)
-Path(output_dir).mkdir(exist_ok=True)
-
-output_filename = os.path.join(output_dir, f"reddit_posts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
-
-print(f"Starting scraper... Posts will be saved to: {output_filename}")
-print(f"AI Cleaning: {'ENABLED (Groq)' if USE_AI_CLEANING else 'DISABLED'}")
-print(f"Max character limit: {MAX_CHARS} characters")
-
-urls = generate_reddit_urls(subreddits, SORT_TYPE, POST_LIMIT)
-scrape_with_delays(urls, output_filename)
-
-print(f"\nScraping complete! Check '{output_filename}' for saved posts.")
-
-# Automatically run TTS script if enabled
-if AUTO_GENERATE_AUDIO:
-    print(f"\n{'='*80}")
-    print("🎙️ Starting automatic audio generation...")
-    print(f"{'='*80}\n")
+        config = json.loads(config_json)
+        print(f"Using configuration from console interface")
+    except json.JSONDecodeError:
+        # Default configuration if no valid config found
+        config = {}
     
-    # Check if TTS script exists
-    if os.path.exists(TTS_SCRIPT_NAME):
-        try:
-            # Run the TTS script
-            result = subprocess.run([sys.executable, TTS_SCRIPT_NAME], check=True)
-            print(f"\n{'='*80}")
-            print("✅ Audio generation complete!")
-            print(f"{'='*80}")
-            
-            # Now generate subtitles
-            if os.path.exists(SUBTITLES_SCRIPT_NAME):
-                print(f"\n{'='*80}")
-                print("📝 Starting subtitle generation...")
-                print(f"{'='*80}\n")
-                
-                try:
-                    # Run the subtitles script
-                    result = subprocess.run([sys.executable, SUBTITLES_SCRIPT_NAME], check=True)
-                    print(f"\n{'='*80}")
-                    print("✅ Subtitle generation complete!")
-                    print(f"{'='*80}")
-                except subprocess.CalledProcessError as e:
-                    print(f"\n❌ Error running subtitles script: {e}")
-                except Exception as e:
-                    print(f"\n❌ Unexpected error with subtitles: {e}")
-            else:
-                print(f"⚠ Warning: Subtitles script '{SUBTITLES_SCRIPT_NAME}' not found.")
-                print(f"Skipping automatic subtitle generation.")
-        except subprocess.CalledProcessError as e:
-            print(f"\n❌ Error running TTS script: {e}")
-        except Exception as e:
-            print(f"\n❌ Unexpected error: {e}")
-    else:
-        print(f"⚠ Warning: TTS script '{TTS_SCRIPT_NAME}' not found in current directory.")
-        print(f"Skipping automatic audio generation.")
-else:
-    print(f"\n💡 Tip: Run 'python3 src/voice-over.py' to convert posts to audio!")
-    print(f"   Then run 'python3 src/create-subtitles.py' to generate subtitles.")
+    scraper.run(config)
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Serve a local stand-in for Groq's chat-completions API (see reddit_bot/mock_groq.py)
+
+    python3 src/mock-groq.py --port 8000
+    python3 src/mock-groq.py --latency 0.5 --rpm 30 --rate-limit 0.1 --retry-after 2
+"""
+from reddit_bot.mock_groq import main
+
+if __name__ == "__main__":
+    main()
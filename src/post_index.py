@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Inspect and prune the processed-post index (see reddit_bot/post_index.py)
+
+    python3 src/post_index.py stats
+    python3 src/post_index.py list --stage saved --limit 20
+    python3 src/post_index.py prune --older-than 30
+    python3 src/post_index.py forget t3_1abcde
+    python3 src/post_index.py watermarks [--reset SUBREDDIT]
+"""
+from reddit_bot.post_index import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Reddit-to-video pipeline as an importable package.
+
+Every stage has an entry function that can be called in-process:
+
+    from reddit_bot import run_scraper, generate_audio, generate_subtitles, clean_folder
+
+    run_scraper({"subreddits": ["AmITheAsshole"], "auto_generate_audio": False})
+    generate_audio()         # posts without audio -> audio_posts
+    generate_subtitles()     # posts without subtitles -> subtitles
+    clean_folder()           # old-posts text logs -> cleaned-text (standalone tool)
+
+Submodules and the names below are imported on first use, so importing the
+package is cheap and aiohttp, bs4, edge_tts, pysrt and requests are only loaded by the
+stages that need them.
+"""
+import importlib
+
+# name -> (submodule, attribute)
+_EXPORTS = {
+    "run_scraper": ("scraper", "run"),
+    "configure_scraper": ("scraper", "configure"),
+    "generate_audio": ("voice_over", "generate_audio"),
+    "convert_post": ("voice_over", "convert_post"),
+    "text_to_speech": ("voice_over", "text_to_speech"),
+    "generate_subtitles": ("subtitles", "generate_subtitles"),
+    "subtitle_post": ("subtitles", "subtitle_post"),
+    "llm_chunked_srt": ("subtitles", "llm_chunked_srt"),
+    "clean_folder": ("text_cleaning", "clean_folder"),
+    "process_block": ("text_cleaning", "process_block"),
+    "normalize_post": ("normalize", "normalize_post"),
+    "parse_listing": ("reddit_parser", "parse_listing"),
+    "parse_listing_json": ("reddit_parser", "parse_listing_json"),
+    "parse_post_content": ("reddit_parser", "parse_post_content"),
+    "PostIndex": ("post_index", "PostIndex"),
+    "PostStore": ("post_store", "PostStore"),
+    "CachedSession": ("http_cache", "CachedSession"),
+    "HostScheduler": ("politeness", "HostScheduler"),
+    "Pipeline": ("pipeline", "Pipeline"),
+    "Stage": ("pipeline", "Stage"),
+    "GroqClient": ("groq", "GroqClient"),
+    "BackendPool": ("llm_backends", "BackendPool"),
+    "LLMCache": ("llm_cache", "LLMCache"),
+    "TokenBudget": ("token_budget", "TokenBudget"),
+    "ModelRouter": ("model_router", "ModelRouter"),
+    "SentenceSplitter": ("sentence_stream", "SentenceSplitter"),
+    "CircuitBreaker": ("circuit_breaker", "CircuitBreaker"),
+    "AudioStore": ("audio_store", "AudioStore"),
+    "TTSSession": ("tts_session", "TTSSession"),
+}
+
+_SUBMODULES = (
+    "audio_store", "circuit_breaker", "edge_tts_protocol", "groq", "http_cache", "llm_backends", "llm_cache",
+    "mock_groq", "model_router", "normalize", "paths", "pipeline", "politeness", "post_index", "post_store",
+    "reddit_parser", "scraper", "sentence_stream", "subtitles", "text_cleaning", "token_budget", "tts_cache",
+    "tts_session", "voice_over", "word_timings",
+)
+
+__all__ = sorted(_EXPORTS) + list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module_name, attribute = _EXPORTS[name]
+        value = getattr(importlib.import_module(f".{module_name}", __name__), attribute)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return __all__
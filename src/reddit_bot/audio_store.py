@@ -0,0 +1,142 @@
+"""
+Content-addressed store of voiced posts
+
+*   Every post's MP3 is stored once, named after a hash of what was spoken
+    and how (voice, speaking rate, whole/chunked/streamed synthesis, text).
+    A post whose text and voice haven't changed is never synthesized again,
+    and identical posts share one file
+*   The friendly files in audio_posts/ (post_01_Title.mp3) are hard links to
+    the stored blobs, or copies where a link isn't possible, and
+    audio_posts/manifest.json maps every name to its blob and post id
+*   A blob's word timing file (see word_timings.py), if it was synthesized
+    with one, is stored and linked along with it
+*   A name already taken by another post gets the post's id appended instead
+    of replacing that post's audio, so runs that number their posts from 1
+    again don't collide
+
+The blobs live in ``audio_store/`` in the project root, two hex digits of
+the hash per subfolder.  Unlike tts_cache/ the folder isn't disposable in
+principle, but the linked files in audio_posts/ keep playing without it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .paths import ROOT_DIR
+from .word_timings import timings_path
+
+DEFAULT_STORE_FOLDER = ROOT_DIR / "audio_store"
+MANIFEST_NAME = "manifest.json"
+
+
+def audio_key(voice: str, rate: str, mode: str, text: str) -> str:
+    """Hash identifying the audio of ``text`` spoken in ``voice`` at ``rate``, synthesized in ``mode``"""
+    return hashlib.sha256(json.dumps([voice, rate, mode, text]).encode("utf-8")).hexdigest()
+
+
+class AudioStore:
+    """Post MP3s on disk keyed by audio_key(), published under friendly names"""
+
+    def __init__(self, folder: str | Path = DEFAULT_STORE_FOLDER):
+        self.folder = Path(folder)
+        self.lock = threading.Lock()
+        self.reused = 0
+        self.stored = 0
+
+    def path(self, key: str) -> Path:
+        return self.folder / key[:2] / f"{key}.mp3"
+
+    def has(self, key: str, words: bool = False) -> bool:
+        """True if the blob of ``key`` is stored (with its word timings, if ``words``)"""
+        path = self.path(key)
+        if words and not timings_path(path).is_file():
+            return False
+        return path.is_file() and path.stat().st_size > 0
+
+    def temporary_path(self, key: str) -> Path:
+        """Where to write the blob of ``key`` before commit() moves it in place"""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def commit(self, key: str, temporary: Path) -> None:
+        """Move a blob written to temporary_path() in place, with its word timings if it has any"""
+        if timings_path(temporary).is_file():
+            os.replace(timings_path(temporary), timings_path(self.path(key)))
+        os.replace(temporary, self.path(key))
+        with self.lock:
+            self.stored += 1
+
+    def put(self, key: str, audio: bytes) -> None:
+        temporary = self.temporary_path(key)
+        temporary.write_bytes(audio)
+        self.commit(key, temporary)
+
+    def note_reused(self) -> None:
+        with self.lock:
+            self.reused += 1
+
+    def publish(self, key: str, path: str | Path, post_id: str = "") -> Path:
+        """Make ``path`` the audio of ``key`` and record it in the manifest of its folder.
+        Returns the path used, which has ``post_id`` appended if the name belongs to another post."""
+        path = Path(path)
+        with self.lock:
+            manifest = load_manifest(path.parent)
+            owner = manifest.get(path.name, {}).get("post_id")
+            # A file the manifest doesn't know about predates the store; leave it alone too
+            taken = owner != post_id if owner is not None else path.exists()
+            if taken and post_id:
+                path = path.with_name(f"{path.stem}_{post_id[-8:]}{path.suffix}")
+            _link(self.path(key), path)
+            if timings_path(self.path(key)).is_file():
+                _link(timings_path(self.path(key)), timings_path(path))
+            else:
+                # Timings of the audio this name pointed to before
+                timings_path(path).unlink(missing_ok=True)
+            manifest[path.name] = {
+                "blob": key,
+                "post_id": post_id,
+                "updated": datetime.now().isoformat(timespec="seconds"),
+            }
+            _save_manifest(path.parent, manifest)
+        return path
+
+    def summary(self) -> str:
+        with self.lock:
+            return f"Audio store: {self.reused} post(s) reused unchanged audio, {self.stored} newly synthesized"
+
+
+def load_manifest(folder: str | Path) -> dict:
+    """name -> {"blob", "post_id", "updated"} for the audio files in ``folder``"""
+    try:
+        return json.loads((Path(folder) / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(folder: Path, manifest: dict) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / MANIFEST_NAME
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(temporary, path)
+
+
+def _link(blob: Path, path: Path) -> None:
+    """Point ``path`` at ``blob``: a hard link, or a copy across file systems"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists() and os.path.samefile(blob, path):
+        return  # already linked (renaming a link onto itself would leave the temporary behind)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(blob, temporary)
+    except OSError:
+        shutil.copyfile(blob, temporary)
+    os.replace(temporary, path)
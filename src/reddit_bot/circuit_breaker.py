@@ -0,0 +1,179 @@
+"""
+Circuit breakers and adaptive timeouts for the external services (Groq and
+the other LLM backends, Edge TTS)
+
+*   A breaker opens after ``failure_threshold`` failures in a row.  While it
+    is open, calls fail at once with CircuitOpen instead of each one waiting
+    for its own timeout
+*   After ``cooldown`` seconds a single trial call is let through
+    (half-open): if it succeeds the breaker closes, if it fails the breaker
+    stays open for another cool-off
+*   Timeouts follow the observed latencies: a multiple of the p95 of the
+    recent successful calls, kept between ``min_timeout`` and
+    ``max_timeout``.  Calls of very different sizes (a title vs. a whole
+    post for TTS) pass a ``size`` and are timed per unit of it
+*   State changes are printed, and the posts whose calls failed or were
+    refused are remembered for the run report
+
+A breaker is shared by threads running their own event loops, so its state
+is guarded by a lock rather than by the loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+# Latencies needed before the timeout is derived from them
+MIN_SAMPLES = 5
+
+
+class CircuitOpen(RuntimeError):
+    """A call refused because the service's breaker is open"""
+
+    def __init__(self, name, retry_in):
+        if retry_in > 0:
+            message = f"{name} is unavailable (circuit open, next trial in {retry_in:.0f}s)"
+        else:
+            message = f"{name} is unavailable (circuit half-open, trial call under way)"
+        super().__init__(message)
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Fails calls to a degraded service fast and times calls out at a multiple of their p95"""
+
+    def __init__(self, name, failure_threshold=5, cooldown=30.0, min_timeout=10.0, max_timeout=60.0,
+                 timeout_factor=3.0, adaptive=True, window=50):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.adaptive = adaptive
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=window)  # seconds per unit of size, successful calls only
+        self.state = CLOSED
+        self.failures = 0  # in a row
+        self.opened_at = 0.0
+        self.probing = False  # a half-open trial call is under way
+        self.trips = 0
+        self.failed_calls = 0
+        self.refused = 0
+        self.affected = []  # labels (e.g. "post 3") of calls that failed or were refused
+
+    def allow(self, label=""):
+        """Raise CircuitOpen unless a call may go out now"""
+        with self.lock:
+            if self.state == OPEN:
+                wait = self.opened_at + self.cooldown - time.monotonic()
+                if wait > 0:
+                    self._refuse(label)
+                    raise CircuitOpen(self.name, wait)
+                self.state = HALF_OPEN
+                self.probing = False
+                print(f"🔌 {self.name} circuit half-open, sending a trial call")
+            if self.state == HALF_OPEN:
+                if self.probing:
+                    self._refuse(label)
+                    raise CircuitOpen(self.name, 0.0)
+                self.probing = True
+
+    def available(self):
+        """True if allow() would let a call through"""
+        with self.lock:
+            if self.state == OPEN:
+                return time.monotonic() >= self.opened_at + self.cooldown
+            return not (self.state == HALF_OPEN and self.probing)
+
+    def timeout(self, size=1.0):
+        """Seconds to give a call of ``size`` before it counts as failed"""
+        with self.lock:
+            if not self.adaptive or len(self.samples) < MIN_SAMPLES:
+                return self.max_timeout
+            ordered = sorted(self.samples)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(self.max_timeout, max(self.min_timeout, p95 * size * self.timeout_factor))
+
+    def succeeded(self, latency=None, size=1.0):
+        """The service answered; ``latency`` is only given for calls that make a fair timing sample"""
+        with self.lock:
+            if latency is not None:
+                self.samples.append(latency / max(size, 1e-3))
+            self.failures = 0
+            self.probing = False
+            if self.state != CLOSED:
+                self.state = CLOSED
+                print(f"🔌 {self.name} circuit closed, the service is answering again")
+
+    def failed(self, reason, label=""):
+        """The service timed out or failed; opens the breaker after enough failures in a row"""
+        with self.lock:
+            self.failures += 1
+            self.failed_calls += 1
+            self._note(label)
+            if self.state == HALF_OPEN:
+                self._open(f"trial call failed: {reason}")
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open(f"{self.failures} failures in a row, last: {reason}")
+
+    def cancelled(self):
+        """A call ended without telling anything about the service (e.g. it was cancelled)"""
+        with self.lock:
+            self.probing = False
+
+    async def call(self, func, *args, size=1.0, label=""):
+        """Await ``func(*args)`` under the breaker: refused while it is open,
+        timed out adaptively, and counted either way"""
+        self.allow(label)
+        timeout = self.timeout(size)
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(func(*args), timeout)
+        except asyncio.CancelledError:
+            self.cancelled()
+            raise
+        except asyncio.TimeoutError:
+            self.failed(f"no answer within {timeout:.1f}s", label)
+            raise asyncio.TimeoutError(f"{self.name} gave no answer within {timeout:.1f}s") from None
+        except Exception as e:
+            self.failed(e, label)
+            raise
+        self.succeeded(time.monotonic() - started, size)
+        return result
+
+    def troubled(self):
+        """True once any call failed or was refused"""
+        with self.lock:
+            return bool(self.failed_calls or self.refused)
+
+    def summary(self):
+        """One-line report for the end of a run"""
+        with self.lock:
+            line = (f"{self.name} circuit: {self.state}, opened {self.trips} time(s), "
+                    f"{self.failed_calls} call(s) failed, {self.refused} refused while open")
+            if self.affected:
+                line += f"; affected: {', '.join(self.affected)}"
+            return line
+
+    # ------------------------------------------------------------------
+    def _open(self, reason):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probing = False
+        self.trips += 1
+        print(f"🔌 {self.name} circuit opened ({reason}); failing fast for {self.cooldown:.0f}s")
+
+    def _refuse(self, label):
+        self.refused += 1
+        self._note(label)
+
+    def _note(self, label):
+        if label and label not in self.affected:
+            self.affected.append(label)
@@ -0,0 +1,86 @@
+"""
+The edge_tts internals tts_session.py speaks the Edge TTS protocol with
+
+TTSSession opens its own websockets, so it relies on helpers edge_tts keeps
+private (``_SSL_CTX``, ``get_headers_and_data``, the DRM token helpers, ...)
+and that may be renamed or change shape in any release.  requirements.txt
+pins the releases they were written against (SUPPORTED below); on top of that
+this module checks, once when it loads, that every helper is still there, is
+the kind of object expected and accepts the arguments it is called with.
+
+``PROTOCOL`` maps each name to the helper, or is None when anything is off,
+with the reason in ``PROBLEM``; TTSSession then leaves every job to a plain
+edge_tts.Communicate.  The module is only imported by the first TTS job, so
+importing the package still doesn't load edge_tts.
+"""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import ssl
+
+SUPPORTED = "edge-tts>=7.2,<8"
+
+# name -> (module, attribute, what it must be): the number of positional
+# arguments it is called with, or the type of a value
+REQUIRED = {
+    "_SSL_CTX": ("edge_tts.communicate", "_SSL_CTX", ssl.SSLContext),
+    "connect_id": ("edge_tts.communicate", "connect_id", 0),
+    "date_to_string": ("edge_tts.communicate", "date_to_string", 0),
+    "escape": ("edge_tts.communicate", "escape", 1),
+    "unescape": ("edge_tts.communicate", "unescape", 1),
+    "get_headers_and_data": ("edge_tts.communicate", "get_headers_and_data", 2),
+    "mkssml": ("edge_tts.communicate", "mkssml", 2),
+    "remove_incompatible_characters": ("edge_tts.communicate", "remove_incompatible_characters", 1),
+    "split_text_by_byte_length": ("edge_tts.communicate", "split_text_by_byte_length", 2),
+    "ssml_headers_plus_data": ("edge_tts.communicate", "ssml_headers_plus_data", 3),
+    "SEC_MS_GEC_VERSION": ("edge_tts.constants", "SEC_MS_GEC_VERSION", str),
+    "WSS_HEADERS": ("edge_tts.constants", "WSS_HEADERS", dict),
+    "WSS_URL": ("edge_tts.constants", "WSS_URL", str),
+    "TTSConfig": ("edge_tts.data_classes", "TTSConfig", 5),
+    "DRM": ("edge_tts.drm", "DRM", type),
+    "NoAudioReceived": ("edge_tts.exceptions", "NoAudioReceived", type),
+    "UnexpectedResponse": ("edge_tts.exceptions", "UnexpectedResponse", type),
+    "UnknownResponse": ("edge_tts.exceptions", "UnknownResponse", type),
+    "WebSocketError": ("edge_tts.exceptions", "WebSocketError", type),
+    "WSServerHandshakeError": ("aiohttp", "WSServerHandshakeError", type),
+}
+
+# Methods of DRM that are called, with their number of arguments
+DRM_METHODS = {
+    "generate_sec_ms_gec": 0,
+    "headers_with_muid": 1,
+    "handle_client_response_error": 1,
+}
+
+
+def _check(name, value, expected):
+    """Raise TypeError if ``value`` isn't what ``expected`` describes"""
+    if isinstance(expected, int):
+        # Binding checks the arguments against the signature without calling anything
+        try:
+            inspect.signature(value).bind(*[None] * expected)
+        except (TypeError, ValueError) as e:
+            raise TypeError(f"{name} doesn't take {expected} argument(s): {e}") from None
+    elif not isinstance(value, expected):
+        raise TypeError(f"{name} is a {type(value).__name__}, not a {expected.__name__}")
+
+
+def _load():
+    protocol = {}
+    for name, (module, attribute, expected) in REQUIRED.items():
+        value = getattr(importlib.import_module(module), attribute)
+        _check(name, value, expected)
+        protocol[name] = value
+    for method, arguments in DRM_METHODS.items():
+        _check(f"DRM.{method}", getattr(protocol["DRM"], method), arguments)
+    return protocol
+
+
+try:
+    PROTOCOL = _load()
+    PROBLEM = ""
+except (ImportError, AttributeError, TypeError) as e:
+    PROTOCOL = None
+    PROBLEM = f"{type(e).__name__}: {e}; kept connections are written for {SUPPORTED}"
@@ -0,0 +1,454 @@
+"""
+Groq API access shared by the scraper stages
+
+GroqClient is one shared asynchronous client for the chat-completions
+endpoint:
+
+*   A single aiohttp session keeps connections to Groq alive between calls
+*   At most ``max_in_flight`` requests are sent at once
+*   429 and 5xx responses are retried with exponential backoff that honours
+    Retry-After and Groq's x-ratelimit-reset-* headers; when the rate-limit
+    headers say the quota is used up, new requests wait for the reset
+*   Every call's latency, attempts and token counts are recorded
+*   stream() yields the reply while it is generated, so later stages can
+    start on the first sentences
+*   With a TokenBudget (see token_budget.py) each request is first admitted
+    against the per-minute and daily quotas
+*   A circuit breaker (see circuit_breaker.py) stops retrying and fails
+    requests at once while the server keeps timing out or returning 5xx,
+    and each attempt's timeout follows the recent latencies
+
+The client runs its own event loop on a background thread, so the threaded
+scraper can call complete() from any number of worker threads.  aiohttp is
+only imported when the first request is sent.
+"""
+import asyncio
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .paths import ROOT_DIR
+from .token_budget import estimate_request
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Marks the end of a stream() iterator
+_END = object()
+
+# Responses worth retrying: rate limited, or a transient server problem
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+
+
+def load_api_key():
+    """Load the Groq API key from api_key.txt in the project root, or the
+    GROQ_API_KEY environment variable.  Returns '' if neither is set."""
+    api_key_path = ROOT_DIR / "api_key.txt"
+
+    # Try to read from file first
+    try:
+        key = api_key_path.read_text(encoding="utf-8").strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+
+    # Fall back to environment variable
+    return os.getenv("GROQ_API_KEY", "")
+
+
+class GroqError(Exception):
+    """A chat completion that failed for good (non-retryable status or retries used up)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_duration(value):
+    """Seconds in a rate-limit header value: '7.66s', '2m59.56s', '120ms', '1h2m' or a plain number"""
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = re.fullmatch(r"(?:([\d.]+)h)?(?:([\d.]+)m(?!s))?(?:([\d.]+)s)?(?:([\d.]+)ms)?", value)
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds, millis = (float(group) if group else 0.0 for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds + millis / 1000
+
+
+def retry_after(headers):
+    """Seconds the server asked us to wait before retrying, or None"""
+    value = headers.get("Retry-After")
+    if value:
+        seconds = parse_duration(value)
+        if seconds is not None:
+            return seconds
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    # Groq also says when each quota resets; the later one is when both allow us in
+    resets = [parse_duration(headers.get(name))
+              for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+    resets = [seconds for seconds in resets if seconds is not None]
+    return max(resets) if resets else None
+
+
+class BackgroundLoop:
+    """Blocking front end for an async chat client, callable from any thread.
+
+    The event loop runs on a daemon thread; subclasses provide the async
+    chat(), stream_chat() and aclose()."""
+
+    loop = None
+    thread = None
+    # Guards the first start(): cleaning workers call it lazily, and two of them
+    # starting a loop each would bind the session to one and use it from the other
+    _start_lock = threading.Lock()
+
+    def start(self):
+        """Run the event loop on a background thread"""
+        if self.loop is None:
+            with self._start_lock:
+                if self.loop is None:
+                    loop = asyncio.new_event_loop()
+                    self.thread = threading.Thread(target=loop.run_forever, name="llm-client", daemon=True)
+                    self.thread.start()
+                    self.loop = loop
+        return self
+
+    def complete(self, prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000, json_mode=False,
+                 priority="clean"):
+        """Blocking chat completion; returns the reply text"""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(
+            self.chat(prompt, model=model, temperature=temperature, max_tokens=max_tokens, json_mode=json_mode,
+                      priority=priority),
+            self.loop,
+        )
+        return future.result()
+
+    def stream(self, prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000, priority="clean"):
+        """Blocking iterator over stream_chat()"""
+        self.start()
+        chunks = queue.Queue()
+
+        async def pump():
+            try:
+                async for delta in self.stream_chat(prompt, model=model, temperature=temperature,
+                                                    max_tokens=max_tokens, priority=priority):
+                    chunks.put(delta)
+                chunks.put(_END)
+            except Exception as e:
+                chunks.put(e)
+
+        asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        while True:
+            item = chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        """Close the connections and stop the event loop"""
+        with self._start_lock:
+            if self.loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self.aclose(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.loop = None
+
+
+class GroqClient(BackgroundLoop):
+    """Shared keep-alive client for the chat-completions endpoint of Groq (or any
+    OpenAI-compatible server)"""
+
+    def __init__(self, api_key, max_in_flight=8, max_retries=5, timeout=60.0,
+                 base_delay=1.0, max_delay=60.0, url=GROQ_CHAT_URL, budget=None,
+                 name="Groq", failure_threshold=5, cooldown=30.0, adaptive_timeout=True):
+        self.api_key = api_key
+        self.budget = budget
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.url = url
+        self.metrics = []  # one dict per completed call
+        self.lock = threading.Lock()
+        self.session = None
+        self.semaphore = None
+        self.paused_until = 0.0  # monotonic time before which no new request is sent
+        # ``timeout`` is the longest an attempt may take; the breaker shortens it to fit the latencies seen
+        self.breaker = CircuitBreaker(name, failure_threshold, cooldown, max_timeout=timeout,
+                                      adaptive=adaptive_timeout)
+
+    # --------------------------------------------------------------- async API
+    async def chat(self, prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000, json_mode=False,
+                   priority="clean"):
+        """Send a single-message chat completion and return the reply text.
+        With ``json_mode`` the model is constrained to answer with a JSON object.
+        ``priority`` ('clean' or 'metadata') decides who goes first when the budget is tight."""
+        data = self._request(prompt, model, temperature, max_tokens)
+        if json_mode:
+            data["response_format"] = {"type": "json_object"}
+
+        reservation = await self._reserve(prompt, max_tokens, priority)
+        started = time.monotonic()
+        response, attempt, sent = await self._send(data, model, started, reservation)
+        try:
+            result = await response.json()
+        except BaseException as e:
+            self._release(reservation)
+            self._broken_off(e)
+            raise
+        finally:
+            response.release()
+            self.semaphore.release()
+
+        self.breaker.succeeded(time.monotonic() - sent)
+        self._record(model, started, attempt, 200, result.get("usage") or {})
+        if reservation is not None:
+            self.budget.settle(reservation, result.get("usage"))
+        return result["choices"][0]["message"]["content"].strip()
+
+    async def stream_chat(self, prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000,
+                          priority="clean"):
+        """Like chat(), but yields the reply text piece by piece while the model generates it.
+        Only the wait for the first byte is retried; a stream that breaks off raises."""
+        data = self._request(prompt, model, temperature, max_tokens)
+        data["stream"] = True
+
+        reservation = await self._reserve(prompt, max_tokens, priority)
+        started = time.monotonic()
+        response, attempt, _ = await self._send(data, model, started, reservation)
+        usage = None
+        generated = False
+        try:
+            # Server-sent events: one "data: {json}" line per chunk, then "data: [DONE]"
+            async for raw in response.content:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                chunk = json.loads(payload)
+                # Groq reports the usage in the last chunk, under x_groq
+                usage = (chunk.get("x_groq") or {}).get("usage") or chunk.get("usage") or usage
+                for choice in chunk.get("choices") or ():
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        generated = True
+                        yield delta
+        except BaseException as e:
+            self._record(model, started, attempt, None, None)
+            if generated and reservation is not None:
+                # Tokens were generated (and billed) before the stream broke off or
+                # the caller stopped reading: count the usage seen, or the estimate
+                self.budget.settle(reservation, usage)
+            else:
+                self._release(reservation)
+            self._broken_off(e)
+            raise
+        finally:
+            response.release()
+            self.semaphore.release()
+
+        # A stream's duration depends on the reply's length, so it is no timing sample
+        self.breaker.succeeded()
+        self._record(model, started, attempt, 200, usage or {})
+        if reservation is not None:
+            self.budget.settle(reservation, usage)
+
+    # ---------------------------------------------------------------- metrics
+    def summary(self):
+        """Latency/token report for the end of a run, with a line per model when several were used"""
+        with self.lock:
+            calls = list(self.metrics)
+        if not calls:
+            return "Groq: no requests"
+        ok = [call for call in calls if call["status"] == 200]
+        latencies = sorted(call["latency"] for call in ok) or [0.0]
+        retries = sum(call["attempts"] - 1 for call in calls)
+        tokens_in = sum(call["prompt_tokens"] for call in ok)
+        tokens_out = sum(call["completion_tokens"] for call in ok)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        lines = [f"Groq: {len(ok)}/{len(calls)} requests ok, {retries} retries, "
+                 f"latency p50 {p50:.2f}s p95 {p95:.2f}s, {tokens_in} prompt + {tokens_out} completion tokens"]
+        models = sorted({call["model"] for call in ok})
+        if len(models) > 1:
+            for model in models:
+                latencies = sorted(call["latency"] for call in ok if call["model"] == model)
+                lines.append(f"   {model}: {len(latencies)} requests, latency p50 {latencies[len(latencies) // 2]:.2f}s "
+                             f"max {latencies[-1]:.2f}s")
+        if self.breaker.troubled():
+            lines.append(f"   {self.breaker.summary()}")
+        return "\n".join(lines)
+
+    # ---------------------------------------------------------------- helpers
+    @staticmethod
+    def _request(prompt, model, temperature, max_tokens):
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+    async def _reserve(self, prompt, max_tokens, priority):
+        if self.budget is None:
+            return None
+        # Raises BudgetExceeded when the daily quota has no room left
+        return await self.budget.acquire(estimate_request(prompt, max_tokens), priority)
+
+    async def _send(self, data, model, started, reservation):
+        """POST ``data``, retrying rate limits and transient failures.  Returns the open
+        200 response, the number of attempts and when the last attempt was sent; the
+        caller reads and releases the response and then releases the semaphore slot it
+        holds.  Raises CircuitOpen once the breaker has given up on the server."""
+        session = await self._ensure_session()
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._wait_for_quota()
+            try:
+                self.breaker.allow()
+            except CircuitOpen:
+                self._record(model, started, attempt, None, None)
+                self._release(reservation)
+                raise
+            await self.semaphore.acquire()
+            sent = time.monotonic()
+            try:
+                response = await session.post(self.url, json=data, timeout=self._timeout(data.get("stream")))
+            except (asyncio.TimeoutError, OSError) as e:
+                # aiohttp's connection errors are OSErrors
+                status, headers, body = None, {}, str(e) or type(e).__name__
+            except BaseException:
+                # Cancelled, e.g. a hedged request that lost the race
+                self.semaphore.release()
+                self.breaker.cancelled()
+                self._release(reservation)
+                raise
+            else:
+                self._note_rate_limits(response.headers)
+                if response.status == 200:
+                    return response, attempt, sent
+                status, headers = response.status, response.headers
+                body = (await response.text())[:300]
+                response.release()
+            self.semaphore.release()
+
+            # Timeouts, dropped connections and 5xx mean the server is struggling;
+            # any other answer (a 429 included) shows it is up
+            if status is None or status >= 500:
+                self.breaker.failed(status or body)
+            else:
+                self.breaker.succeeded()
+
+            if status is not None and status not in RETRY_STATUSES:
+                self._record(model, started, attempt, status, None)
+                self._release(reservation)
+                raise GroqError(f"Groq returned {status}: {body}", status)
+            if attempt > self.max_retries:
+                self._record(model, started, attempt, status, None)
+                self._release(reservation)
+                raise GroqError(f"Groq request failed after {attempt} attempts ({status or body})", status)
+
+            if not self.breaker.available():
+                continue  # the breaker has given up on the server; allow() raises
+
+            delay = self._backoff(attempt, headers)
+            print(f"⏳ Groq {status or 'connection error'}, retrying in {delay:.1f}s (attempt {attempt}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    async def _ensure_session(self):
+        if self.session is None:
+            import aiohttp
+
+            self.semaphore = asyncio.Semaphore(self.max_in_flight)
+            self.session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=10),
+            )
+        return self.session
+
+    def _timeout(self, stream):
+        """The aiohttp timeout of one attempt, from the breaker's adaptive timeout"""
+        import aiohttp
+
+        seconds = self.breaker.timeout()
+        if stream:
+            # A long reply takes a while in total; only the gaps between chunks are limited
+            return aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=seconds)
+        return aiohttp.ClientTimeout(total=seconds, sock_connect=10)
+
+    def _broken_off(self, error):
+        """Tell the breaker about a 200 response that couldn't be read to the end"""
+        if isinstance(error, Exception):
+            self.breaker.failed(str(error) or type(error).__name__)
+        else:
+            self.breaker.cancelled()  # cancelled, or a stream its reader stopped early
+
+    async def aclose(self):
+        """Close the connection pool"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _wait_for_quota(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _release(self, reservation):
+        if reservation is not None:
+            self.budget.release(reservation)
+
+    def _note_rate_limits(self, headers):
+        """Hold back new requests when the headers say a quota is used up"""
+        if self.budget is not None:
+            self.budget.observe(headers)
+        for remaining, reset in (("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+                                 ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens")):
+            value = headers.get(remaining)
+            seconds = parse_duration(headers.get(reset))
+            if value is not None and value.strip() == "0" and seconds:
+                self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt, headers):
+        """Seconds to wait before retry number ``attempt``"""
+        delay = retry_after(headers)
+        if delay is None:
+            delay = self.base_delay * 2 ** (attempt - 1)
+        # Jitter keeps the workers that hit the limit together from retrying together
+        return min(self.max_delay, delay) + random.uniform(0, self.base_delay / 2)
+
+    def _record(self, model, started, attempts, status, usage):
+        usage = usage or {}
+        with self.lock:
+            self.metrics.append({
+                "model": model,
+                "latency": time.monotonic() - started,
+                "attempts": attempts,
+                "status": status,
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+            })
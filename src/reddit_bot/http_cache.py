@@ -0,0 +1,175 @@
+"""
+Disk-backed HTTP response cache for the Reddit fetches in scraper.py
+
+*   Responses are stored in SQLite, keyed by URL
+*   Each resource type (listing, permalink) has its own time-to-live
+*   Stale entries are revalidated with If-None-Match / If-Modified-Since when
+    the server sent an ETag or Last-Modified header
+*   The least recently used entries are evicted once the cache grows past
+    its size limit
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+
+from .paths import ROOT_DIR
+
+DEFAULT_CACHE_PATH = ROOT_DIR / "http_cache.db"
+
+# Seconds a cached response is served without asking the server again
+DEFAULT_TTLS = {
+    "listing": 15 * 60,
+    "permalink": 60 * 60,
+}
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+# Only these headers are worth keeping with a cached body
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CachedSession:
+    """Wraps a requests.Session and answers GETs from the disk cache where possible"""
+
+    def __init__(self, session, path=DEFAULT_CACHE_PATH, ttls=None, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.session = session
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        self.conn = None
+        if enabled:
+            self.conn = sqlite3.connect(str(path), check_same_thread=False)
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       url TEXT PRIMARY KEY,
+                       resource TEXT NOT NULL,
+                       headers TEXT NOT NULL,
+                       body BLOB NOT NULL,
+                       size INTEGER NOT NULL,
+                       fetched_at REAL NOT NULL,
+                       last_access REAL NOT NULL
+                   )"""
+            )
+            self.conn.commit()
+
+    def get(self, url, resource="permalink", headers=None, **kwargs):
+        """GET ``url``, serving it from the cache while it is fresh for ``resource``"""
+        if not self.enabled:
+            return self.session.get(url, headers=headers, **kwargs)
+
+        entry = self._lookup(url)
+        now = time.time()
+
+        if entry and now - entry["fetched_at"] < self.ttls.get(resource, 0):
+            self._touch(url, now)
+            self._count("hits")
+            return self._build_response(url, entry)
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry["headers"].get("ETag"):
+                request_headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                request_headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        response = self.session.get(url, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self._refresh(url, now)
+            self._count("revalidated")
+            return self._build_response(url, entry)
+
+        self._count("misses")
+        if response.status_code == 200:
+            self._store(url, resource, response, now)
+        return response
+
+    def is_fresh(self, url, resource="permalink"):
+        """True if a GET for ``url`` would be answered from the cache without touching the network"""
+        if not self.enabled:
+            return False
+        entry = self._lookup(url)
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttls.get(resource, 0)
+
+    def summary(self):
+        """One-line hit/miss report for the end of a run"""
+        if not self.enabled:
+            return "HTTP cache: DISABLED"
+        c = self.counters
+        total = c["hits"] + c["revalidated"] + c["misses"]
+        saved = c["hits"] + c["revalidated"]
+        rate = f"{saved / total:.0%}" if total else "n/a"
+        return (f"HTTP cache: {c['hits']} hits, {c['revalidated']} revalidated, {c['misses']} misses "
+                f"({rate} served from cache), {c['evictions']} evicted")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+    # ------------------------------------------------------------------
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _lookup(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT headers, body, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"headers": json.loads(row[0]), "body": row[1], "fetched_at": row[2]}
+
+    def _touch(self, url, now):
+        with self.lock:
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+
+    def _refresh(self, url, now):
+        with self.lock:
+            self.conn.execute("UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            self.conn.commit()
+
+    def _store(self, url, resource, response, now):
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        body = response.content
+        with self.lock:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO responses (url, resource, headers, body, size, fetched_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (url, resource, json.dumps(headers), body, len(body), now, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes (lock held)"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self.conn.execute("SELECT url, size FROM responses ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            self.counters["evictions"] += 1
+
+    @staticmethod
+    def _build_response(url, entry):
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry["body"]
+        response.from_cache = True
+        return response
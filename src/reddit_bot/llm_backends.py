@@ -0,0 +1,222 @@
+"""
+A pool of OpenAI-compatible chat backends with hedging and failover
+
+*   Groq plus any other server speaking the chat-completions API (a local
+    llama.cpp or Ollama server, another provider, ...), each with its own
+    names for the models the scraper asks for
+*   Requests go to the healthy backend with the lowest latency (an
+    exponentially weighted moving average).  A backend whose circuit breaker
+    is open (see circuit_breaker.py) is put at the back of the queue, where
+    it fails at once and the request moves on
+*   Hedging: when the chosen backend hasn't answered by its p95 latency, the
+    same request is also sent to the next backend and the first answer wins
+*   Failover: when a backend fails, the request moves on to the next one
+
+Every backend is a GroqClient (with its own connections, retries and, for
+Groq, token budget); the pool runs them all on its own event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from .groq import GROQ_CHAT_URL, BackgroundLoop, GroqClient
+
+# Weight of the newest latency in the moving average
+EWMA_ALPHA = 0.2
+# Latencies needed before the p95 is trusted as the hedging deadline
+MIN_SAMPLES = 5
+
+
+class Backend:
+    """One chat-completions endpoint and what the pool knows about it"""
+
+    def __init__(self, name, client, models=None):
+        self.name = name
+        self.client = client
+        # Our model name -> this backend's name for it; empty means the names are passed through
+        self.models = models or {}
+        self.ewma = None
+        self.latencies = deque(maxlen=50)
+        self.counters = {"requests": 0, "ok": 0, "failed": 0, "hedges": 0, "wins": 0}
+
+    def serves(self, model):
+        return not self.models or model in self.models
+
+    def model_for(self, model):
+        return self.models.get(model, model)
+
+    def healthy(self):
+        return self.client.breaker.available()
+
+    def p95(self):
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def succeeded(self, latency):
+        self.latencies.append(latency)
+        self.ewma = latency if self.ewma is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma
+        self.counters["ok"] += 1
+
+    def failed(self):
+        # Whether the backend is down is up to its client's circuit breaker
+        self.counters["failed"] += 1
+
+
+class BackendPool(BackgroundLoop):
+    """Sends each chat completion to the best backend, hedging slow ones and failing over"""
+
+    def __init__(self, backends, hedge=True, hedge_after=None, initial_hedge_after=10.0):
+        self.backends = list(backends)
+        self.hedge = hedge
+        self.hedge_after = hedge_after  # fixed hedging deadline; None uses each backend's p95
+        self.initial_hedge_after = initial_hedge_after  # until a backend has enough latencies
+        self.lock = threading.Lock()
+
+    @property
+    def budget(self):
+        """The token budget of the Groq backend, if it has one"""
+        return next((b.client.budget for b in self.backends if b.client.budget is not None), None)
+
+    async def chat(self, prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000, json_mode=False,
+                   priority="clean"):
+        """Reply text from whichever backend answers first"""
+        remaining = self._ranked(model)
+        if not remaining:
+            raise RuntimeError(f"No LLM backend serves model '{model}'")
+
+        def launch(backend, hedged=False):
+            with self.lock:
+                backend.counters["requests"] += 1
+                if hedged:
+                    backend.counters["hedges"] += 1
+            task = asyncio.ensure_future(self._attempt(backend, prompt, model, temperature, max_tokens,
+                                                       json_mode, priority))
+            running[task] = backend
+
+        running = {}
+        launch(remaining.pop(0))
+        hedged = False
+        error = None
+        while running:
+            deadline = None
+            if self.hedge and not hedged and remaining:
+                deadline = self._deadline(next(iter(running.values())))
+            done, _ = await asyncio.wait(running, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # The first backend is slower than usual: ask the next one as well
+                hedged = True
+                launch(remaining.pop(0), hedged=True)
+                continue
+            for task in done:
+                backend = running.pop(task)
+                if task.exception() is None:
+                    for other in running:
+                        other.cancel()
+                    if hedged:
+                        with self.lock:
+                            backend.counters["wins"] += 1
+                    return task.result()
+                error = task.exception()
+                print(f"⚠ LLM backend '{backend.name}' failed: {error}")
+            if not running and remaining:
+                launch(remaining.pop(0))  # fail over
+        raise error
+
+    async def stream_chat(self, prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000,
+                          priority="clean"):
+        """Reply pieces from the best backend.  A stream can't be hedged, but it fails
+        over to the next backend as long as nothing has been yielded yet."""
+        error = None
+        for backend in self._ranked(model):
+            with self.lock:
+                backend.counters["requests"] += 1
+            started = time.monotonic()
+            yielded = False
+            try:
+                async for piece in backend.client.stream_chat(prompt, model=backend.model_for(model),
+                                                              temperature=temperature, max_tokens=max_tokens,
+                                                              priority=priority):
+                    yielded = True
+                    yield piece
+            except Exception as e:
+                with self.lock:
+                    backend.failed()
+                if yielded:
+                    raise
+                error = e
+                print(f"⚠ LLM backend '{backend.name}' failed: {e}")
+                continue
+            with self.lock:
+                backend.succeeded(time.monotonic() - started)
+            return
+        raise error or RuntimeError(f"No LLM backend serves model '{model}'")
+
+    def summary(self):
+        """Request, hedging and latency report per backend"""
+        if len(self.backends) == 1:
+            return self.backends[0].client.summary()
+        lines = []
+        for backend in self.backends:
+            lines.append(backend.client.summary().replace("Groq:", f"LLM backend '{backend.name}':", 1))
+            c = backend.counters
+            ewma = f"{backend.ewma:.2f}s" if backend.ewma is not None else "n/a"
+            lines.append(f"   {c['requests']} sent ({c['hedges']} as hedges, {c['wins']} won a race), "
+                         f"{c['failed']} failed, latency EWMA {ewma}")
+        return "\n".join(lines)
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.client.aclose()
+
+    # ------------------------------------------------------------------
+    async def _attempt(self, backend, prompt, model, temperature, max_tokens, json_mode, priority):
+        started = time.monotonic()
+        try:
+            reply = await backend.client.chat(prompt, model=backend.model_for(model), temperature=temperature,
+                                              max_tokens=max_tokens, json_mode=json_mode, priority=priority)
+        except asyncio.CancelledError:
+            raise  # lost a hedged race; says nothing about the backend
+        except Exception:
+            with self.lock:
+                backend.failed()
+            raise
+        with self.lock:
+            backend.succeeded(time.monotonic() - started)
+        return reply
+
+    def _ranked(self, model):
+        """Backends serving ``model``: healthy ones first, fastest first (untried ones in configured order)"""
+        with self.lock:
+            candidates = [backend for backend in self.backends if backend.serves(model)]
+            return sorted(candidates, key=lambda b: (not b.healthy(), b.ewma if b.ewma is not None else float("inf")))
+
+    def _deadline(self, backend):
+        """Seconds to wait for ``backend`` before hedging"""
+        if self.hedge_after:
+            return self.hedge_after
+        with self.lock:
+            p95 = backend.p95()
+        return p95 if p95 is not None else self.initial_hedge_after
+
+
+def build_pool(groq_client, extra_backends=(), hedge=True, hedge_after=None, client_options=None):
+    """A pool of ``groq_client`` (None without a Groq key) followed by the backends
+    described in ``extra_backends``.
+
+    Each extra backend is a dict with ``url`` (the chat-completions endpoint),
+    and optionally ``name``, ``api_key`` or ``api_key_env`` (environment
+    variable holding the key) and ``models`` (our model name -> its name)."""
+    backends = [Backend("groq", groq_client)] if groq_client is not None else []
+    for i, spec in enumerate(extra_backends, 1):
+        api_key = spec.get("api_key") or os.getenv(spec.get("api_key_env", ""), "")
+        name = spec.get("name", f"backend{i}")
+        client = GroqClient(api_key, url=spec.get("url", GROQ_CHAT_URL), name=name, **(client_options or {}))
+        backends.append(Backend(name, client, spec.get("models")))
+    return BackendPool(backends, hedge=hedge, hedge_after=hedge_after)
@@ -0,0 +1,205 @@
+"""
+Persistent cache of LLM responses for the Groq calls in scraper.py
+
+*   Responses are stored in SQLite, keyed by a hash of the request
+    (model, temperature, max_tokens, JSON mode and prompt), so re-running the
+    pipeline on the same post costs no tokens
+*   Entries older than the TTL are fetched again
+*   A caller can pass a ``validate`` callback that raises for a reply it can't
+    use (malformed JSON, wrong shape); such replies are never stored, and an
+    entry that fails it is deleted and requested again
+*   The least recently used entries are evicted once the cache grows past
+    its size limit
+*   Modes:
+        normal  - answer from the cache while fresh, otherwise call and store
+        bypass  - always call, never read or write the cache
+        record  - always call and store the response (refreshing the entry)
+        replay  - only answer from the cache, whatever its age; a request that
+                  was never recorded raises ReplayMiss instead of calling out
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from .paths import ROOT_DIR
+
+DEFAULT_CACHE_PATH = ROOT_DIR / "llm_cache.db"
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+MODES = ("normal", "bypass", "record", "replay")
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode for a request that is not in the cache"""
+
+
+def request_key(model, temperature, max_tokens, prompt, json_mode=False):
+    """Content address of a chat-completion request"""
+    payload = json.dumps([model, temperature, max_tokens, bool(json_mode), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Answers chat-completion requests from disk where possible"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES,
+                 mode="normal", enabled=True):
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}'. Choose from: {', '.join(MODES)}")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.enabled = enabled and mode != "bypass"
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        self.conn = None
+        if self.enabled:
+            self.conn = sqlite3.connect(str(path), check_same_thread=False)
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       key TEXT PRIMARY KEY,
+                       model TEXT NOT NULL,
+                       reply TEXT NOT NULL,
+                       size INTEGER NOT NULL,
+                       created_at REAL NOT NULL,
+                       last_access REAL NOT NULL
+                   )"""
+            )
+            self.conn.commit()
+
+    def complete(self, call, model, temperature, max_tokens, prompt, json_mode=False, validate=None):
+        """Return the reply to a request, using ``call()`` to ask the API when the cache can't answer.
+        ``validate(reply)`` raises for a reply the caller can't use; it is then not stored."""
+        if not self.enabled:
+            return call()
+
+        key = request_key(model, temperature, max_tokens, prompt, json_mode)
+        now = time.time()
+        reply = self._cached(key, model, now, validate)
+        if reply is not None:
+            return reply
+
+        reply = call()
+        self._store_valid(key, model, reply, now, validate)
+        return reply
+
+    def stream(self, call_stream, model, temperature, max_tokens, prompt, json_mode=False, validate=None):
+        """complete() for a streamed reply: yields a cached reply in one piece, or the
+        pieces of ``call_stream()`` as they arrive, storing the reply once it is complete"""
+        if not self.enabled:
+            yield from call_stream()
+            return
+
+        key = request_key(model, temperature, max_tokens, prompt, json_mode)
+        now = time.time()
+        reply = self._cached(key, model, now, validate)
+        if reply is not None:
+            yield reply
+            return
+
+        pieces = []
+        for piece in call_stream():
+            pieces.append(piece)
+            yield piece
+        self._store_valid(key, model, "".join(pieces).strip(), now, validate)
+
+    def summary(self):
+        """One-line hit/miss report for the end of a run"""
+        if not self.enabled:
+            return "LLM cache: DISABLED"
+        c = self.counters
+        total = c["hits"] + c["misses"]
+        rate = f"{c['hits'] / total:.0%}" if total else "n/a"
+        return f"LLM cache ({self.mode}): {c['hits']} hits, {c['misses']} misses ({rate} served from cache), {c['evictions']} evicted"
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+    # ------------------------------------------------------------------
+    def _cached(self, key, model, now, validate=None):
+        """The stored reply if the mode lets it answer, else None (counted as a miss).
+        A stored reply that fails ``validate`` is deleted (replay mode returns it anyway).
+        Raises ReplayMiss in replay mode."""
+        if self.mode != "record":
+            entry = self._lookup(key)
+            if entry and self.mode != "replay" and not _passes(validate, entry[0]):
+                self._delete(key)
+                entry = None
+            if entry and (self.mode == "replay" or now - entry[1] < self.ttl):
+                self._touch(key, now)
+                self._count("hits")
+                return entry[0]
+            if self.mode == "replay":
+                self._count("misses")
+                raise ReplayMiss(f"No recorded {model} response for this request (key {key[:12]})")
+        self._count("misses")
+        return None
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _lookup(self, key):
+        with self.lock:
+            return self.conn.execute("SELECT reply, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+
+    def _touch(self, key, now):
+        with self.lock:
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+
+    def _delete(self, key):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def _store_valid(self, key, model, reply, now, validate):
+        """Store ``reply`` if it passes ``validate``; otherwise drop any entry it would have
+        refreshed and raise the validation error"""
+        try:
+            if validate is not None:
+                validate(reply)
+        except Exception:
+            self._delete(key)
+            raise
+        self._store(key, model, reply, now)
+
+    def _store(self, key, model, reply, now):
+        with self.lock:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO responses (key, model, reply, size, created_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, model, reply, len(reply.encode("utf-8")), now, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes (lock held)"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.counters["evictions"] += 1
+
+
+def _passes(validate, reply):
+    """True if ``reply`` is accepted by ``validate`` (or there is nothing to check)"""
+    if validate is None:
+        return True
+    try:
+        validate(reply)
+    except Exception:
+        return False
+    return True
@@ -0,0 +1,245 @@
+"""
+A local stand-in for Groq's chat-completions endpoint, for load tests that
+shouldn't cost any quota
+
+*   Replies are templated from the prompt in the formats the scraper parses:
+    the cleaning prompt gets the post back with a gender tag, the YouTube
+    prompt gets ---HASHTAGS---/---TITLES---/---DESCRIPTION--- sections and
+    JSON-mode requests get the combined cleaning/metadata object
+*   Latency is a fixed delay plus a time per generated token, with jitter;
+    streamed requests send their reply word by word as server-sent events
+*   429s come from a requests-per-minute limit (with Retry-After and
+    x-ratelimit-* headers like Groq's) and/or a random share of requests;
+    a share of requests can also fail with 503
+
+    python3 src/mock-groq.py --port 8000 --latency 0.3 --rate-limit 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from aiohttp import web
+
+from .token_budget import estimate_tokens
+
+CHAT_PATH = "/openai/v1/chat/completions"
+
+METADATA_REPLY = """---HASHTAGS---
+aita reddit family drama storytime
+
+---TITLES---
+She Said WHAT at Dinner? #aita #reddit
+The Family Fight Nobody Expected #family #drama
+Was I Wrong to Say No? #aita #storytime
+My Mom Crossed the Line #family #reddit
+The Wedding Invite Disaster #drama #aita
+
+---DESCRIPTION---
+A family dinner turns into a fight nobody saw coming. #aita #reddit #family #drama #storytime"""
+
+
+def canned_reply(prompt: str, json_mode: bool = False) -> str:
+    """The reply a model would give to one of the scraper's prompts, shaped like the real thing"""
+    if json_mode:
+        title = re.search(r"^Title: (.*)$", prompt, re.M)
+        body = prompt.split("\nPost: ", 1)[1] if "\nPost: " in prompt else prompt[-500:]
+        return json.dumps({
+            "title": title.group(1).strip() if title else "A Reddit post",
+            "body": body.strip(),
+            "gender": "female" if re.search(r"\(\d{2}F\)|\bmom\b", body) else "male",
+            "hashtags": ["aita", "reddit", "family", "drama", "storytime"],
+            "titles": ["Was I Wrong to Say No? #aita #reddit", "The Family Fight Nobody Expected #family"],
+            "description": "A family dinner turns into a fight nobody saw coming. #aita #reddit",
+        })
+    if "---HASHTAGS---" in prompt:
+        return METADATA_REPLY
+    if "Text to correct:" in prompt:
+        text = prompt.split("Text to correct:", 1)[1].strip()
+        # The cleaning prompt asks for the title on the first line
+        title, _, body = text.partition(". ")
+        return f"<<MALE>> {title}\n{body}"
+    return "OK"
+
+
+class MockGroqServer:
+    """The mock endpoint on a background thread (start()) or in the foreground (serve())"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, jitter=0.05, token_latency=0.002,
+                 requests_per_minute=0, rate_limit_ratio=0.0, retry_after=1.0, error_ratio=0.0, seed=None):
+        self.host = host
+        self.port = port  # 0 picks a free port when started
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency  # seconds per completion token
+        self.requests_per_minute = requests_per_minute  # 0 means no limit
+        self.rate_limit_ratio = rate_limit_ratio  # share of requests answered with a 429 anyway
+        self.retry_after = retry_after
+        self.error_ratio = error_ratio  # share of requests answered with a 503
+        self.random = random.Random(seed)
+        self.window = deque()  # times of the requests admitted in the last minute
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0}
+        self.loop = None
+        self.thread = None
+        self.runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}{CHAT_PATH}"
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post(CHAT_PATH, self.handle)
+        app.router.add_post("/v1/chat/completions", self.handle)
+        return app
+
+    def start(self):
+        """Serve on a background thread; returns once the server accepts connections"""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="mock-groq", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def stop(self):
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = None
+
+    def serve(self):
+        """Serve in the foreground until interrupted"""
+        web.run_app(self.app(), host=self.host, port=self.port, print=None)
+
+    def summary(self):
+        with self.lock:
+            s = dict(self.stats)
+        return (f"Mock Groq: {s['requests']} requests, {s['ok']} ok, {s['rate_limited']} answered 429, "
+                f"{s['errors']} answered 503")
+
+    # ------------------------------------------------------------------
+    async def _start(self):
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+
+    async def handle(self, request):
+        body = await request.json()
+        prompt = "".join(message.get("content", "") for message in body.get("messages", []))
+        status, headers = self._admit()
+        if status == 429:
+            return web.json_response({"error": {"message": "Rate limit reached", "type": "tokens"}},
+                                     status=429, headers=headers)
+        if status == 503:
+            return web.json_response({"error": {"message": "Service unavailable"}}, status=503)
+
+        reply = canned_reply(prompt, (body.get("response_format") or {}).get("type") == "json_object")
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(reply)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        # Time to the first token, then the generation itself
+        first = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(first)
+        if body.get("stream"):
+            return await self._stream(request, reply, usage, headers)
+        await asyncio.sleep(usage["completion_tokens"] * self.token_latency)
+        return web.json_response({
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": usage,
+        }, headers=headers)
+
+    async def _stream(self, request, reply, usage, headers):
+        response = web.StreamResponse(headers={**headers, "Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for word in re.findall(r"\S+\s*|\s+", reply):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await asyncio.sleep(estimate_tokens(word) * self.token_latency)
+        last = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}}
+        await response.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    def _admit(self):
+        """(status, headers) for the next request: 200, or a simulated 429 or 503"""
+        with self.lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            while self.window and now - self.window[0] >= 60:
+                self.window.popleft()
+            headers = {}
+            if self.requests_per_minute:
+                reset = 60 - (now - self.window[0]) if self.window else 0.0
+                headers["x-ratelimit-limit-requests"] = str(self.requests_per_minute)
+                if len(self.window) >= self.requests_per_minute:
+                    headers.update({"x-ratelimit-remaining-requests": "0",
+                                    "x-ratelimit-reset-requests": f"{reset:.2f}s",
+                                    "Retry-After": str(max(1, round(reset)))})
+                    self.stats["rate_limited"] += 1
+                    return 429, headers
+            if self.random.random() < self.rate_limit_ratio:
+                self.stats["rate_limited"] += 1
+                return 429, {**headers, "Retry-After": f"{self.retry_after:g}"}
+            if self.random.random() < self.error_ratio:
+                self.stats["errors"] += 1
+                return 503, headers
+            self.window.append(now)
+            if self.requests_per_minute:
+                remaining = self.requests_per_minute - len(self.window)
+                headers["x-ratelimit-remaining-requests"] = str(remaining)
+                headers["x-ratelimit-reset-requests"] = f"{60 - (now - self.window[0]):.2f}s"
+            self.stats["ok"] += 1
+            return 200, headers
+
+
+def add_arguments(parser):
+    """The server options, shared with the LLM benchmark"""
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Random +/- seconds on the latency (default: 0.05)")
+    parser.add_argument("--token-latency", type=float, default=0.002,
+                        help="Seconds per generated token (default: 0.002)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before answering 429 (default: no limit)")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Share of requests answered with a 429 regardless (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds of those 429s (default: 1)")
+    parser.add_argument("--errors", type=float, default=0.0, help="Share of requests answered with a 503 (default: 0)")
+    parser.add_argument("--seed", type=int, help="Seed for the random latencies and failures")
+
+
+def server_from_args(args, port=0):
+    return MockGroqServer(port=port, latency=args.latency, jitter=args.jitter, token_latency=args.token_latency,
+                          requests_per_minute=args.rpm, rate_limit_ratio=args.rate_limit,
+                          retry_after=args.retry_after, error_ratio=args.errors, seed=args.seed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for Groq's chat-completions API.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, args.port)
+    print(f"🧪 Mock Groq listening on {server.url}")
+    print("   Point a backend at it, e.g. \"llm_backends\": "
+          f"[{{\"name\": \"mock\", \"url\": \"{server.url}\"}}]")
+    server.serve()
+
+
+if __name__ == "__main__":
+    main()
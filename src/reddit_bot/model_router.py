@@ -0,0 +1,87 @@
+"""
+Picks the Groq model and max_tokens for each request
+
+*   YouTube metadata (hashtags, titles, description) always goes to the fast
+    8B model: the output is short and the task is forgiving
+*   Cleaning goes to the large 70B model only when the post is long or its
+    noise score (see normalize.py) says it needs heavy grammar repair;
+    lightly noisy posts are cleaned by the fast model
+*   max_tokens is sized from the input: cleaning echoes the post back, so it
+    gets the post's estimated tokens plus some headroom, instead of a fixed
+    2000/2500
+*   Once the Groq token budget runs low (see token_budget.py), cleaning is
+    downgraded to the fast model with less headroom, so the tokens left go
+    further
+*   Every decision is counted per task and model for the run report
+"""
+
+from __future__ import annotations
+
+import threading
+
+from .token_budget import estimate_tokens
+
+FAST_MODEL = "llama-3.1-8b-instant"
+LARGE_MODEL = "llama-3.3-70b-versatile"
+
+# Tokens reserved for the hashtags, titles and description
+METADATA_TOKENS = 400
+
+# max_tokens used for every request when routing is off
+FIXED_MAX_TOKENS = {"clean": 2000, "combined": 2500, "metadata": 500}
+
+# Headroom over the post's estimated tokens when the budget is low
+LOW_BUDGET_HEADROOM = 32
+
+
+class ModelRouter:
+    """Chooses (model, max_tokens) per request from the task, post length and noise"""
+
+    def __init__(self, fast_model=FAST_MODEL, large_model=LARGE_MODEL, heavy_noise=8.0,
+                 long_chars=1200, enabled=True, budget=None):
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.heavy_noise = heavy_noise
+        self.long_chars = long_chars
+        self.enabled = enabled
+        self.budget = budget  # a TokenBudget whose low() downgrades cleaning
+        self.lock = threading.Lock()
+        self.decisions = {}  # (task, model) -> count
+        self.downgraded = 0
+
+    def route(self, task: str, text: str, noise: float = 0.0) -> tuple[str, int]:
+        """Model and max_tokens for a 'clean', 'combined' or 'metadata' request on ``text``"""
+        if not self.enabled:
+            model, max_tokens = self.large_model, FIXED_MAX_TOKENS[task]
+        elif task == "metadata":
+            model, max_tokens = self.fast_model, METADATA_TOKENS
+        else:
+            heavy = noise >= self.heavy_noise or len(text) > self.long_chars
+            model = self.large_model if heavy else self.fast_model
+            # The cleaned post is about as long as the original; a third more covers
+            # the expanded abbreviations and the gender tag
+            max_tokens = estimate_tokens(text) * 4 // 3 + 64
+            if task == "combined":
+                max_tokens += METADATA_TOKENS
+        downgrade = task != "metadata" and self.budget is not None and self.budget.low()
+        if downgrade:
+            model = self.fast_model
+            tight = estimate_tokens(text) * 9 // 8 + LOW_BUDGET_HEADROOM
+            if task == "combined":
+                tight += METADATA_TOKENS
+            max_tokens = min(max_tokens, tight)
+        with self.lock:
+            self.decisions[(task, model)] = self.decisions.get((task, model), 0) + 1
+            self.downgraded += downgrade
+        return model, max_tokens
+
+    def summary(self) -> str:
+        """One-line report of the routing decisions"""
+        with self.lock:
+            decisions = sorted(self.decisions.items())
+        if not decisions:
+            return "Model routing: no requests"
+        parts = [f"{task} → {model}: {count}" for (task, model), count in decisions]
+        if self.downgraded:
+            parts.append(f"{self.downgraded} downgraded while the token budget was low")
+        return f"Model routing{'' if self.enabled else ' (off)'}: " + ", ".join(parts)
@@ -0,0 +1,266 @@
+"""
+Local, rule-based cleaning that runs before any Groq request
+
+*   Deterministic rewrites from the cleaning prompt: AITA/AIO and friends,
+    "21M"/"19F" ages, texting abbreviations, contractions written without
+    an apostrophe, common misspellings and a lowercase pronoun "i"
+*   The speaker's gender from patterns like "I (21M)" or "I'm a dad"
+*   A noise score estimating how much spelling/grammar repair is left after
+    the rewrites, so the scraper only sends posts to Groq when it is worth it
+
+All patterns are compiled once at import; a post takes well under a millisecond.
+"""
+
+from __future__ import annotations
+
+import re
+
+# ----------------------------------------------------------------------
+# ------------------------------ rewrites -------------------------------
+# ----------------------------------------------------------------------
+# Matched in upper case only, so ordinary words are left alone
+ACRONYMS = {
+    "AITA": "Am I the asshole",
+    "AITAH": "Am I the asshole",
+    "WIBTA": "Would I be the asshole",
+    "AIO": "Am I overreacting",
+    "MIL": "mother-in-law",
+    "FIL": "father-in-law",
+    "SIL": "sister-in-law",
+    "BIL": "brother-in-law",
+}
+
+# Matched in lower case only ("U" and "UR" are usually something else)
+TEXTING_LOWER = {
+    "u": "you",
+    "ur": "your",
+}
+
+# Matched in lower or title case; in capitals they are usually acronyms ("SIS", "BF")
+TEXTING = {
+    "bc": "because",
+    "b/c": "because",
+    "cuz": "because",
+    "rn": "right now",
+    "tbh": "to be honest",
+    "idk": "I don't know",
+    "imo": "in my opinion",
+    "imho": "in my opinion",
+    "ppl": "people",
+    "pls": "please",
+    "plz": "please",
+    "thx": "thanks",
+    "abt": "about",
+    "w/": "with",
+    "w/o": "without",
+    "bday": "birthday",
+    "bf": "boyfriend",
+    "gf": "girlfriend",
+    "bro": "brother",
+    "sis": "sister",
+}
+
+# Matched in lower or title case ("IM", "CANT" are shouting or acronyms)
+CONTRACTIONS = {
+    "dont": "don't", "didnt": "didn't", "doesnt": "doesn't", "isnt": "isn't", "wasnt": "wasn't",
+    "werent": "weren't", "arent": "aren't", "couldnt": "couldn't", "wouldnt": "wouldn't",
+    "shouldnt": "shouldn't", "havent": "haven't", "hasnt": "hasn't", "hadnt": "hadn't",
+    "cant": "can't", "im": "I'm", "ive": "I've", "thats": "that's", "whats": "what's",
+    "theyre": "they're", "youre": "you're", "shes": "she's", "theres": "there's",
+}
+
+MISSPELLINGS = {
+    "teh": "the", "becuase": "because", "becasue": "because", "definately": "definitely",
+    "definitly": "definitely", "alot": "a lot", "recieve": "receive", "recieved": "received",
+    "wierd": "weird", "thier": "their", "untill": "until", "seperate": "separate",
+    "seperated": "separated", "occured": "occurred", "tommorow": "tomorrow", "tomorow": "tomorrow",
+    "freind": "friend", "freinds": "friends", "beleive": "believe", "truely": "truly",
+    "wich": "which", "realy": "really", "finaly": "finally", "basicly": "basically",
+    "goverment": "government", "arguement": "argument", "embarassed": "embarrassed",
+}
+
+
+def _word_pattern(words, flags=0, title=False):
+    """One regex matching any of ``words`` as a whole word (longest first),
+    and their title-case spellings too with ``title``"""
+    if title:
+        words = set(words) | {word[:1].upper() + word[1:] for word in words}
+    alternatives = "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+    return re.compile(rf"(?<![\w/'])(?:{alternatives})(?![\w/])", flags)
+
+
+# (pattern, replacements, whether the replacements are keyed by the lower-cased match)
+WORD_RULES = [
+    (_word_pattern(ACRONYMS), ACRONYMS, False),
+    (_word_pattern(TEXTING_LOWER), TEXTING_LOWER, True),
+    (_word_pattern(TEXTING, title=True), TEXTING, True),
+    (_word_pattern(CONTRACTIONS, title=True), CONTRACTIONS, True),
+    (_word_pattern(MISSPELLINGS, re.IGNORECASE), MISSPELLINGS, True),
+]
+
+AGE = r"(1[3-9]|[2-9]\d)"
+MALE_ROLES = "dad|father|husband|boyfriend|fiance|guy|man|son|brother|groom|stepdad"
+FEMALE_ROLES = "mom|mum|mother|wife|girlfriend|fiancee|woman|girl|daughter|sister|bride|stepmom"
+PEOPLE = rf"{MALE_ROLES}|{FEMALE_ROLES}|friend|partner|roommate|coworker|boss|cousin|neighbou?r|kid|child"
+# "21M" -> "21 male", but only next to a person ("I 21M", "(21M)", "my 30F wife"):
+# "moved here 25M ago" isn't an age.  A space is only allowed inside brackets
+# ("(21 f)"), since "the 50 m dash" or "rated 5 f" aren't ages either.
+AGE_GENDER = re.compile(rf"\b{AGE}([MmFf])\b")
+AGE_BEFORE = re.compile(r"(?:[(\[]\s*|\b(?:I|I'm|I am|me|my|our|his|her|their)\s*,?\s*)$", re.IGNORECASE)
+AGE_AFTER = re.compile(rf"\s*[)\]]|\s+(?:{PEOPLE})s?\b", re.IGNORECASE)
+AGE_SPACE_GENDER = re.compile(rf"([(\[])\s*{AGE}\s([MmFf])\s*([)\]])")
+# "(M21)" -> "(21 male)"; only inside brackets, where it can't be anything else
+GENDER_AGE = re.compile(rf"([(\[])\s*([MmFf])\s?{AGE}\s*([)\]])")
+# Just before a word that starts a sentence (searched up to the word only)
+SENTENCE_START = re.compile(r"(?:^|[.!?][\"')\]]*\s+|\n)[\"'(\[]?$")
+# A lone lowercase "i" (but not "i.e." or "i-"), rewritten only when it is the
+# pronoun: followed by a contraction ("i'm") or a verb ("i think", "i asked").
+# "Press i to insert" is left alone, and so is anything unclear, for the AI.
+LOWERCASE_I = re.compile(r"(?<![\w.'-])i(?![\w-]|\.\w)")
+PRONOUN_VERBS = (
+    "am|was|have|had|do|did|don't|didn't|dont|didnt|can|can't|cant|could|couldn't|would|wouldn't|will|won't"
+    "|should|shouldn't|might|must|may|need|think|thought|feel|felt|know|knew|want|wanna|mean|guess|hope"
+    "|love|like|hate|said|say|told|tell|went|go|got|get|saw|see|made|make|came|took|gave|left|kept|let"
+    "|found|just|really|never|always|also|still|even|only|actually|already|honestly|then|finally|used"
+)
+PRONOUN_AFTER = re.compile(rf"'(?:m|ve|d|ll)\b|\s+(?:(?:{PRONOUN_VERBS})\b|[a-z]+ed\b)")
+
+GENDER_WORDS = {"m": "male", "f": "female"}
+
+# ----------------------------------------------------------------------
+# ------------------------------- gender --------------------------------
+# ----------------------------------------------------------------------
+# "I (21M)", "I'm [M21]", "I 21M", "I am 30F": the same forms normalize_text rewrites
+SPEAKER_AGE = re.compile(
+    rf"\bI(?:'?m| am)?\s*,?\s*(?:[(\[]\s*(?:{AGE}\s*,?\s*(?P<after>[MF])|(?P<before>[MF])\s*,?\s*{AGE})\s*[)\]]"
+    rf"|{AGE}(?P<bare>[MF])\b)",
+    re.IGNORECASE,
+)
+SPEAKER_ROLE = re.compile(
+    rf"\bI(?:'m| am) (?:a |an |the )?(?:\d{{2}}\s*(?:yo|y/o|year old|-year-old)\s*)?"
+    rf"(?:(?P<male>{MALE_ROLES})|(?P<female>{FEMALE_ROLES}))\b",
+    re.IGNORECASE,
+)
+
+
+def detect_gender(text: str) -> str:
+    """'male' or 'female' when the text makes the speaker's gender clear, else ''"""
+    match = SPEAKER_AGE.search(text)
+    if match:
+        letter = match.group("after") or match.group("before") or match.group("bare")
+        return GENDER_WORDS[letter.lower()]
+    match = SPEAKER_ROLE.search(text)
+    if match:
+        return "male" if match.group("male") else "female"
+    return ""
+
+
+# ----------------------------------------------------------------------
+# -------------------------------- noise ---------------------------------
+# ----------------------------------------------------------------------
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+LOWERCASE_START = re.compile(r"(?:^|[.!?]\s+)[a-z]", re.MULTILINE)
+MISSING_SPACE = re.compile(r"[a-z]{2}[,.!?][a-zA-Z]{2}")
+ELONGATED = re.compile(r"\b\w*([a-z])\1\1\w*\b", re.IGNORECASE)
+RUN_ON_WORDS = 45
+
+# Weight of each kind of problem in the noise score
+NOISE_WEIGHTS = {
+    "fix": 0.5,  # a local rewrite: posts that needed many tend to need more
+    "lowercase_start": 1.0,
+    "missing_space": 1.0,
+    "elongated": 1.0,
+    "run_on": 2.0,
+    "unpunctuated_line": 0.5,
+    "no_capitals": 3.0,
+}
+
+
+def noise_score(text: str, fixes: int = 0) -> float:
+    """Weighted spelling/grammar problems per 100 words of ``text``"""
+    words = len(text.split())
+    if not words:
+        return 0.0
+    problems = NOISE_WEIGHTS["fix"] * fixes
+    problems += NOISE_WEIGHTS["lowercase_start"] * len(LOWERCASE_START.findall(text))
+    problems += NOISE_WEIGHTS["missing_space"] * len(MISSING_SPACE.findall(text))
+    problems += NOISE_WEIGHTS["elongated"] * len(ELONGATED.findall(text))
+    for line in text.splitlines():
+        sentences = SENTENCE_END.split(line.strip())
+        problems += NOISE_WEIGHTS["run_on"] * sum(1 for s in sentences if len(s.split()) > RUN_ON_WORDS)
+        if len(line.split()) > 8 and line.rstrip()[-1:] not in ".!?\"')":
+            problems += NOISE_WEIGHTS["unpunctuated_line"]
+    if not any(ch.isupper() for ch in text):
+        problems += NOISE_WEIGHTS["no_capitals"]
+    return problems * 100 / words
+
+
+# ----------------------------------------------------------------------
+# -------------------------------- posts ---------------------------------
+# ----------------------------------------------------------------------
+def _match_case(match: re.Match, replacement: str) -> str:
+    """Capitalise ``replacement`` when the matched word starts a sentence or is
+    written title-case ("Dont"); all-caps words ("my MIL said") stay lowercase
+    mid-sentence"""
+    word = match.group(0)
+    if not replacement[:1].islower():
+        return replacement
+    title_case = word[:1].isupper() and not word.isupper()
+    if title_case or SENTENCE_START.search(match.string, max(0, match.start() - 8), match.start()):
+        return replacement[0].upper() + replacement[1:]
+    return replacement
+
+
+def _names_person(match: re.Match) -> bool:
+    """True if an age like "21M" stands next to a speaker or person"""
+    text = match.string
+    return bool(AGE_BEFORE.search(text, max(0, match.start() - 8), match.start())
+                or AGE_AFTER.match(text, match.end()))
+
+
+def normalize_text(text: str) -> tuple[str, int]:
+    """Apply the deterministic rewrites; returns (text, number of rewrites)"""
+    fixes = 0
+
+    def count(replacement):
+        nonlocal fixes
+        fixes += 1
+        return replacement
+
+    for pattern, replacements, lower_keys in WORD_RULES:
+        text = pattern.sub(
+            lambda m: count(_match_case(m, replacements[m.group(0).lower() if lower_keys else m.group(0)])),
+            text,
+        )
+    text = AGE_GENDER.sub(
+        lambda m: count(f"{m.group(1)} {GENDER_WORDS[m.group(2).lower()]}") if _names_person(m) else m.group(0), text)
+    text = AGE_SPACE_GENDER.sub(
+        lambda m: count(f"{m.group(1)}{m.group(2)} {GENDER_WORDS[m.group(3).lower()]}{m.group(4)}"), text)
+    text = GENDER_AGE.sub(lambda m: count(f"{m.group(1)}{m.group(3)} {GENDER_WORDS[m.group(2).lower()]}{m.group(4)}"), text)
+    text = LOWERCASE_I.sub(lambda m: count("I") if PRONOUN_AFTER.match(m.string, m.end()) else m.group(0), text)
+    return text, fixes
+
+
+def normalize_post(title: str, content: str) -> dict:
+    """Clean a post locally.
+
+    Returns a dict with the rewritten ``title`` and ``content``, the detected
+    ``gender`` ('' when unclear), the number of ``fixes`` made and the
+    ``noise`` score of what is left (see noise_score)."""
+    gender = detect_gender(f"{title}\n{content}")
+    title, title_fixes = normalize_text(title.strip())
+    content, content_fixes = normalize_text(content.strip())
+    fixes = title_fixes + content_fixes
+    return {
+        "title": title,
+        "content": content,
+        "gender": gender,
+        "fixes": fixes,
+        "noise": noise_score(f"{title}\n{content}", fixes),
+    }
+
+
+def tagged_text(post: dict) -> str:
+    """The post as the scraper saves it: gender tag, title line, body lines.
+    Posts whose gender is unclear are tagged male, like the AI cleaning does."""
+    return f"<<{(post['gender'] or 'male').upper()}>> {post['title']}\n{post['content']}"
@@ -0,0 +1,8 @@
+"""
+Project folders shared by the reddit_bot modules
+"""
+import os
+from pathlib import Path
+
+# The project root, two levels above this package (src/reddit_bot)
+ROOT_DIR = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
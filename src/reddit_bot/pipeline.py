@@ -0,0 +1,101 @@
+"""
+A small staged pipeline: each stage is a pool of worker threads reading from
+a bounded queue and handing its results to the next stage's queue.
+
+*   Bounded queues give back-pressure: when a stage falls behind, the stages
+    feeding it block instead of piling up work in memory
+*   Each stage has its own worker count, so slow network-bound stages (TTS)
+    can run wider than cheap ones
+*   An item is finished as soon as it leaves the last stage, while later
+    items are still being produced
+"""
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class Stage:
+    """One step of the pipeline.
+
+    ``func`` receives an item and returns the item to pass on, or None to
+    drop it.  Exceptions are reported and the item is dropped.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=4):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+        self.busy = 0.0  # seconds spent inside func, summed over workers
+
+
+class Pipeline:
+    """Runs items through a list of stages concurrently"""
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.started = None
+
+    def start(self):
+        self.started = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(stage, next_stage), name=f"{stage.name}-{n + 1}", daemon=True
+                )
+                thread.start()
+                stage.threads.append(thread)
+        return self
+
+    def submit(self, item):
+        """Feed an item into the first stage, blocking while it is full"""
+        self.stages[0].queue.put(item)
+
+    def close(self):
+        """Let every queued item finish, then stop all workers (stage by stage)"""
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
+
+    def summary(self):
+        """Per-stage report for the end of a run"""
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        lines = [f"Pipeline finished in {elapsed:.1f}s"]
+        for stage in self.stages:
+            lines.append(
+                f"   {stage.name:<10} {stage.done:>3} done, {stage.failed:>2} failed, "
+                f"{stage.busy:6.1f}s busy across {stage.workers} worker(s)"
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _work(stage, next_stage):
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                return
+            start = time.monotonic()
+            try:
+                result = stage.func(item)
+                ok = True
+            except Exception as e:
+                print(f"❌ [{stage.name}] {e}")
+                result = None
+                ok = False
+            with stage.lock:
+                stage.busy += time.monotonic() - start
+                if ok:
+                    stage.done += 1
+                else:
+                    stage.failed += 1
+            if result is not None and next_stage is not None:
+                next_stage.queue.put(result)
@@ -0,0 +1,40 @@
+"""
+Per-host politeness scheduling for the Reddit fetches in scraper.py
+
+Instead of sleeping the whole process between requests, each request to a
+host books the next free slot on that host's timeline.  Only the thread that
+wants to fetch waits for its slot; everything else (AI cleaning, metadata
+generation) keeps running in the meantime.  The spacing between two requests
+to the same host is never shorter than the gap the caller asked for.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class HostScheduler:
+    """Hands out request slots per host, spaced at least ``min_gap`` seconds apart"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_slot = {}  # host -> monotonic time of the last booked request
+        self.waited = 0.0  # total seconds callers spent waiting for a slot
+
+    def wait_turn(self, url, min_gap, reason=""):
+        """Block the calling thread until ``url``'s host may be contacted again.
+
+        ``min_gap`` is the minimum number of seconds since the previous request
+        to the same host; the first request to a host never waits.
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            last = self.last_slot.get(host)
+            slot = now if last is None else max(now, last + min_gap)
+            self.last_slot[host] = slot
+            delay = slot - now
+            self.waited += delay
+        if delay > 0:
+            if reason:
+                print(f"Waiting for {delay:.1f} seconds {reason}...")
+            time.sleep(delay)
@@ -0,0 +1,247 @@
+"""
+Processed-post index
+
+*   Remembers every Reddit post the scraper has handled, keyed by its
+    fullname (``data-fullname``, e.g. ``t3_1abcde``)
+*   Records the furthest stage each post reached, so later runs can skip it
+    before fetching its permalink or calling the LLM
+*   Keeps a per-subreddit high-water mark (the newest post below which every
+    post has been checked) so incremental runs can stop paging once they
+    reach posts already seen
+*   Inspect or prune the index with the ``src/post_index.py`` script:
+
+        python3 src/post_index.py stats
+        python3 src/post_index.py list --stage saved --limit 20
+        python3 src/post_index.py prune --older-than 30
+        python3 src/post_index.py forget t3_1abcde
+        python3 src/post_index.py watermarks [--reset SUBREDDIT]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .paths import ROOT_DIR
+
+DEFAULT_INDEX_PATH = ROOT_DIR / "post_index.db"
+
+# Stages in the order a post moves through the pipeline.  "skipped" means the
+# post was looked at and rejected (too long, no body), which is just as final.
+# "accepted" posts passed the filters but weren't written yet; they don't count
+# as seen, so a post lost to an interrupted run is scraped again.
+# "degraded" posts were stored uncleaned because the AI was unavailable; the
+# next run cleans them from the post store instead of scraping them again.
+STAGES = ("skipped", "accepted", "degraded", "saved", "audio", "subtitles")
+
+
+class PostIndex:
+    """SQLite-backed record of processed posts and the stage each one reached"""
+
+    def __init__(self, path: str | Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        # check_same_thread=False so worker threads can share the index;
+        # the lock keeps their statements and commits from interleaving
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS posts (
+                   id TEXT PRIMARY KEY,
+                   subreddit TEXT NOT NULL DEFAULT '',
+                   title TEXT NOT NULL DEFAULT '',
+                   stage TEXT NOT NULL,
+                   first_seen REAL NOT NULL,
+                   updated_at REAL NOT NULL
+               )"""
+        )
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS watermarks (
+                   subreddit TEXT PRIMARY KEY,
+                   post_id TEXT NOT NULL,
+                   created REAL NOT NULL,
+                   updated_at REAL NOT NULL
+               )"""
+        )
+        self.conn.commit()
+
+    def _execute(self, query: str, params=()) -> sqlite3.Cursor:
+        """Run one statement and commit it, holding the lock"""
+        with self.lock:
+            cursor = self.conn.execute(query, params)
+            self.conn.commit()
+            return cursor
+
+    def _fetchall(self, query: str, params=()) -> list[tuple]:
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def get_stage(self, post_id: str) -> str | None:
+        """Return the stage ``post_id`` reached, or None if it was never seen"""
+        rows = self._fetchall("SELECT stage FROM posts WHERE id = ?", (post_id,))
+        return rows[0][0] if rows else None
+
+    def has_seen(self, post_id: str) -> bool:
+        """True if an earlier run finished with ``post_id`` (anything but accepted)"""
+        return self.get_stage(post_id) not in (None, "accepted")
+
+    def mark(self, post_id: str, stage: str, subreddit: str = "", title: str = "") -> None:
+        """Record that ``post_id`` reached ``stage``"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}'. Choose from: {', '.join(STAGES)}")
+        now = time.time()
+        self._execute(
+            """INSERT INTO posts (id, subreddit, title, stage, first_seen, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(id) DO UPDATE SET
+                   stage = excluded.stage,
+                   subreddit = CASE WHEN excluded.subreddit != '' THEN excluded.subreddit ELSE posts.subreddit END,
+                   title = CASE WHEN excluded.title != '' THEN excluded.title ELSE posts.title END,
+                   updated_at = excluded.updated_at""",
+            (post_id, subreddit, title, stage, now, now),
+        )
+
+    def list(self, stage: str | None = None, limit: int | None = None) -> list[tuple]:
+        """Return (id, subreddit, title, stage, updated_at) rows, newest first"""
+        query = "SELECT id, subreddit, title, stage, updated_at FROM posts"
+        params: list = []
+        if stage:
+            query += " WHERE stage = ?"
+            params.append(stage)
+        query += " ORDER BY updated_at DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._fetchall(query, params)
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of posts at each stage"""
+        rows = self._fetchall("SELECT stage, COUNT(*) FROM posts GROUP BY stage")
+        return dict(rows)
+
+    def prune(self, older_than_days: float | None = None, stage: str | None = None) -> int:
+        """Delete entries last updated more than ``older_than_days`` ago
+        (optionally only those at ``stage``) and return how many were removed"""
+        clauses = []
+        params: list = []
+        if older_than_days is not None:
+            clauses.append("updated_at < ?")
+            params.append(time.time() - older_than_days * 86400)
+        if stage:
+            clauses.append("stage = ?")
+            params.append(stage)
+        query = "DELETE FROM posts"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return self._execute(query, params).rowcount
+
+    def forget(self, post_id: str) -> bool:
+        """Remove a single post so the next run processes it again"""
+        return self._execute("DELETE FROM posts WHERE id = ?", (post_id,)).rowcount > 0
+
+    def get_watermark(self, subreddit: str) -> tuple[str, float] | None:
+        """Return (post_id, created) of the high-water mark of ``subreddit``"""
+        rows = self._fetchall("SELECT post_id, created FROM watermarks WHERE subreddit = ?", (subreddit.lower(),))
+        return (rows[0][0], rows[0][1]) if rows else None
+
+    def set_watermark(self, subreddit: str, post_id: str, created: float) -> None:
+        """Move the high-water mark of ``subreddit`` forward (never backwards)"""
+        self._execute(
+            """INSERT INTO watermarks (subreddit, post_id, created, updated_at)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(subreddit) DO UPDATE SET
+                   post_id = excluded.post_id,
+                   created = excluded.created,
+                   updated_at = excluded.updated_at
+               WHERE excluded.created > watermarks.created""",
+            (subreddit.lower(), post_id, created, time.time()),
+        )
+
+    def list_watermarks(self) -> list[tuple]:
+        """Return (subreddit, post_id, created) rows"""
+        return self._fetchall("SELECT subreddit, post_id, created FROM watermarks ORDER BY subreddit")
+
+    def reset_watermark(self, subreddit: str) -> bool:
+        """Forget the high-water mark so the next incremental run reads ``subreddit`` from the top"""
+        return self._execute("DELETE FROM watermarks WHERE subreddit = ?", (subreddit.lower(),)).rowcount > 0
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# ----------------------------------------------------------------------
+# ---------------------------- main -------------------------------------
+# ----------------------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect and prune the processed-post index.")
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=DEFAULT_INDEX_PATH,
+        help="Path to the index database (default: post_index.db in the project root)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Show how many posts reached each stage")
+
+    list_parser = commands.add_parser("list", help="List indexed posts, newest first")
+    list_parser.add_argument("--stage", choices=STAGES, help="Only show posts at this stage")
+    list_parser.add_argument("--limit", type=int, default=50, help="Maximum rows to show (default: 50)")
+
+    prune_parser = commands.add_parser("prune", help="Delete old entries so those posts can be processed again")
+    prune_parser.add_argument("--older-than", type=float, metavar="DAYS", help="Only delete entries older than DAYS")
+    prune_parser.add_argument("--stage", choices=STAGES, help="Only delete entries at this stage")
+
+    forget_parser = commands.add_parser("forget", help="Delete a single post by id")
+    forget_parser.add_argument("post_id", help="Reddit fullname, e.g. t3_1abcde")
+
+    watermarks_parser = commands.add_parser("watermarks", help="Show the newest post processed per subreddit")
+    watermarks_parser.add_argument("--reset", metavar="SUBREDDIT", help="Forget the high-water mark of SUBREDDIT")
+
+    args = parser.parse_args()
+
+    if not args.index.exists():
+        print(f"❌  No index found at {args.index}")
+        return
+
+    index = PostIndex(args.index)
+    try:
+        if args.command == "stats":
+            counts = index.stats()
+            print(f"📇  {sum(counts.values())} posts in {args.index}")
+            for stage in STAGES:
+                print(f"   {stage:<10} {counts.get(stage, 0)}")
+
+        elif args.command == "list":
+            for post_id, subreddit, title, stage, updated_at in index.list(args.stage, args.limit):
+                when = datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M")
+                print(f"{post_id:<12} {stage:<10} {when}  r/{subreddit}  {title[:60]}")
+
+        elif args.command == "prune":
+            if args.older_than is None and args.stage is None:
+                print("⚠️  Refusing to prune everything; pass --older-than and/or --stage")
+                return
+            removed = index.prune(args.older_than, args.stage)
+            print(f"✅  Pruned {removed} entries")
+
+        elif args.command == "forget":
+            if index.forget(args.post_id):
+                print(f"✅  Forgot {args.post_id}")
+            else:
+                print(f"⚠️  {args.post_id} is not in the index")
+
+        elif args.command == "watermarks":
+            if args.reset:
+                if index.reset_watermark(args.reset):
+                    print(f"✅  Reset the high-water mark of r/{args.reset}")
+                else:
+                    print(f"⚠️  r/{args.reset} has no high-water mark")
+                return
+            for subreddit, post_id, created in index.list_watermarks():
+                when = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M")
+                print(f"r/{subreddit:<24} {post_id:<12} {when}")
+    finally:
+        index.close()
@@ -0,0 +1,147 @@
+"""
+Structured record of every saved post, shared by all stages
+
+*   The scraper writes one record per saved post: raw and cleaned text, the
+    speaker's gender, and the YouTube hashtags, titles and description
+*   The voice-over and subtitle stages read the records that still lack
+    their artifact and write the artifact paths back
+*   Records are stored in SQLite (``post_store.db`` in the project root);
+    the ``---POST_SEPARATOR---`` text log is only written for people to read
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .paths import ROOT_DIR
+
+DEFAULT_STORE_PATH = ROOT_DIR / "post_store.db"
+
+# Columns holding lists, stored as JSON
+LIST_FIELDS = ("hashtags", "shorts_titles")
+
+FIELDS = (
+    "id", "batch", "number", "subreddit", "title", "raw_text", "cleaned_text", "gender",
+    "hashtags", "shorts_titles", "description", "audio_path", "srt_path",
+)
+
+# Artifacts a later stage fills in, and the column holding each one's path
+ARTIFACTS = {"audio": "audio_path", "subtitles": "srt_path"}
+
+
+def split_gender(text: str) -> tuple[str, str]:
+    """Return ('male' | 'female' | '', text) with every <<MALE>>/<<FEMALE>> marker removed"""
+    gender = ""
+    if "<<MALE>>" in text:
+        gender = "male"
+    elif "<<FEMALE>>" in text:
+        gender = "female"
+    return gender, re.sub(r"<<(MALE|FEMALE)>>", "", text).strip()
+
+
+def split_title_and_body(text: str) -> tuple[str, list[str]]:
+    """Split cleaned post text into its title (first line) and body lines"""
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    if not lines:
+        return "", []
+    return lines[0], lines[1:]
+
+
+def local_post_id(title: str, raw_text: str) -> str:
+    """Stable id for posts that came without a Reddit fullname"""
+    return "local_" + hashlib.sha1(f"{title}\n{raw_text}".encode("utf-8")).hexdigest()[:12]
+
+
+class PostStore:
+    """SQLite-backed post records, keyed by Reddit fullname"""
+
+    def __init__(self, path: str | Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        # Shared by the pipeline's worker threads, like PostIndex
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS posts (
+                   id TEXT PRIMARY KEY,
+                   batch TEXT NOT NULL DEFAULT '',
+                   number INTEGER NOT NULL DEFAULT 0,
+                   subreddit TEXT NOT NULL DEFAULT '',
+                   title TEXT NOT NULL DEFAULT '',
+                   raw_text TEXT NOT NULL DEFAULT '',
+                   cleaned_text TEXT NOT NULL DEFAULT '',
+                   gender TEXT NOT NULL DEFAULT '',
+                   hashtags TEXT NOT NULL DEFAULT '[]',
+                   shorts_titles TEXT NOT NULL DEFAULT '[]',
+                   description TEXT NOT NULL DEFAULT '',
+                   audio_path TEXT NOT NULL DEFAULT '',
+                   srt_path TEXT NOT NULL DEFAULT '',
+                   created_at REAL NOT NULL,
+                   updated_at REAL NOT NULL
+               )"""
+        )
+        self.conn.commit()
+
+    def save(self, record: dict) -> None:
+        """Insert ``record`` or update the fields it carries"""
+        fields = [name for name in FIELDS if name in record and name != "id"]
+        values = [json.dumps(record[name]) if name in LIST_FIELDS else record[name] for name in fields]
+        now = time.time()
+        columns = ", ".join(["id", *fields, "created_at", "updated_at"])
+        placeholders = ", ".join("?" * (len(fields) + 3))
+        updates = ", ".join([*(f"{name} = excluded.{name}" for name in fields), "updated_at = excluded.updated_at"])
+        with self.lock:
+            self.conn.execute(
+                f"""INSERT INTO posts ({columns}) VALUES ({placeholders})
+                    ON CONFLICT(id) DO UPDATE SET {updates}""",
+                (record["id"], *values, now, now),
+            )
+            self.conn.commit()
+
+    def update(self, post_id: str, **fields) -> None:
+        """Set some fields of an existing record (e.g. ``audio_path``)"""
+        self.save({"id": post_id, **fields})
+
+    def get(self, post_id: str) -> dict | None:
+        rows = self._select("WHERE id = ?", (post_id,))
+        return rows[0] if rows else None
+
+    def pending(self, artifact: str) -> list[dict]:
+        """Records that were cleaned but have no ``artifact`` ('audio' or 'subtitles') yet, oldest first"""
+        column = ARTIFACTS[artifact]
+        return self._select(f"WHERE cleaned_text != '' AND {column} = '' ORDER BY created_at, number")
+
+    def uncleaned(self) -> list[dict]:
+        """Records saved without cleaned text (their AI cleaning was deferred), oldest first"""
+        return self._select("WHERE cleaned_text = '' AND raw_text != '' ORDER BY created_at, number")
+
+    def list(self, batch: str | None = None, limit: int | None = None) -> list[dict]:
+        """Records of one batch (or all), newest first"""
+        clause, params = "", []
+        if batch:
+            clause = "WHERE batch = ?"
+            params.append(batch)
+        clause += " ORDER BY created_at DESC"
+        if limit:
+            clause += " LIMIT ?"
+            params.append(limit)
+        return self._select(clause, params)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _select(self, clause: str, params=()) -> list[dict]:
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {', '.join(FIELDS)} FROM posts {clause}", params).fetchall()
+        records = []
+        for row in rows:
+            record = dict(zip(FIELDS, row))
+            for name in LIST_FIELDS:
+                record[name] = json.loads(record[name])
+            records.append(record)
+        return records
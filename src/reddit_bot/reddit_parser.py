@@ -0,0 +1,181 @@
+"""
+HTML parsing backends for old.reddit listing and permalink pages.
+
+Every backend returns the same extraction results; they only differ in how
+much work BeautifulSoup does to get there:
+
+*   ``html.parser`` - the pure-Python parser, full tree (original behaviour)
+*   ``lxml``        - the C-backed lxml parser, full tree
+*   ``restricted``  - only builds the ``thing`` / link subtrees we read from,
+                      using lxml when it is installed and html.parser otherwise
+
+bs4 is only imported on the first parse.
+"""
+import importlib.util
+
+PARSER_BACKENDS = ("html.parser", "lxml", "restricted")
+
+MOD_INDICATORS = ['mod', 'automod', 'aitamod']
+
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+
+def resolve_backend(backend="auto"):
+    """Return a concrete backend name for ``backend`` ('auto' picks the fastest available)"""
+    if backend in (None, "", "auto"):
+        return "restricted"
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{backend}'. Choose from: {', '.join(PARSER_BACKENDS)}")
+    if backend == "lxml" and not HAS_LXML:
+        print("⚠ Warning: lxml is not installed, falling back to html.parser")
+        return "html.parser"
+    return backend
+
+
+def make_soup(markup, backend="auto", parse_only=None):
+    """Build a BeautifulSoup tree with the given backend.
+
+    ``parse_only`` is only honoured by the restricted backend; the full-tree
+    backends always parse the whole document.
+    """
+    from bs4 import BeautifulSoup
+
+    backend = resolve_backend(backend)
+    if backend == "restricted":
+        builder = "lxml" if HAS_LXML else "html.parser"
+        return BeautifulSoup(markup, builder, parse_only=parse_only)
+    return BeautifulSoup(markup, backend)
+
+
+def _text(elem, default):
+    return elem.get_text() if elem else default
+
+
+def _post_from_thing(post):
+    """Extract the fields we care about from a listing ``div.thing``"""
+    title_elem = post.find('a', class_='title')
+
+    score_elem = post.find('div', class_='score unvoted')
+    if not score_elem:
+        score_elem = post.find('div', class_='score likes')
+    if not score_elem:
+        score_elem = post.find('div', class_='score dislikes')
+
+    author = _text(post.find('a', class_='author'), 'Unknown')
+    permalink = post.get('data-permalink', '')
+    timestamp = post.get('data-timestamp', '')  # milliseconds since the epoch
+
+    return {
+        'id': post.get('data-fullname', ''),
+        'title': _text(title_elem, 'No title'),
+        'score': _text(score_elem, '0'),
+        'author': author,
+        'url': title_elem.get('href') if title_elem else '',
+        'permalink': f"https://old.reddit.com{permalink}" if permalink else '',
+        'created': int(timestamp) / 1000 if timestamp.isdigit() else 0.0,
+        'stickied': post.find('span', class_='stickied-tagline') is not None,
+        'is_mod': any(mod_indicator in author.lower() for mod_indicator in MOD_INDICATORS),
+        'content': None,  # listing pages never carry the body
+    }
+
+
+def _is_thing(css_class):
+    # The strainer sees the raw class string during parsing, so match on its words
+    return css_class is not None and 'thing' in css_class.split()
+
+
+def parse_listing(markup, backend="auto"):
+    """Return a list of post dicts for every ``div.thing`` on a listing page"""
+    from bs4 import SoupStrainer
+
+    soup = make_soup(markup, backend, parse_only=SoupStrainer('div', class_=_is_thing))
+    return [_post_from_thing(post) for post in soup.find_all('div', class_='thing')]
+
+
+def _usertext(container):
+    """Return the text of the ``usertext-body`` inside ``container``, or None"""
+    content_div = container.find('div', class_='usertext-body')
+    if not content_div:
+        return None
+    content_p = content_div.find('div', class_='md')
+    if content_p:
+        return content_p.get_text(separator='\n', strip=True)
+    return content_div.get_text(strip=True)
+
+
+def parse_post_content(markup, backend="auto"):
+    """Return the selftext of a permalink page, or None if it has none"""
+    from bs4 import SoupStrainer
+
+    # On old.reddit the expando and the usertext body both live inside the
+    # link ``thing``, so the restricted parse never builds the comment tree.
+    soup = make_soup(markup, backend, parse_only=SoupStrainer('div', attrs={'data-type': 'link'}))
+
+    post_container = soup.find('div', {'data-type': 'link'})
+    if post_container:
+        content = _usertext(post_container)
+        if content is not None:
+            return content
+
+    expando = soup.find('div', class_='expando')
+    if expando:
+        content_div = expando.find('div', class_='usertext-body')
+        if content_div:
+            content_p = content_div.find('div', class_='md')
+            if content_p:
+                return content_p.get_text(separator='\n', strip=True)
+
+    thing_div = soup.find('div', class_='thing', attrs={'data-type': 'link'})
+    if thing_div:
+        usertext = thing_div.find('div', class_='usertext-body')
+        if usertext:
+            md_div = usertext.find('div', class_='md')
+            if md_div:
+                return md_div.get_text(separator='\n', strip=True)
+
+    return None
+
+
+def _clean_selftext(selftext):
+    """Lay out markdown selftext the way parse_post_content lays out the rendered body"""
+    if selftext in ('[removed]', '[deleted]'):
+        return ''
+    return '\n'.join(line.strip() for line in selftext.splitlines() if line.strip())
+
+
+def parse_listing_json(payload):
+    """Return a list of post dicts from a listing ``.json`` payload.
+
+    Unlike parse_listing, each post also carries its body as ``content``:
+    the selftext for self posts, '' when the post has no body (link posts,
+    removed posts) and None when the payload did not include one.
+    """
+    posts = []
+    for child in payload.get('data', {}).get('children', []):
+        if child.get('kind') != 't3':
+            continue
+        data = child.get('data', {})
+        author = data.get('author') or 'Unknown'
+        permalink = data.get('permalink', '')
+
+        if not data.get('is_self', True):
+            content = ''
+        elif 'selftext' in data:
+            content = _clean_selftext(data['selftext'])
+        else:
+            content = None
+
+        posts.append({
+            'id': data.get('name', ''),
+            'title': data.get('title', 'No title'),
+            'score': str(data.get('score', 0)),
+            'author': author,
+            'url': data.get('url', ''),
+            'permalink': f"https://old.reddit.com{permalink}" if permalink else '',
+            'created': float(data.get('created_utc') or 0),
+            'stickied': bool(data.get('stickied')),
+            'is_mod': data.get('distinguished') == 'moderator'
+                      or any(mod_indicator in author.lower() for mod_indicator in MOD_INDICATORS),
+            'content': content,
+        })
+    return posts
@@ -0,0 +1,1215 @@
+"""
+The Reddit scraper: fetches listing pages and permalinks, filters posts,
+cleans them with AI and writes them to the post log.  Optionally voices and
+subtitles them in-process afterwards or, in pipeline mode, while scraping.
+
+Call run() with a console-interface style config dict; main.py is the
+command-line wrapper around it.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from . import subtitles, voice_over
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .groq import GroqClient, GroqError, load_api_key
+from .llm_backends import build_pool
+from .http_cache import CachedSession
+from .llm_cache import DEFAULT_CACHE_PATH as DEFAULT_LLM_CACHE_PATH, LLMCache
+from .model_router import FAST_MODEL, LARGE_MODEL, ModelRouter
+from .normalize import noise_score, normalize_post, tagged_text
+from .paths import ROOT_DIR
+from .pipeline import Pipeline, Stage
+from .politeness import HostScheduler
+from .post_index import PostIndex
+from .post_store import PostStore, local_post_id, split_gender
+from .reddit_parser import parse_listing, parse_listing_json, parse_post_content, resolve_backend
+from .sentence_stream import SentenceSplitter
+from .token_budget import BudgetExceeded, TokenBudget
+from .tts_session import TTSSession
+
+# Default Configuration, keyed like the console interface's config file
+DEFAULT_CONFIG = {
+    'subreddits': ['AmITheAsshole', 'AmIOverreacting'],
+    'use_ai_cleaning': True,  # Set to False to disable AI processing
+    'combined_ai_call': True,  # Clean and generate YouTube content in one JSON request per post
+    'local_rules': True,  # Expand abbreviations, ages and gender tags locally before any AI request
+    'noise_threshold': 3.0,  # Posts scoring below this (problems per 100 words) skip the AI cleaning
+    'model_routing': True,  # Pick the Groq model and max_tokens per request (see model_router.py)
+    'fast_model': FAST_MODEL,  # Metadata and lightly noisy posts
+    'large_model': LARGE_MODEL,  # Long or very noisy posts
+    'heavy_noise': 8.0,  # Noise score from which a post is cleaned by the large model
+    'auto_generate_audio': True,  # Set to False to disable automatic audio generation
+    'output_folder': "get-audio",  # Folder where text files will be saved
+    'sort_type': 'new',
+    'limit': 25,
+    'max_chars': 1500,  # Default max characters
+    'parser_backend': 'auto',  # html.parser, lxml, restricted or auto
+    'listing_mode': 'html',  # 'json' reads post bodies straight from the listing
+    'skip_seen_posts': True,  # Skip posts handled by earlier runs
+    'http_cache': True,  # Serve recently fetched pages from disk
+    'cache_ttl_listing': 15 * 60,  # Seconds before a listing is refetched
+    'cache_ttl_permalink': 60 * 60,  # Seconds before a permalink is refetched
+    'cache_max_mb': 100,  # Least recently used pages are evicted past this size
+    'posts_per_subreddit': 3,  # Stop once this many posts are saved
+    'max_pages': 3,  # Listing pages to read per subreddit before giving up
+    'incremental': True,  # With sort 'new', stop at posts an earlier run reached
+    'background_processing': True,  # Clean posts while waiting to fetch the next one
+    'pipeline': False,  # Clean, voice and subtitle posts concurrently while scraping
+    'pipeline_workers': {},  # Per-stage worker counts, e.g. {"tts": 4}
+    'pipeline_queue_size': 4,  # Posts waiting in front of each stage
+    'stream_cleaning': False,  # In pipeline mode, voice the AI's reply sentence by sentence as it streams in
+    'llm_cache': True,  # Reuse Groq responses for identical requests
+    'llm_cache_mode': 'normal',  # normal, bypass, record or replay (see llm_cache.py)
+    'llm_cache_ttl': 7 * 24 * 60 * 60,  # Seconds before a cached response is requested again
+    'llm_cache_max_mb': 50,  # Least recently used responses are evicted past this size
+    'llm_cache_path': None,  # Defaults to llm_cache.db in the project root
+    'llm_max_in_flight': 8,  # Groq requests sent at once (also the number of posts cleaned in parallel)
+    'llm_max_retries': 5,  # Retries of a rate-limited or failed Groq request
+    'llm_timeout': 60,  # Seconds before a single Groq request is given up
+    'llm_backends': [],  # More OpenAI-compatible servers, e.g. [{"name": "ollama", "url": ..., "models": {...}}]
+    'llm_hedge': True,  # Also ask the next backend when the first is slower than its p95
+    'llm_hedge_after': None,  # Fixed seconds before hedging instead of the p95
+    'llm_budget': True,  # Pace Groq requests to stay within the quotas below
+    'llm_requests_per_minute': 30,
+    'llm_tokens_per_minute': 12000,
+    'llm_requests_per_day': 1000,
+    'llm_tokens_per_day': 100000,
+    'llm_metadata_reserve': 0.2,  # Share of the daily tokens kept for cleaning only
+    'circuit_failures': 5,  # Failures in a row after which calls to Groq (or Edge TTS) fail fast
+    'circuit_cooldown': 30,  # Seconds an open circuit fails calls before letting a trial call through
+    'adaptive_timeouts': True,  # Give up on calls at 3x their recent p95 latency (at most the timeouts below)
+    'tts_timeout': 180,  # Seconds before a single Edge TTS call is given up
+    'tts_parallel': 4,  # Posts voiced at once after scraping (pipeline mode uses pipeline_workers['tts'])
+    'tts_retries': 2,  # Retries of a post whose TTS failed
+    'tts_word_timings': True,  # Stream whole-post TTS and save word timings next to each MP3, for exact subtitle cues
+    'tts_keep_alive': 20,  # Seconds an idle Edge TTS connection is kept for the next post or sentence (0: one per job)
+    'tts_chunked': False,  # Voice posts sentence by sentence, caching each sentence (a retry redoes only the failed ones)
+}
+
+def configure(config=None):
+    """Set the module configuration from ``config``; missing keys get their defaults"""
+    global LOCAL_RULES, NOISE_THRESHOLD, MODEL_ROUTING, FAST_GROQ_MODEL, LARGE_GROQ_MODEL, HEAVY_NOISE
+    global subreddits, USE_AI_CLEANING, COMBINED_AI_CALL, AUTO_GENERATE_AUDIO, OUTPUT_FOLDER, SORT_TYPE, POST_LIMIT, MAX_CHARS
+    global PARSER_BACKEND, LISTING_MODE, SKIP_SEEN_POSTS, USE_HTTP_CACHE, CACHE_TTL_LISTING, CACHE_TTL_PERMALINK
+    global CACHE_MAX_MB, POSTS_PER_SUBREDDIT, MAX_PAGES, INCREMENTAL, BACKGROUND_PROCESSING
+    global USE_PIPELINE, PIPELINE_WORKERS, PIPELINE_QUEUE_SIZE, STREAM_CLEANING
+    global USE_LLM_CACHE, LLM_CACHE_MODE, LLM_CACHE_TTL, LLM_CACHE_MAX_MB, LLM_CACHE_PATH
+    global LLM_MAX_IN_FLIGHT, LLM_MAX_RETRIES, LLM_TIMEOUT, LLM_BACKENDS, LLM_HEDGE, LLM_HEDGE_AFTER
+    global USE_LLM_BUDGET, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_REQUESTS_PER_DAY, LLM_TOKENS_PER_DAY
+    global LLM_METADATA_RESERVE, CIRCUIT_FAILURES, CIRCUIT_COOLDOWN, ADAPTIVE_TIMEOUTS, TTS_TIMEOUT
+    global TTS_PARALLEL, TTS_RETRIES, TTS_CHUNKED, TTS_WORD_TIMINGS, TTS_KEEP_ALIVE
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    subreddits = config['subreddits']
+    USE_AI_CLEANING = config['use_ai_cleaning']
+    COMBINED_AI_CALL = config['combined_ai_call']
+    LOCAL_RULES = config['local_rules']
+    NOISE_THRESHOLD = config['noise_threshold']
+    MODEL_ROUTING = config['model_routing']
+    FAST_GROQ_MODEL = config['fast_model']
+    LARGE_GROQ_MODEL = config['large_model']
+    HEAVY_NOISE = config['heavy_noise']
+    AUTO_GENERATE_AUDIO = config['auto_generate_audio']
+    OUTPUT_FOLDER = config['output_folder']
+    SORT_TYPE = config['sort_type']
+    POST_LIMIT = config['limit']
+    MAX_CHARS = config['max_chars']
+    PARSER_BACKEND = resolve_backend(config['parser_backend'])
+    LISTING_MODE = config['listing_mode']
+    SKIP_SEEN_POSTS = config['skip_seen_posts']
+    USE_HTTP_CACHE = config['http_cache']
+    CACHE_TTL_LISTING = config['cache_ttl_listing']
+    CACHE_TTL_PERMALINK = config['cache_ttl_permalink']
+    CACHE_MAX_MB = config['cache_max_mb']
+    POSTS_PER_SUBREDDIT = config['posts_per_subreddit']
+    MAX_PAGES = config['max_pages']
+    INCREMENTAL = config['incremental']
+    BACKGROUND_PROCESSING = config['background_processing']
+    USE_PIPELINE = config['pipeline']
+    PIPELINE_WORKERS = config['pipeline_workers']
+    PIPELINE_QUEUE_SIZE = config['pipeline_queue_size']
+    STREAM_CLEANING = config['stream_cleaning']
+    USE_LLM_CACHE = config['llm_cache']
+    LLM_CACHE_MODE = config['llm_cache_mode']
+    LLM_CACHE_TTL = config['llm_cache_ttl']
+    LLM_CACHE_MAX_MB = config['llm_cache_max_mb']
+    LLM_CACHE_PATH = config['llm_cache_path']
+    LLM_MAX_IN_FLIGHT = config['llm_max_in_flight']
+    LLM_MAX_RETRIES = config['llm_max_retries']
+    LLM_TIMEOUT = config['llm_timeout']
+    LLM_BACKENDS = config['llm_backends']
+    LLM_HEDGE = config['llm_hedge']
+    LLM_HEDGE_AFTER = config['llm_hedge_after']
+    USE_LLM_BUDGET = config['llm_budget']
+    LLM_REQUESTS_PER_MINUTE = config['llm_requests_per_minute']
+    LLM_TOKENS_PER_MINUTE = config['llm_tokens_per_minute']
+    LLM_REQUESTS_PER_DAY = config['llm_requests_per_day']
+    LLM_TOKENS_PER_DAY = config['llm_tokens_per_day']
+    LLM_METADATA_RESERVE = config['llm_metadata_reserve']
+    CIRCUIT_FAILURES = config['circuit_failures']
+    CIRCUIT_COOLDOWN = config['circuit_cooldown']
+    ADAPTIVE_TIMEOUTS = config['adaptive_timeouts']
+    TTS_TIMEOUT = config['tts_timeout']
+    TTS_PARALLEL = config['tts_parallel']
+    TTS_RETRIES = config['tts_retries']
+    TTS_CHUNKED = config['tts_chunked']
+    TTS_WORD_TIMINGS = config['tts_word_timings']
+    TTS_KEEP_ALIVE = config['tts_keep_alive']
+
+configure()
+
+# Read from api_key.txt or GROQ_API_KEY when run() starts
+GROQ_API_KEY = ""
+
+# Created by run(); identical Groq requests are answered from disk (see llm_cache.py)
+llm_cache = None
+
+# Created by run(); Groq and any other configured backends behind one pooled,
+# rate-limit-aware client shared by all workers (see llm_backends.py)
+llm_client = None
+
+# Replaced by run() with one built from the configuration
+router = ModelRouter()
+
+def ask_groq(prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000, json_mode=False,
+             priority="clean", validate=None):
+    """A Groq chat completion through the LLM response cache.  ``priority`` is
+    'clean' or 'metadata'; metadata gives way when the token budget runs low.
+    ``validate(reply)`` raises for a reply the caller can't use, which is then not cached."""
+    def call():
+        return llm_client.complete(prompt, model=model, temperature=temperature,
+                                    max_tokens=max_tokens, json_mode=json_mode, priority=priority)
+    if llm_cache is None:
+        return call()
+    return llm_cache.complete(call, model, temperature, max_tokens, prompt, json_mode, validate)
+
+def stream_groq(prompt, model="llama-3.3-70b-versatile", temperature=0.3, max_tokens=2000, priority="clean",
+                validate=None):
+    """ask_groq for a streamed reply: an iterator over the pieces of the reply"""
+    def call_stream():
+        return llm_client.stream(prompt, model=model, temperature=temperature,
+                                  max_tokens=max_tokens, priority=priority)
+    if llm_cache is None:
+        return call_stream()
+    return llm_cache.stream(call_stream, model, temperature, max_tokens, prompt, validate=validate)
+
+def generate_youtube_content_with_ai(post):
+    """Generate YouTube Shorts titles, description, and hashtags"""
+    if not USE_AI_CLEANING:
+        return "", "", ""
+    
+    prompt = f"""Based on this Reddit post, create content for a YouTube Shorts video:
+
+1. Generate 5-7 relevant hashtags for YouTube.
+Focus on: the main topic, emotions, relationships, conflicts, and general AITA/Reddit content.
+Make sure all hashtags are LOWERCASE.
+
+2. Create 5-6 engaging YouTube Shorts titles (40-50 characters each).
+Each title should end with 2 or 3 of the most relevant hashtags from above.
+Make titles catchy and clickable but not clickbait.
+
+3. Create a YouTube Shorts description (1-2 sentences) that incorporates the hashtags naturally at the end.
+
+Format your response exactly like this:
+---HASHTAGS---
+hashtag1 hashtag2 hashtag3 hashtag4 hashtag5
+
+---TITLES---
+Title 1 #relevanthashtag
+Title 2 #anotherhashtag
+Title 3 #relevanthashtag
+[etc.]
+
+---DESCRIPTION---
+A compelling description sentence or two. #hashtag1 #hashtag2 #hashtag3 #hashtag4 #hashtag5
+
+Post: {post}
+"""
+
+    try:
+        model, max_tokens = router.route('metadata', post)
+        content = ask_groq(prompt, model=model, temperature=0.7, max_tokens=max_tokens, priority="metadata")
+        
+        # Parse the response to extract hashtags, titles, and description
+        hashtags = ""
+        titles = []
+        description = ""
+        
+        current_section = None
+        for line in content.split('\n'):
+            if line.strip() == "---HASHTAGS---":
+                current_section = "hashtags"
+            elif line.strip() == "---TITLES---":
+                current_section = "titles"
+            elif line.strip() == "---DESCRIPTION---":
+                current_section = "description"
+            elif line.strip() and current_section == "hashtags":
+                hashtags = line.strip()
+            elif line.strip() and current_section == "titles":
+                titles.append(line.strip())
+            elif line.strip() and current_section == "description":
+                if description:
+                    description += "\n" + line.strip()
+                else:
+                    description = line.strip()
+        
+        return hashtags, titles, description
+    except Exception as e:
+        print(f"⚠ YouTube content generation failed: {e}")
+        return "", [], ""
+
+
+def generate_hashtags_with_ai(post):
+    """Use AI to generate relevant hashtags for social media (legacy function)"""
+    if not USE_AI_CLEANING:
+        return ""
+    
+    # Call the new comprehensive function and just return the hashtags
+    hashtags, _, _ = generate_youtube_content_with_ai(post)
+    return hashtags
+
+# Rewrites normalize.py does locally; only asked of the AI when local_rules is off
+REWRITE_RULES = """- Expand common abbreviations (like "2" to "to", "ur" to "your", "bro" to "brother")
+- Make "AIO" be "Am I overreacting"
+- Make "AITA" be "Am I the asshole"
+- A number followed by an M or an F should be changed to: XXM = XX male, XXF = XX female, XXm = XX male, XXf = XX female
+"""
+
+def rewrite_rules():
+    return "" if LOCAL_RULES else REWRITE_RULES
+
+def build_clean_prompt(combined_text, gender=""):
+    """The plain-text cleaning prompt.  With ``gender`` already known the AI is not asked for it."""
+    if gender:
+        gender_rules = ""
+        gender_notes = ""
+    else:
+        gender_rules = """- If the text makes it clear the speaker is **male** (e.g., says "I (21M)" or "I am a dad"), prepend the ENTIRE text with: <<MALE>> .
+- If the text makes it clear the speaker is **female** (e.g., says "I (19F)" or "I am a mom"), prepend the ENTIRE text with: <<FEMALE>> .
+- If gender is not clear, prepend the ENTIRE text with: <<MALE>> .
+"""
+        gender_notes = "- Only insert one gender tag (at the very start).\n"
+    
+    return f"""You are a grammar and spelling corrector. Fix ALL errors in this text:
+- Correct ALL spelling mistakes
+- Fix ALL grammar errors (verb tenses, subject-verb agreement, pronouns, etc.)
+- Fix punctuation errors
+{rewrite_rules()}{gender_rules}- Put the content on multiple lines so it is easier to read
+
+IMPORTANT:
+{gender_notes}- Keep the exact same tone, style, and meaning. Do not rewrite sentences.
+- Return ONLY the corrected text with no explanations.
+
+Text to correct:
+{combined_text}"""
+
+def llm_unavailable(error):
+    """True when ``error`` says the LLM service is down or out of quota, rather than
+    that something is wrong with the post or the reply"""
+    if isinstance(error, GroqError):
+        return error.status is None or error.status == 429 or error.status >= 500
+    return isinstance(error, (CircuitOpen, BudgetExceeded, asyncio.TimeoutError, OSError))
+
+def clean_text_with_ai(title, content, gender="", noise=0.0):
+    """Cleans and tags a whole post (title + content) at once.
+    With ``gender`` already known the AI is not asked for it; ``noise`` picks the model.
+    Errors saying the AI is unavailable (see llm_unavailable) are raised, so the
+    caller can keep the post for a later run instead of saving it half-done."""
+    combined_text = f"{title}. {content}"
+    
+    if not USE_AI_CLEANING or not combined_text:
+        return title, content
+    
+    prompt = build_clean_prompt(combined_text, gender)
+    try:
+        model, max_tokens = router.route('clean', combined_text, noise)
+        text = clean_with_groq(prompt, model, max_tokens)
+        if gender:
+            text = f"<<{gender.upper()}>> {split_gender(text)[1]}"
+        return text
+    except Exception as e:
+        if llm_unavailable(e):
+            raise
+        print(f"⚠ AI cleaning failed: {e}, using original text")
+        return content
+
+def clean_with_groq(prompt, model=LARGE_MODEL, max_tokens=2000):
+    """Use Groq's free API (very fast)"""
+    return ask_groq(prompt, model=model, temperature=0.3, max_tokens=max_tokens, validate=check_clean_reply)
+
+def check_clean_reply(reply):
+    """Reject a cleaning reply with no text besides its gender tag"""
+    if not split_gender(reply)[1]:
+        raise ValueError("the AI returned no cleaned text")
+
+def clean_and_describe_with_ai(title, content, gender="", noise=0.0):
+    """Clean a post and generate its YouTube Shorts content in a single JSON request.
+    
+    Returns (text, hashtags, titles, description) shaped like the results of
+    clean_text_with_ai and generate_youtube_content_with_ai.  Raises ValueError
+    when the reply does not match the expected schema."""
+    if gender:
+        gender_step = f'2. The speaker is {gender}: set "gender" to "{gender}".'
+    else:
+        gender_step = '2. Decide the speaker\'s gender: "male" if the text makes it clear the speaker is male (e.g., says "I (21M)" or "I am a dad"), "female" if it makes it clear the speaker is female (e.g., says "I (19F)" or "I am a mom"), otherwise "male".'
+    prompt = f"""You are a grammar and spelling corrector and a YouTube Shorts editor.
+
+1. Fix ALL errors in the Reddit post below:
+- Correct ALL spelling mistakes
+- Fix ALL grammar errors (verb tenses, subject-verb agreement, pronouns, etc.)
+- Fix punctuation errors
+{rewrite_rules()}- Put the content on multiple lines so it is easier to read
+- Keep the exact same tone, style, and meaning. Do not rewrite sentences.
+
+{gender_step}
+
+3. Generate 5-7 relevant LOWERCASE hashtags for YouTube, without the # sign.
+Focus on: the main topic, emotions, relationships, conflicts, and general AITA/Reddit content.
+
+4. Create 5-6 engaging YouTube Shorts titles (40-50 characters each).
+Each title should end with 2 or 3 of the most relevant hashtags (with the # sign).
+Make titles catchy and clickable but not clickbait.
+
+5. Create a YouTube Shorts description (1-2 sentences) that incorporates the hashtags naturally at the end.
+
+Respond with ONLY a JSON object with exactly these keys:
+{{"title": "corrected title", "body": "corrected content, lines separated by \\n", "gender": "male or female",
+ "hashtags": ["hashtag1", "hashtag2"], "titles": ["Title 1 #hashtag"], "description": "Description. #hashtag1 #hashtag2"}}
+
+Title: {title}
+Post: {content}"""
+
+    model, max_tokens = router.route('combined', f"{title}\n{content}", noise)
+    reply = ask_groq(prompt, model=model, temperature=0.3, max_tokens=max_tokens, json_mode=True,
+                     validate=lambda reply: validate_combined_reply(json.loads(reply)))
+    data = validate_combined_reply(json.loads(reply))
+    if gender:
+        data['gender'] = gender
+    
+    text = f"<<{data['gender'].upper()}>> {data['title'].strip()}\n{data['body'].strip()}"
+    hashtags = ' '.join(tag.strip().lstrip('#').lower() for tag in data['hashtags'] if tag.strip())
+    titles = [t.strip() for t in data['titles'] if t.strip()]
+    return text, hashtags, titles, data['description'].strip()
+
+def validate_combined_reply(data):
+    """Check the shape of a combined cleaning/metadata reply and return it"""
+    if not isinstance(data, dict):
+        raise ValueError("reply is not a JSON object")
+    for key in ('title', 'body', 'description'):
+        if not isinstance(data.get(key), str) or not data[key].strip():
+            raise ValueError(f"'{key}' must be a non-empty string")
+    for key in ('hashtags', 'titles'):
+        value = data.get(key)
+        if not isinstance(value, list) or not value or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"'{key}' must be a non-empty list of strings")
+    gender = data.get('gender')
+    if not isinstance(gender, str) or gender.strip().lower() not in ('male', 'female'):
+        raise ValueError("'gender' must be 'male' or 'female'")
+    data['gender'] = gender.strip().lower()
+    return data
+
+def get_random_headers():
+    # More varied and up-to-date user agents
+    user_agents = [
+        # Chrome on Windows
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+        # Chrome on Mac
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+        # Firefox on Windows
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0',
+        # Firefox on Mac
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/109.0',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:120.0) Gecko/20100101 Firefox/120.0',
+        # Safari
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Safari/605.1.15',
+        # Edge
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0'
+    ]
+    
+    # Random accept language with appropriate weighting
+    accept_languages = [
+        'en-US,en;q=0.9',
+        'en-US,en;q=0.8',
+        'en-GB,en;q=0.9,en-US;q=0.8',
+        'en-CA,en;q=0.9,en-US;q=0.8',
+        'en;q=0.9',
+    ]
+    
+    # Randomize some header values to appear more human-like
+    headers = {
+        'User-Agent': random.choice(user_agents),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Accept-Language': random.choice(accept_languages),
+        'Accept-Encoding': 'gzip, deflate, br',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': random.choice(['none', 'same-origin']),
+        'Sec-Fetch-User': '?1',
+        'Referer': 'https://www.google.com/' if random.random() > 0.5 else 'https://old.reddit.com/',
+        'Cache-Control': 'max-age=0',
+        # Add some randomness to the headers
+        'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"', 
+        'Sec-Ch-Ua-Mobile': '?0',
+        'Sec-Ch-Ua-Platform': '"' + random.choice(['Windows', 'macOS', 'Linux']) + '"',
+    }
+    
+    return headers
+
+def get_listing_headers():
+    """Headers for a subreddit listing request in the configured LISTING_MODE"""
+    headers = get_random_headers()
+    if LISTING_MODE == 'json':
+        headers['Accept'] = 'application/json'
+    return headers
+
+# Created by run(); the fetch helpers below use them
+session = None
+cached_session = None  # disk cache in front of the session (see http_cache.py)
+post_index = None  # remembers which posts earlier runs already handled (see post_index.py)
+post_store = None  # structured record of every saved post, read by the later stages (see post_store.py)
+scheduler = None  # spaces out requests per host without stalling the rest of the process (see politeness.py)
+
+# AI cleaning runs on worker threads, so it overlaps with the waits between fetches.  The
+# scraping thread writes the cleaned posts itself, oldest first, so they reach the output
+# file and the post store in the order they were accepted whichever finishes cleaning first.
+processing_pool = None
+pending_saves = []  # (future of prepare_post, output file), in the order the posts were accepted
+output_lock = threading.Lock()
+
+# Set when running in pipeline mode; accepted posts are fed into it instead
+pipeline = None
+posts_submitted = 0  # numbers the saved posts of a run
+degraded_posts = []  # titles of the posts left uncleaned because the AI was unavailable
+accepted_ids = set()  # ids accepted this run, which the index only marks saved once written
+
+def get_post_content(permalink):
+    """Get the full content of a Reddit post"""
+    if not permalink:
+        return None, 0
+    
+    print(f"Getting content from: {permalink}")
+    headers = get_random_headers()
+    
+    try:
+        response = cached_session.get(permalink, resource='permalink', headers=headers, timeout=30)
+        if response.status_code == 200:
+            content = parse_post_content(response.content, PARSER_BACKEND)
+            if content is not None:
+                return content, len(content)
+            
+            return None, 0
+        else:
+            return None, 0
+    except Exception as e:
+        print(f"Error fetching content: {e}")
+        return None, 0
+
+def prepare_cleaning(post):
+    """Run the local rules on a post.  Returns the (title, content, gender, noise) to
+    send to the AI, or None when the post gets no AI cleaning (post['text'] is then set)."""
+    title, content = post['title'], post['content']
+    if LOCAL_RULES:
+        local = normalize_post(title, content)
+        if not USE_AI_CLEANING or local['noise'] < NOISE_THRESHOLD:
+            if USE_AI_CLEANING:
+                print(f"✨ Cleaned locally (noise {local['noise']:.1f}), no AI request needed")
+            post['text'] = tagged_text(local)
+            return None
+        return local['title'], local['content'], local['gender'], local['noise']
+    if not USE_AI_CLEANING:
+        post['text'] = f"{title}\n{content}"
+        return None
+    return title, content, "", noise_score(f"{title}\n{content}")
+
+def clean_post(post):
+    """Fill in post['text'], the (AI-cleaned) title and content that get saved and spoken.
+    In combined mode the YouTube content is filled in by the same request.
+    With local_rules on, posts the local rules leave clean enough are not sent to the AI."""
+    prepared = prepare_cleaning(post)
+    if prepared is None:
+        return post
+    title, content, gender, noise = prepared
+    
+    if USE_AI_CLEANING and COMBINED_AI_CALL and budget_low():
+        print(f"⚠ Groq token budget is low, cleaning only (YouTube content only if the budget allows)")
+    elif USE_AI_CLEANING and COMBINED_AI_CALL:
+        print(f"🤖 Cleaning and generating YouTube Shorts content with AI...")
+        try:
+            (post['text'], post['hashtags'], post['shorts_titles'],
+             post['shorts_description']) = clean_and_describe_with_ai(title, content, gender, noise)
+            return post
+        except Exception as e:
+            print(f"⚠ Combined AI request failed: {e}, falling back to separate requests")
+    
+    print(f"🤖 Cleaning title and content with AI...")
+    return clean_or_degrade(post, title, content, gender, noise)
+
+def clean_or_degrade(post, title, content, gender, noise):
+    """clean_text_with_ai for ``post``, which is marked degraded when the AI is unavailable"""
+    try:
+        post['text'] = clean_text_with_ai(title, content, gender, noise)
+    except Exception as e:
+        print(f"🔁 AI unavailable ({e}), '{post['title'][:50]}' is kept uncleaned for the next run")
+        post['degraded'] = str(e)
+        with output_lock:
+            degraded_posts.append(post['title'])
+    return post
+
+def record_degraded(post):
+    """Store a degraded post without cleaned text, so it isn't voiced, and mark it in the
+    index, so it isn't scraped again: the next run cleans it from the post store"""
+    post.update(text='', hashtags='', shorts_titles=[], shorts_description='')
+    record_post(post)
+    if post['id']:
+        post_index.mark(post['id'], 'degraded', post['subreddit'], post['title'])
+    return post
+
+def retry_degraded_posts(filename):
+    """Queue the posts earlier runs left uncleaned because the AI was unavailable"""
+    if not USE_AI_CLEANING:
+        return
+    records = post_store.uncleaned()
+    if records:
+        print(f"🔁 Retrying the AI cleaning of {len(records)} post(s) left uncleaned by earlier runs")
+    for record in records:
+        submit_post({'id': record['id'], 'subreddit': record['subreddit'], 'title': record['title'],
+                     'content': record['raw_text']}, filename)
+
+def stream_clean_and_speak(post, audio_folder):
+    """clean_post for streaming mode: the AI's reply is voiced sentence by sentence
+    while it is still being generated.  Sets post['audio_file'] when that worked;
+    otherwise the tts stage voices the post as usual."""
+    prepared = prepare_cleaning(post)
+    if prepared is None:
+        return post
+    title, content, gender, noise = prepared
+    
+    combined_text = f"{title}. {content}"
+    model, max_tokens = router.route('clean', combined_text, noise)
+    splitter = SentenceSplitter(gender)
+    print(f"🌊 Streaming AI cleaning into TTS...")
+    try:
+        pieces = stream_groq(build_clean_prompt(combined_text, gender), model, 0.3, max_tokens,
+                             validate=check_clean_reply)
+        # The voice is picked once the reply's gender tag has arrived; untagged replies
+        # default to male, as splitter.text() does, so the audio matches its store key
+        audio = voice_over.run(voice_over.speak_sentences(splitter.sentences(pieces),
+                                                          lambda: voice_over.voice_for(splitter.gender or "male")))
+    except Exception as e:
+        if splitter.finished:
+            print(f"⚠ Streaming TTS failed: {e}, the post will be voiced afterwards")
+            post['text'] = splitter.text()
+        else:
+            print(f"⚠ Streaming AI cleaning failed: {e}, cleaning without streaming")
+            clean_or_degrade(post, title, content, gender, noise)
+        return post
+    
+    post['text'] = splitter.text()
+    gender, cleaned_text = split_gender(post['text'])
+    cleaned = {'id': post['id'] or local_post_id(post['title'], post['content']), 'number': post['number'],
+               'cleaned_text': cleaned_text, 'gender': gender}
+    post['audio_file'] = str(voice_over.save_audio(cleaned, audio, audio_folder))
+    return post
+
+def budget_low():
+    """True once the day's Groq tokens are down to the part kept for cleaning"""
+    return llm_client is not None and llm_client.budget is not None and llm_client.budget.low()
+
+def add_youtube_content(post):
+    """Fill in the YouTube Shorts hashtags, titles and description of a cleaned post"""
+    if 'hashtags' in post:
+        return post  # already filled in by the combined request
+    if USE_AI_CLEANING:
+        print(f"🎬 Generating YouTube Shorts content...")
+        hashtags, shorts_titles, shorts_description = generate_youtube_content_with_ai(post['text'])
+    else:
+        hashtags, shorts_titles, shorts_description = "", [], ""
+    post['hashtags'] = hashtags
+    post['shorts_titles'] = shorts_titles
+    post['shorts_description'] = shorts_description
+    return post
+
+def format_post_block(post):
+    """The ---POST_SEPARATOR--- section written to the output file for one post"""
+    block = f"---POST_SEPARATOR---\n{post['text']}\n"
+    
+    # Add YouTube content sections
+    if post['hashtags']:
+        # Add # to each hashtag
+        formatted_hashtags = ' '.join([f'#{tag}' for tag in post['hashtags'].split()])
+        block += f"\n---HASHTAGS---\n{formatted_hashtags}\n"
+    
+    if post['shorts_titles']:
+        block += f"\n---SHORTS_TITLES---\n"
+        for title in post['shorts_titles']:
+            block += f"{title}\n"
+    
+    if post['shorts_description']:
+        block += f"\n---SHORTS_DESCRIPTION---\n{post['shorts_description']}\n"
+    
+    return block
+
+def write_post(post, filename):
+    """Append a processed post to the output file"""
+    with output_lock:
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(format_post_block(post))
+
+def record_post(post):
+    """Save a processed post to the post store; post['record'] is set to the stored record"""
+    gender, cleaned_text = split_gender(post['text'])
+    post['record'] = {
+        'id': post['id'] or local_post_id(post['title'], post['content']),
+        'batch': post['batch'],
+        'number': post['number'],
+        'subreddit': post['subreddit'],
+        'title': post['title'],
+        'raw_text': post['content'],
+        'cleaned_text': cleaned_text,
+        'gender': gender,
+        'hashtags': post['hashtags'].split(),
+        'shorts_titles': post['shorts_titles'],
+        'description': post['shorts_description'],
+        'audio_path': '',
+        'srt_path': '',
+    }
+    post_store.save(post['record'])
+    return post
+
+def prepare_post(post):
+    """Clean a post with AI and add its YouTube content; the part of saving that can run on a worker"""
+    clean_post(post)
+    if not post.get('degraded'):
+        add_youtube_content(post)
+    return post
+
+def mark_saved(post):
+    """Mark a post saved in the index, once it is in the text file and the post store"""
+    if post['id']:
+        post_index.mark(post['id'], 'saved', post['subreddit'], post['title'])
+    return post
+
+def finish_post(post, filename):
+    """Write a prepared post to the text file and the post store"""
+    if post.get('degraded'):
+        record_degraded(post)
+        return
+    write_post(post, filename)
+    mark_saved(record_post(post))
+
+def save_post_to_file(post, filename):
+    """Save post data to a text file and the post store with AI-cleaned content"""
+    finish_post(prepare_post(post), filename)
+
+def parse_listing_response(response, subreddit):
+    """Return the post dicts on a listing response, or None if the subreddit is inaccessible"""
+    if LISTING_MODE == 'json':
+        payload = response.json()
+        if 'data' not in payload:
+            print(f"\n⚠️ Warning: Subreddit r/{subreddit} appears to be banned or inaccessible ({payload.get('reason', 'no listing data')})")
+            print("Skipping this subreddit. Try another one or check if it exists.\n")
+            return None
+        return parse_listing_json(payload)
+    
+    # Check if the page might indicate a banned subreddit
+    if 'banned' in response.text[:1000].lower():
+        print(f"\n⚠️ Warning: Subreddit r/{subreddit} appears to be banned or inaccessible")
+        print("Skipping this subreddit. Try another one or check if it exists.\n")
+        return None
+    return parse_listing(response.content, PARSER_BACKEND)
+
+def fetch_listing_page(url, subreddit):
+    """Fetch one listing page and return its post dicts, or None if nothing could be read"""
+    print(f"Scraping: {url} (r/{subreddit})")
+    headers = get_listing_headers()
+    response = cached_session.get(url, resource='listing', headers=headers, timeout=30)
+    print(f"Status Code: {response.status_code}")
+    
+    if response.status_code != 200:
+        print(f"Request failed with status code: {response.status_code}")
+        print("Response content:", response.text[:500])
+        return None
+    
+    try:
+        return parse_listing_response(response, subreddit)
+    except Exception as e:
+        print(f"Error parsing listing: {e}")
+        print("Response content:", response.text[:500])
+        return None
+
+def reached_watermark(post, watermark):
+    """True if ``post`` is at or below the (post_id, created) high-water mark"""
+    watermark_id, watermark_created = watermark
+    if post['id'] == watermark_id:
+        return True
+    return bool(post['created']) and post['created'] <= watermark_created
+
+def iter_listing_posts(subreddit, sort_type='new', limit=25, max_pages=3, watermark=None, first_gap=0.0,
+                       progress=None):
+    """Yield the regular (non-mod, non-sticky) posts of a subreddit one at a time.
+    
+    Pages are fetched lazily by following Reddit's ``after`` cursor: the next page
+    is only requested once the consumer has used up the current one, and never
+    more than ``max_pages`` pages per subreddit.  With a ``watermark`` (only
+    meaningful for the 'new' sort) paging stops at the first post that an
+    earlier run already reached.  ``first_gap`` is the politeness gap before
+    the first page; later pages wait 3-6 seconds.  ``progress['complete']`` is
+    set if the listing was read down to the watermark or its last post, rather
+    than giving up on the page budget or a failed page."""
+    progress = {} if progress is None else progress
+    progress['complete'] = False
+    after = None
+    for page in range(max_pages):
+        url = build_listing_url(subreddit, sort_type, limit, LISTING_MODE, after)
+        if not cached_session.is_fresh(url, 'listing'):
+            gap = first_gap if page == 0 else random.uniform(3, 6)
+            scheduler.wait_turn(url, gap, "to be respectful to Reddit's servers")
+        
+        posts = fetch_listing_page(url, subreddit)
+        if posts is None:
+            return
+        if not posts:
+            progress['complete'] = True
+            return
+        
+        for post in posts:
+            if post['is_mod'] or post['stickied']:
+                continue
+            if watermark and reached_watermark(post, watermark):
+                print(f"Reached posts seen by an earlier run of r/{subreddit}, stopping")
+                progress['complete'] = True
+                return
+            yield post
+        
+        # Reddit's cursor is simply the fullname of the last post on the page
+        after = posts[-1]['id']
+        if not after or len(posts) < limit:
+            progress['complete'] = True
+            return
+
+def process_post(post, filename, subreddit):
+    """Fetch the body of a listing post if needed, filter it and save it.
+    Returns True if the post was saved."""
+    title = post['title']
+    post_id = post['id']
+    
+    if SKIP_SEEN_POSTS and post_id and post_index.has_seen(post_id):
+        print(f"↷ Skipping post '{title}' - already {post_index.get_stage(post_id)} in an earlier run")
+        return False
+    if post_id in accepted_ids:
+        return False  # listed again on a later page
+    
+    post_content = post['content']
+    content_length = len(post_content) if post_content else 0
+    
+    # Only visit the permalink when the listing didn't carry the body
+    if post_content is None:
+        full_permalink = post['permalink']
+        if not full_permalink:
+            return False
+        # No need to be polite to Reddit when the page comes from our own cache
+        if not cached_session.is_fresh(full_permalink, 'permalink'):
+            scheduler.wait_turn(full_permalink, random.uniform(3, 6))
+        post_content, content_length = get_post_content(full_permalink)
+    
+    saved = bool(post_content) and content_length <= MAX_CHARS  # Using MAX_CHARS from config
+    # Only 'accepted' for now: whoever writes the post marks it saved (or degraded)
+    if post_id:
+        post_index.mark(post_id, 'accepted' if saved else 'skipped', subreddit, title)
+        if saved:
+            accepted_ids.add(post_id)
+    
+    if saved:
+        accepted = {'id': post_id, 'subreddit': subreddit, 'title': title, 'content': post_content}
+        if submit_post(accepted, filename):
+            print(f"✓ Queued post: '{title}' ({content_length} chars)")
+        else:
+            print(f"✓ Saved post: '{title}' ({content_length} chars)")
+    elif content_length > MAX_CHARS:
+        print(f"✗ Skipping post '{title}' - too long ({content_length} characters)")
+    else:
+        print(f"✗ Skipping post '{title}' - no content found")
+    return saved
+
+def submit_post(post, filename):
+    """Number an accepted post and hand it to the pipeline or the background worker,
+    or save it right away.  Returns True if it was queued."""
+    global posts_submitted
+    posts_submitted += 1
+    post = {**post, 'batch': Path(filename).stem, 'number': posts_submitted}
+    if pipeline is not None:
+        pipeline.submit(post)
+    elif BACKGROUND_PROCESSING:
+        pending_saves.append((processing_pool.submit(prepare_post, post), filename))
+        write_finished_posts()
+    else:
+        save_post_to_file(post, filename)
+        return False
+    return True
+
+def update_watermark(subreddit, watermark, checked, complete):
+    """Move the high-water mark of ``subreddit`` over the posts this run checked.
+    Posts below the point where a run stopped early haven't been looked at, so the
+    mark only passes them once a run has read all the way down to it."""
+    checked = [post for post in checked if post['id'] and post['created']]
+    if not checked:
+        return
+    if complete:
+        mark = max(checked, key=lambda post: post['created'])
+    elif watermark is None:
+        # A first run starts the mark at the last post it got to; nothing older is wanted
+        mark = min(checked, key=lambda post: post['created'])
+    else:
+        print(f"Stopped before the posts of the last run of r/{subreddit}; its high-water mark stays put")
+        return
+    post_index.set_watermark(subreddit, mark['id'], mark['created'])
+
+def process_subreddit(subreddit, filename, first_gap=0.0):
+    """Consume posts from the subreddit listing until POSTS_PER_SUBREDDIT are saved
+    or the MAX_PAGES page budget runs out"""
+    posts_processed = 0
+    posts_checked = 0
+    
+    # Incremental runs only look at posts newer than the last run's newest post
+    incremental = INCREMENTAL and SORT_TYPE == 'new'
+    watermark = post_index.get_watermark(subreddit) if incremental else None
+    progress = {}
+    checked = []  # the posts saved or skipped, newest first
+    failed = False
+    
+    for post in iter_listing_posts(subreddit, SORT_TYPE, POST_LIMIT, MAX_PAGES, watermark, first_gap, progress):
+        posts_checked += 1
+        try:
+            if process_post(post, filename, subreddit):
+                posts_processed += 1
+        except Exception as e:
+            print(f"Error parsing post: {e}")
+            failed = True
+            continue
+        checked.append(post)
+        
+        if posts_processed >= POSTS_PER_SUBREDDIT:
+            break
+    
+    # A post that failed wasn't checked, so the mark mustn't pass it
+    if incremental and not failed:
+        update_watermark(subreddit, watermark, checked, progress['complete'])
+    
+    print(f"Checked {posts_checked} posts, saved {posts_processed} posts under {MAX_CHARS} characters")
+
+def respectful_delay():
+    """Returns a respectful delay to leave between subreddits to avoid overloading servers
+    and to reduce the chance of being detected as a bot.  The scheduler waits it out
+    before the next listing request while queued posts keep being processed."""
+    # More randomized delay between 20-35 seconds
+    base_delay = random.uniform(20, 35)
+    
+    # Add small random noise to make the pattern less predictable
+    noise = random.uniform(-2, 2)
+    
+    # Ensure minimum delay is at least 18 seconds
+    total_delay = max(18, base_delay + noise)
+    
+    return total_delay
+
+def write_finished_posts(wait=False):
+    """Write the queued posts whose cleaning is done, oldest first, stopping at the
+    first one still being cleaned (or waiting for it, with ``wait``)"""
+    while pending_saves and (wait or pending_saves[0][0].done()):
+        future, filename = pending_saves.pop(0)
+        try:
+            finish_post(future.result(), filename)
+        except Exception as e:
+            print(f"Error saving post: {e}")
+
+def wait_for_pending_saves():
+    """Block until every queued post has been cleaned and written"""
+    write_finished_posts(wait=True)
+
+def scrape_with_delays(subreddit_names, filename):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ai_status = f"AI Cleaning: {'ENABLED (Groq)' if USE_AI_CLEANING else 'DISABLED'}"
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(f"REDDIT SCRAPER LOG - Started: {timestamp}\n")
+        f.write(f"Subreddits: {subreddits}\n")
+        f.write(f"Filter: Posts under {MAX_CHARS} characters\n")
+        f.write(f"{ai_status}\n")
+    
+    retry_degraded_posts(filename)
+    
+    print("Establishing session...")
+    home_url = 'https://old.reddit.com/'
+    scheduler.wait_turn(home_url, 0)
+    home_response = session.get(home_url, headers=get_random_headers())
+    print(f"Homepage status: {home_response.status_code}")
+    
+    gap = random.uniform(3, 7)
+    for i, subreddit in enumerate(subreddit_names):
+        process_subreddit(subreddit, filename, first_gap=gap)
+        
+        # Only wait if this isn't the last subreddit
+        if i < len(subreddit_names) - 1:
+            gap = respectful_delay()
+        else:
+            print("All subreddits processed. Moving on...")
+    
+    if pending_saves:
+        print(f"Waiting for {len(pending_saves)} queued post(s) to finish processing...")
+    wait_for_pending_saves()
+    print(f"Spent {scheduler.waited:.1f} seconds waiting between requests to Reddit")
+
+def build_listing_url(subreddit, sort_type='new', limit=25, listing_mode='html', after=None):
+    """URL of one listing page, starting after the post with fullname ``after``"""
+    if listing_mode == 'json':
+        # raw_json=1 stops Reddit from HTML-escaping the selftext
+        url = f'https://old.reddit.com/r/{subreddit}/{sort_type}/.json?limit={limit}&raw_json=1'
+    else:
+        url = f'https://old.reddit.com/r/{subreddit}/{sort_type}/?limit={limit}'
+    if after:
+        url += f'&after={after}'
+    return url
+
+# Function to generate Reddit URLs for the given subreddits
+def generate_reddit_urls(subreddits, sort_type='new', limit=25, listing_mode='html'):
+    return [build_listing_url(subreddit, sort_type, limit, listing_mode) for subreddit in subreddits]
+
+# --------------------------------------------------------------------------- #
+# Pipeline mode: every post flows through clean → metadata → tts → subtitles
+# on its own while later posts are still being scraped
+# --------------------------------------------------------------------------- #
+DEFAULT_PIPELINE_WORKERS = {'clean': 2, 'metadata': 2, 'tts': 3, 'subtitles': 1}
+
+def build_pipeline(filename):
+    """Create the stages for pipeline mode, writing the post log to ``filename``"""
+    def save_metadata(post):
+        if post.get('degraded'):
+            record_degraded(post)
+            return None  # nothing to voice until a later run has cleaned it
+        write_post(add_youtube_content(post), filename)
+        return mark_saved(record_post(post))
+    
+    audio_folder = ROOT_DIR / voice_over.OUTPUT_FOLDER
+    def clean(post):
+        if STREAM_CLEANING and USE_AI_CLEANING and AUTO_GENERATE_AUDIO:
+            return stream_clean_and_speak(post, audio_folder)
+        return clean_post(post)
+    
+    stages = [
+        Stage('clean', clean),
+        Stage('metadata', save_metadata),
+    ]
+    
+    if AUTO_GENERATE_AUDIO:
+        audio_folder.mkdir(exist_ok=True)
+        
+        def synthesize(post):
+            record = post['record']
+            if post.get('audio_file'):
+                # Already voiced while the AI was cleaning it
+                record['audio_path'] = post['audio_file']
+                post_store.update(record['id'], audio_path=record['audio_path'])
+                print(f"✓ Streamed audio saved to: {record['audio_path']}")
+                if post['id']:
+                    post_index.mark(post['id'], 'audio')
+                return post
+            print(f"🎙️ Converting post {record['number']} with {voice_over.voice_for(record['gender'])}: {record['title'][:50]}...")
+            # Each worker thread runs its own event loop for the edge-tts coroutine, kept
+            # between posts so the TTS session's connections are reused
+            output_file = voice_over.run(voice_over.convert_post(record, audio_folder, post_store, TTS_RETRIES))
+            print(f"✓ Saved to: {output_file}")
+            if post['id']:
+                post_index.mark(post['id'], 'audio')
+            return post
+        
+        def make_subtitles(post):
+            srt_path = subtitles.subtitle_post(post['record'], subtitles.OUT_FOLDER, post_store)
+            print(f"✅ SRT written to: {srt_path}")
+            if post['id']:
+                post_index.mark(post['id'], 'subtitles')
+            return post
+        
+        stages.append(Stage('tts', synthesize))
+        stages.append(Stage('subtitles', make_subtitles))
+    
+    # Cleaning is bound by Groq, so it gets as many workers as requests may be in flight
+    workers = {**DEFAULT_PIPELINE_WORKERS, 'clean': LLM_MAX_IN_FLIGHT, **PIPELINE_WORKERS}
+    for stage in stages:
+        stage.workers = max(1, workers.get(stage.name, 1))
+        stage.queue.maxsize = PIPELINE_QUEUE_SIZE
+    return Pipeline(stages)
+
+def generate_audio_and_subtitles():
+    """Voice the posts waiting in the post store, then subtitle them (the non-pipeline path).
+    Returns where the text logs were archived to (see voice_over.archive_logs)."""
+    print(f"\n{'='*80}")
+    print("🎙️ Starting automatic audio generation...")
+    print(f"{'='*80}\n")
+    
+    try:
+        # Rooted at the project folder, so the result doesn't depend on the working directory
+        archived = voice_over.generate_audio(post_store, ROOT_DIR / voice_over.OUTPUT_FOLDER,
+                                             ROOT_DIR / OUTPUT_FOLDER, ROOT_DIR / voice_over.ARCHIVE_FOLDER,
+                                             TTS_PARALLEL, TTS_RETRIES)
+        print(f"\n{'='*80}")
+        print("✅ Audio generation complete!")
+        print(f"{'='*80}")
+    except Exception as e:
+        print(f"\n❌ Error generating audio: {e}")
+        return {}
+    
+    # Now generate subtitles
+    print(f"\n{'='*80}")
+    print("📝 Starting subtitle generation...")
+    print(f"{'='*80}\n")
+    
+    try:
+        subtitles.generate_subtitles(post_store)
+        print(f"\n{'='*80}")
+        print("✅ Subtitle generation complete!")
+        print(f"{'='*80}")
+    except Exception as e:
+        print(f"\n❌ Unexpected error with subtitles: {e}")
+    return archived
+
+def run(config=None):
+    """Scrape the configured subreddits once and return the path of the post log,
+    where it ended up (old-posts/ once its posts were voiced)"""
+    global GROQ_API_KEY, USE_AI_CLEANING, llm_cache, llm_client, router, session, cached_session, post_index, post_store, scheduler
+    global processing_pool, pipeline, posts_submitted
+    import requests
+    
+    if config is not None:
+        configure(config)
+    
+    GROQ_API_KEY = load_api_key()
+    # Replaying recorded responses needs no key, so the full AI path can run offline;
+    # other backends can stand in for Groq
+    if not GROQ_API_KEY and not LLM_BACKENDS and not (USE_LLM_CACHE and LLM_CACHE_MODE == 'replay'):
+        print("⚠ Warning: No API key found. Please create 'api_key.txt' with your Groq API key or set GROQ_API_KEY environment variable.")
+        print("AI cleaning will be disabled.")
+        USE_AI_CLEANING = False
+    
+    session = requests.Session()
+    llm_cache = LLMCache(
+        path=LLM_CACHE_PATH or DEFAULT_LLM_CACHE_PATH,
+        ttl=LLM_CACHE_TTL,
+        max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+        mode=LLM_CACHE_MODE,
+        enabled=USE_LLM_CACHE and USE_AI_CLEANING,
+    )
+    budget = None
+    # The quotas are Groq's; the other backends aren't paced or charged by it
+    if USE_LLM_BUDGET and USE_AI_CLEANING and GROQ_API_KEY:
+        budget = TokenBudget(
+            requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+            requests_per_day=LLM_REQUESTS_PER_DAY,
+            tokens_per_day=LLM_TOKENS_PER_DAY,
+            metadata_reserve=LLM_METADATA_RESERVE,
+        )
+    router = ModelRouter(FAST_GROQ_MODEL, LARGE_GROQ_MODEL, heavy_noise=HEAVY_NOISE, enabled=MODEL_ROUTING,
+                         budget=budget)
+    client_options = {'max_in_flight': LLM_MAX_IN_FLIGHT, 'max_retries': LLM_MAX_RETRIES, 'timeout': LLM_TIMEOUT,
+                      'failure_threshold': CIRCUIT_FAILURES, 'cooldown': CIRCUIT_COOLDOWN,
+                      'adaptive_timeout': ADAPTIVE_TIMEOUTS}
+    groq_client = GroqClient(GROQ_API_KEY, budget=budget, **client_options) if GROQ_API_KEY else None
+    llm_client = build_pool(groq_client, LLM_BACKENDS, hedge=LLM_HEDGE, hedge_after=LLM_HEDGE_AFTER,
+                            client_options=client_options)
+    cached_session = CachedSession(
+        session,
+        ttls={'listing': CACHE_TTL_LISTING, 'permalink': CACHE_TTL_PERMALINK},
+        max_bytes=CACHE_MAX_MB * 1024 * 1024,
+        enabled=USE_HTTP_CACHE,
+    )
+    voice_over.tts_breaker = CircuitBreaker("Edge TTS", CIRCUIT_FAILURES, CIRCUIT_COOLDOWN, min_timeout=15.0,
+                                            max_timeout=TTS_TIMEOUT, adaptive=ADAPTIVE_TIMEOUTS)
+    voice_over.CHUNKED = TTS_CHUNKED
+    voice_over.WORD_TIMINGS = TTS_WORD_TIMINGS
+    voice_over.tts_session = TTSSession(keep_alive=TTS_KEEP_ALIVE)
+    post_index = PostIndex()
+    post_store = PostStore()
+    scheduler = HostScheduler()
+    # Posts are cleaned concurrently, up to the number of Groq requests allowed in flight;
+    # the scraping thread still writes them in order (see write_finished_posts)
+    processing_pool = ThreadPoolExecutor(max_workers=max(1, LLM_MAX_IN_FLIGHT) if USE_AI_CLEANING else 1)
+    pending_saves.clear()
+    degraded_posts.clear()
+    accepted_ids.clear()
+    pipeline = None
+    posts_submitted = 0
+    
+    # Create get-audio folder if it doesn't exist (in root directory).
+    # In pipeline mode the posts are voiced as they go, so the log goes straight to the archive.
+    output_dir = ROOT_DIR / ("old-posts" if USE_PIPELINE else OUTPUT_FOLDER)
+    output_dir.mkdir(exist_ok=True)
+    
+    output_filename = os.path.join(output_dir, f"reddit_posts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+    
+    print(f"Starting scraper... Posts will be saved to: {output_filename}")
+    print(f"AI Cleaning: {'ENABLED (Groq)' if USE_AI_CLEANING else 'DISABLED'}")
+    print(f"Max character limit: {MAX_CHARS} characters")
+    
+    try:
+        if USE_PIPELINE:
+            pipeline = build_pipeline(output_filename).start()
+        
+        scrape_with_delays(subreddits, output_filename)
+        
+        print(f"\nScraping complete! Check '{output_filename}' for saved posts.")
+        print(cached_session.summary())
+        print(llm_cache.summary())
+        
+        if pipeline is not None:
+            print("Waiting for the pipeline to finish the queued posts...")
+            pipeline.close()
+            voice_over.shutdown()
+            print(pipeline.summary())
+            if AUTO_GENERATE_AUDIO:
+                print(voice_over.audio_store.summary())
+                print(voice_over.tts_session.summary())
+            if AUTO_GENERATE_AUDIO and (TTS_CHUNKED or STREAM_CLEANING):
+                print(voice_over.chunk_cache.summary())
+        
+        if USE_AI_CLEANING:
+            print(router.summary())
+            print(llm_client.summary())
+            if budget is not None and groq_client.metrics:
+                print(budget.summary())  # only Groq's requests are counted in it
+        if degraded_posts:
+            print(f"🔁 {len(degraded_posts)} post(s) left uncleaned while the AI was unavailable; "
+                  f"the next run cleans them: {', '.join(title[:40] for title in degraded_posts)}")
+        if pipeline is not None and voice_over.tts_breaker.troubled():
+            print(voice_over.tts_breaker.summary())
+            print(f"💡 Posts without audio stay queued: run 'python3 src/voice-over.py' to voice them")
+        
+        # Automatically voice and subtitle the posts if enabled (the pipeline already did)
+        if pipeline is None and AUTO_GENERATE_AUDIO:
+            archived = generate_audio_and_subtitles()
+            output_filename = archived.get(os.path.abspath(output_filename), output_filename)
+        elif pipeline is None:
+            print(f"\n💡 Tip: Run 'python3 src/voice-over.py' to convert posts to audio!")
+            print(f"   Then run 'python3 src/create-subtitles.py' to generate subtitles.")
+    finally:
+        processing_pool.shutdown()
+        cached_session.close()
+        llm_cache.close()
+        llm_client.close()
+        if budget is not None:
+            budget.close()
+        post_index.close()
+        post_store.close()
+    
+    return output_filename
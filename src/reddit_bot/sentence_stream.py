@@ -0,0 +1,106 @@
+"""
+Turns a streamed cleaning reply into finished sentences
+
+*   The <<MALE>>/<<FEMALE>> tag the cleaning prompt asks for comes first, so
+    the speaker's gender (and with it the voice) is known after the first
+    few tokens, before any sentence is handed on
+*   A sentence is handed on as soon as the text after it shows it has ended:
+    a line break, or . ! ? followed by whitespace
+*   Very short sentences are joined to the next one on the same line, so TTS
+    isn't called for every "Yes."
+"""
+
+from __future__ import annotations
+
+import re
+
+GENDER_TAG = re.compile(r"<<(MALE|FEMALE)>>")
+# End of a sentence: punctuation (and closing quotes/brackets) followed by whitespace
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+TAGS = ("<<MALE>>", "<<FEMALE>>")
+
+
+class SentenceSplitter:
+    """Feed it the pieces of a streamed reply; it returns the sentences they complete"""
+
+    def __init__(self, gender: str = "", min_chars: int = 20):
+        self.gender = gender  # '' until the reply's tag has been seen (or was known beforehand)
+        self.min_chars = min_chars
+        self.tag_checked = bool(gender)
+        self.buffer = ""  # text not yet handed on
+        self.text_parts = []  # everything handed on, tags removed
+        self.finished = False
+
+    def feed(self, piece: str) -> list[str]:
+        self.buffer += piece
+        if not self.tag_checked and not self._check_tag():
+            return []
+        return self._split(final=False)
+
+    def flush(self) -> list[str]:
+        """The sentences left once the reply is complete"""
+        self.tag_checked = True
+        self.buffer = GENDER_TAG.sub("", self.buffer)
+        sentences = self._split(final=True)
+        self.finished = True
+        return sentences
+
+    def sentences(self, pieces):
+        """Generator over the sentences of a stream of reply pieces"""
+        for piece in pieces:
+            yield from self.feed(piece)
+        yield from self.flush()
+
+    def text(self) -> str:
+        """The whole reply as the scraper saves it: gender tag, title line, body lines"""
+        body = "".join(self.text_parts).strip()
+        return f"<<{(self.gender or 'male').upper()}>> {body}"
+
+    # ------------------------------------------------------------------
+    def _check_tag(self) -> bool:
+        """Look for the gender tag at the start of the reply; False while it may still be arriving"""
+        start = self.buffer.lstrip()
+        match = GENDER_TAG.match(start)
+        if match:
+            self.gender = match.group(1).lower()
+            self.buffer = start[match.end():]
+        elif any(tag.startswith(start) for tag in TAGS):
+            return False  # nothing yet, or the first part of a tag
+        self.tag_checked = True
+        return True
+
+    def _split(self, final: bool) -> list[str]:
+        self.buffer = GENDER_TAG.sub("", self.buffer)
+        sentences = []
+        start = pos = 0  # start of the text not handed on yet, end of the text scanned
+        while True:
+            line_end = self.buffer.find("\n", pos)
+            match = SENTENCE_END.search(self.buffer, pos)
+            if match and (line_end < 0 or match.start() < line_end):
+                pos, ends_line = match.end(), "\n" in match.group(0)
+            elif line_end >= 0:
+                pos, ends_line = line_end + 1, True
+            else:
+                break
+            sentence = self.buffer[start:pos]
+            # Hold short sentences back to join them with the next one on the line
+            if ends_line or len(sentence.strip()) >= self.min_chars:
+                self.text_parts.append(sentence)
+                if sentence.strip():
+                    sentences.append(sentence.strip())
+                start = pos
+        rest, self.buffer = self.buffer[start:], ""
+        if final:
+            self.text_parts.append(rest)
+            if rest.strip():
+                sentences.append(rest.strip())
+        else:
+            self.buffer = rest
+        return sentences
+
+
+def split_sentences(text: str, min_chars: int = 20) -> list[str]:
+    """The sentences of a finished text, split the way a streamed reply is"""
+    splitter = SentenceSplitter(min_chars=min_chars)
+    splitter.tag_checked = True  # a finished text has no tag to wait for
+    return list(splitter.sentences([text]))
@@ -0,0 +1,344 @@
+"""
+Turn saved posts into .srt subtitle files
+
+*   Posts are read from the post store (see post_store.py) and each record
+    gets its srt_path filled in
+*   Timestamps are generated locally, so no Groq key is needed: each cue
+    starts when its first word is spoken, from the word timing file saved
+    next to the post's audio (see word_timings.py), or every 5 s when the
+    audio has none
+*   pysrt is only imported when the first subtitle file is built
+*   Folders are only created when subtitles are generated, not on import
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .paths import ROOT_DIR
+from .post_store import PostStore, split_title_and_body
+from .word_timings import Word, read_timings
+
+# Create subtitles folder in root directory
+OUT_FOLDER = ROOT_DIR / "subtitles"  # folder to write .srt files
+
+# Maximum characters per subtitle line (standard subtitle recommendation)
+MAX_CHARS_PER_SUBTITLE = 42
+
+# Cue length when there are no word timings
+FIXED_INTERVAL = 5.0
+
+# Share of letters the timed words and the subtitle text may differ by
+# before the timings are taken to be of some other text
+MAX_TEXT_MISMATCH = 0.05
+
+# --------------------------------------------------------------------------- #
+# 1️⃣  Helpers
+# --------------------------------------------------------------------------- #
+def _unique_srt_path(path: Path) -> Path:
+    """Return a Path that does not yet exist by appending ``_001`` etc."""
+    if not path.exists():
+        return path
+
+    stem, suffix = path.stem, path.suffix
+    counter = 1
+    while True:
+        candidate = path.with_name(f"{stem}_{counter:03d}{suffix}")
+        if not candidate.exists():
+            return candidate
+        counter += 1
+
+
+def _letters(text: str) -> int:
+    """Letters and digits in ``text``, which the spoken words and the blocks have in common"""
+    return sum(ch.isalnum() for ch in text)
+
+# --------------------------------------------------------------------------- #
+# 2️⃣  Main function
+# --------------------------------------------------------------------------- #
+def clean_transcript_text(text):
+    """Clean transcript text before sending to LLM.
+    Removes header lines, markers, etc."""
+    # Split into lines
+    lines = text.strip().split('\n')
+    cleaned_lines = []
+    skip_section = False
+    
+    # Define patterns to identify and remove
+    header_patterns = ["REDDIT SCRAPER LOG", "Subreddits:", "Filter:", "AI Cleaning:"]
+    section_markers = ["---POST_SEPARATOR---", "---HASHTAGS---", "---SHORTS_TITLES---", "---SHORTS_DESCRIPTION---"]
+    
+    for line in lines:
+        # Skip header lines
+        if any(pattern in line for pattern in header_patterns):
+            continue
+            
+        # Skip section marker lines
+        if any(marker in line for marker in section_markers):
+            skip_section = True
+            continue
+            
+        # Reset skip flag on empty line after a marker
+        if skip_section and not line.strip():
+            skip_section = False
+            continue
+            
+        # Skip lines while in a marker section
+        if skip_section:
+            continue
+            
+        # Skip gender tags
+        if line.strip().startswith("<<") and line.strip().endswith(">>"):
+            continue
+            
+        # Skip hashtags
+        if line.strip().startswith("#"):
+            continue
+            
+        # Add clean lines
+        if line.strip():
+            cleaned_lines.append(line)
+    
+    return '\n'.join(cleaned_lines)
+
+
+def subtitle_blocks(title: Optional[str], content_lines: List[str]) -> List[str]:
+    """Lay out a title and content lines as subtitle blocks of at most
+    MAX_CHARS_PER_SUBTITLE characters, splitting at spaces where possible."""
+    max_chars_per_subtitle = MAX_CHARS_PER_SUBTITLE
+    blocks = []
+
+    # First add the title if it exists
+    if title:
+        # Split title into parts if it's too long
+        if len(title) > max_chars_per_subtitle:
+            # Try to split at a sensible point
+            mid_point = title[:max_chars_per_subtitle].rfind(' ')
+            if mid_point == -1:  # No space found
+                mid_point = max_chars_per_subtitle
+                
+            blocks.append(title[:mid_point])
+            blocks.append(title[mid_point:].strip())
+        else:
+            blocks.append(title)
+    
+    # Now add content lines, splitting only if they're too long
+    for line in content_lines:
+        if not line.strip():
+            continue
+            
+        # If the line is short enough, keep it as is
+        if len(line) <= max_chars_per_subtitle:
+            blocks.append(line)
+        else:
+            # Split long lines, preferably at spaces
+            current_pos = 0
+            while current_pos < len(line):
+                # Find a good breaking point near max_chars
+                if current_pos + max_chars_per_subtitle >= len(line):
+                    # This is the last piece
+                    blocks.append(line[current_pos:])
+                    break
+                    
+                # Try to find a space to break at
+                break_pos = line[current_pos:current_pos + max_chars_per_subtitle].rfind(' ')
+                if break_pos == -1:  # No space found
+                    break_pos = max_chars_per_subtitle
+                
+                blocks.append(line[current_pos:current_pos + break_pos])
+                current_pos += break_pos + 1  # +1 to skip the space
+
+    # Clean blocks (strip, remove empties)
+    return [b.strip() for b in blocks if b.strip()]
+
+
+def cue_times(blocks: List[str], words: List[Word]) -> Optional[List[Tuple[float, float]]]:
+    """(start, end) in seconds of each block, from the word timings of its audio.
+
+    Words are handed out to the blocks in order by their letters, since
+    Edge TTS reports words without their punctuation.  Each cue lasts until
+    the next one starts.  Returns None when the words don't spell the blocks'
+    text, e.g. because the post was edited after it was voiced."""
+    needed = sum(_letters(block) for block in blocks)
+    spoken = sum(_letters(text) for _, _, text in words)
+    if not spoken or abs(spoken - needed) > needed * MAX_TEXT_MISMATCH:
+        return None
+
+    times = []
+    i = 0
+    for block in blocks:
+        first, found = i, 0
+        while i < len(words) and found < _letters(block):
+            found += _letters(words[i][2])
+            i += 1
+        if i == first:
+            # Nothing left to say (or nothing sayable in the block)
+            start = times[-1][1] if times else 0.0
+            times.append((start, start))
+            continue
+        offset, duration, _ = words[i - 1]
+        times.append((words[first][0], offset + duration))
+
+    return [(start, max(end, times[n + 1][0]) if n + 1 < len(times) else end)
+            for n, (start, end) in enumerate(times)]
+
+
+def write_srt(blocks: List[str], out_path: Path, times: Optional[List[Tuple[float, float]]] = None) -> Path:
+    """Write ``blocks`` as subtitles to ``out_path`` (or a ``_001`` variant if
+    it exists) and return the path written.  ``times`` are the (start, end)
+    seconds of the blocks, as from cue_times(); without them each block is
+    shown for FIXED_INTERVAL seconds."""
+    import pysrt
+
+    if times is None:
+        times = [(n * FIXED_INTERVAL, (n + 1) * FIXED_INTERVAL) for n in range(len(blocks))]
+
+    subs = pysrt.SubRipFile()
+    for idx, (block, (start, end)) in enumerate(zip(blocks, times), start=1):
+        subs.append(
+            pysrt.SubRipItem(
+                index=idx,
+                start=pysrt.SubRipTime(seconds=start),
+                end=pysrt.SubRipTime(seconds=end),
+                text=block,
+            )
+        )
+
+    # Ensure we don't overwrite
+    final_path = _unique_srt_path(out_path)
+
+    # `pysrt` has a dedicated `save()` method which is more robust
+    subs.save(str(final_path), encoding="utf-8")
+
+    return final_path
+
+
+def timed_blocks(blocks: List[str], audio_path: Optional[Union[str, Path]]) -> Optional[List[Tuple[float, float]]]:
+    """cue_times() of ``blocks`` from the timing file of ``audio_path``, or None if there is none that fits"""
+    words = read_timings(audio_path) if audio_path else None
+    if words is None:
+        return None
+    times = cue_times(blocks, words)
+    if times is None:
+        print(f"⚠ The word timings of {Path(audio_path).name} don't match the text, using {FIXED_INTERVAL:g}s cues")
+    return times
+
+
+def llm_chunked_srt(
+    txt_path: Union[str, Path],
+    out_folder: Optional[Union[str, Path]] = None,
+    *,
+    model: str = "llama-3.1-8b-instant",
+    temperature: float = 0.2,
+    max_tokens: int = 1200,   # more generous default
+    audio_path: Optional[Union[str, Path]] = None,
+) -> Path:
+    """Convert a plain‑text transcript to an SRT file.
+
+    The LLM produces *plain* subtitle lines (one per line); timestamps are
+    generated locally, from the word timings saved next to ``audio_path``
+    when it is given and has them, otherwise at ~5 s per line.  The resulting file is written to
+    ``<txt_path>.srt`` inside ``out_folder`` (or the same directory as the
+    transcript if ``out_folder`` is ``None``).  If the file already exists,
+    a ``_001`` suffix is appended.
+    """
+    txt_path = Path(txt_path).expanduser().resolve()
+
+    # ---- 1️⃣  Validate input file ---------------------------------------
+    if not txt_path.is_file():
+        raise FileNotFoundError(f"No transcript found at {txt_path}")
+
+    # ---- 2️⃣  Destination path ------------------------------------------
+    out_path = txt_path.with_suffix(".srt")
+    if out_folder is not None:
+        folder = Path(out_folder).expanduser().resolve()
+        folder.mkdir(parents=True, exist_ok=True)
+        out_path = folder / out_path.name
+
+    # ---- 3️⃣  Ask the LLM to chunk --------------------------------------
+    raw_transcript = txt_path.read_text(encoding="utf-8")
+    # Clean the transcript before sending to LLM
+    transcript = clean_transcript_text(raw_transcript)
+
+    # Split the transcript into lines first, to preserve exact formatting
+    lines = transcript.split('\n')
+    
+    # Process title separately to ensure it's shown first
+    title = None
+    content_lines = []
+    
+    for i, line in enumerate(lines):
+        if i == 0 and line.startswith('Title:'):
+            # Remove the "Title: " prefix
+            title = line.replace("Title: ", "", 1)
+        elif line.strip():  # Only keep non-empty lines
+            content_lines.append(line)
+
+    # ---- 4️⃣  Build the blocks -------------------------------------------
+    blocks = subtitle_blocks(title, content_lines)
+    if not blocks:
+        raise ValueError("No subtitle blocks could be generated from the transcript.")
+
+    # ---- 5️⃣  Write the SRT ---------------------------------------------
+    return write_srt(blocks, out_path, timed_blocks(blocks, audio_path))
+
+# --------------------------------------------------------------------------- #
+# 3️⃣  Post store entry points
+# --------------------------------------------------------------------------- #
+def subtitle_post(record: dict, out_folder: Union[str, Path] = OUT_FOLDER, store: Optional[PostStore] = None) -> Path:
+    """Write the subtitles of one post record and return the path (also saved to ``store``)"""
+    title, content_lines = split_title_and_body(record["cleaned_text"])
+    blocks = subtitle_blocks(title, content_lines)
+    if not blocks:
+        raise ValueError("No subtitle blocks could be generated from the post.")
+
+    folder = Path(out_folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    times = timed_blocks(blocks, record.get("audio_path"))
+    path = write_srt(blocks, folder / f"{record['batch']}_block_{record['number']}.srt", times)
+    record["srt_path"] = str(path)
+    if store is not None:
+        store.update(record["id"], srt_path=record["srt_path"])
+    return path
+
+
+def generate_subtitles(store: Optional[PostStore] = None, out_folder: Union[str, Path] = OUT_FOLDER) -> List[Path]:
+    """Write an .srt file for every post in ``store`` that has none yet and
+    return the paths written.  Opens the default post store when ``store`` is None."""
+    own_store = store is None
+    if own_store:
+        store = PostStore()
+    try:
+        records = store.pending("subtitles")
+        written = []
+
+        print("\nGenerating subtitle files...")
+        for record in records:
+            try:
+                print(f"Processing: {record['title'][:60]}")
+                result = subtitle_post(record, out_folder, store)
+                print(f"✅ SRT written to: {result}")
+                written.append(result)
+            except Exception as e:
+                print(f"❌ Error processing {record['id']}: {e}")
+
+        print(f"\n✅ Subtitle generation complete! Created {len(written)} out of {len(records)} subtitle files in '{out_folder}'.")
+        return written
+    finally:
+        if own_store:
+            store.close()
+
+
+def main() -> int:
+    """Subtitle every post waiting in the post store; returns an exit code"""
+    print(f"Root directory: {ROOT_DIR}")
+    print(f"Output folder: {OUT_FOLDER}")
+
+    store = PostStore()
+    try:
+        if not store.pending("subtitles"):
+            print("\n⚠️ Warning: No posts waiting for subtitles in the post store")
+            print("Run the scraper first to save some posts.")
+            return 1
+        generate_subtitles(store, OUT_FOLDER)
+    finally:
+        store.close()
+    return 0
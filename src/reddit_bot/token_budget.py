@@ -0,0 +1,232 @@
+"""
+Paces Groq requests against the per-minute and daily quotas
+
+*   Every request's tokens are estimated locally before it is sent (about four
+    characters per token, plus the completion it may produce)
+*   Requests and tokens are counted in a sliding one-minute window and per
+    day.  The estimate is replaced by the real usage once the reply arrives,
+    and Groq's x-ratelimit-* headers correct the counts when the key is also
+    used elsewhere
+*   A request that would overrun the minute window waits for room; cleaning
+    requests are let through before waiting metadata requests
+*   The last part of the daily token quota (``metadata_reserve``) is kept for
+    cleaning: once the day's usage reaches it, metadata requests are refused
+    with BudgetExceeded and the scraper stops combining cleaning and metadata
+    in one request
+*   Daily usage is kept in ``groq_usage.db`` so consecutive runs on the same
+    day share the quota
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from .paths import ROOT_DIR
+
+DEFAULT_USAGE_PATH = ROOT_DIR / "groq_usage.db"
+
+# Request priorities, most important first
+PRIORITIES = ("clean", "metadata")
+
+# Tokens the chat format adds around a single user message
+MESSAGE_OVERHEAD = 8
+
+
+class BudgetExceeded(RuntimeError):
+    """The daily quota has no room for a request of this priority"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of English text (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def estimate_request(prompt: str, max_tokens: int) -> int:
+    """Tokens a request is expected to use: the prompt, plus a reply about as long
+    as the prompt (cleaning echoes the post back), but never more than max_tokens"""
+    prompt_tokens = estimate_tokens(prompt) + MESSAGE_OVERHEAD
+    return prompt_tokens + min(max_tokens, prompt_tokens)
+
+
+def today() -> str:
+    # Groq's daily quotas are counted in UTC
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class TokenBudget:
+    """Admits, delays or refuses Groq requests to stay within the quotas.
+    A limit of 0 or None is not enforced."""
+
+    def __init__(self, requests_per_minute=30, tokens_per_minute=12000, requests_per_day=1000,
+                 tokens_per_day=100000, metadata_reserve=0.2, path=DEFAULT_USAGE_PATH):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_day = requests_per_day
+        self.tokens_per_day = tokens_per_day
+        self.metadata_reserve = metadata_reserve
+        self.lock = threading.Lock()
+        self.window = deque()  # [sent_at, tokens] of the requests sent in the last minute
+        self.waiting = {priority: 0 for priority in PRIORITIES}
+        self.counters = {"delayed": 0, "refused": 0, "waited": 0.0}
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS usage (
+                   day TEXT PRIMARY KEY,
+                   requests INTEGER NOT NULL,
+                   tokens INTEGER NOT NULL
+               )"""
+        )
+        self.conn.commit()
+        self.day = today()
+        row = self.conn.execute("SELECT requests, tokens FROM usage WHERE day = ?", (self.day,)).fetchone()
+        self.day_requests, self.day_tokens = row or (0, 0)
+        self.reserved_tokens = 0  # estimates of the requests still in flight
+        self.run_tokens = 0
+
+    async def acquire(self, estimate: int, priority: str = "clean") -> list:
+        """Wait until a request of ``estimate`` tokens fits the minute window and
+        reserve it.  Raises BudgetExceeded when the daily quota can't take it."""
+        with self.lock:
+            self.waiting[priority] += 1
+        started = time.monotonic()
+        delayed = False
+        try:
+            while True:
+                with self.lock:
+                    self._check_day(estimate, priority)
+                    delay = self._minute_delay(estimate, priority)
+                    if delay <= 0:
+                        reservation = [time.monotonic(), estimate]
+                        self.window.append(reservation)
+                        self.day_requests += 1
+                        self.reserved_tokens += estimate
+                        if delayed:
+                            self.counters["delayed"] += 1
+                            self.counters["waited"] += time.monotonic() - started
+                        return reservation
+                delayed = True
+                await asyncio.sleep(delay)
+        finally:
+            with self.lock:
+                self.waiting[priority] -= 1
+
+    def settle(self, reservation: list, usage: dict | None) -> None:
+        """Replace a reservation's estimate with the tokens the request really used"""
+        estimate = reservation[1]
+        used = (usage or {}).get("total_tokens", estimate)
+        with self.lock:
+            reservation[1] = used
+            self.reserved_tokens -= estimate
+            self.day_tokens += used
+            self.run_tokens += used
+            self._save_day()
+
+    def release(self, reservation: list) -> None:
+        """Give back the tokens of a request that failed (it still counts as a request)"""
+        with self.lock:
+            self.reserved_tokens -= reservation[1]
+            reservation[1] = 0
+            self._save_day()
+
+    def observe(self, headers) -> None:
+        """Align the counts with Groq's rate-limit headers.  On Groq, the request
+        headers describe the daily quota and the token headers the per-minute one."""
+        with self.lock:
+            limit = _int_header(headers, "x-ratelimit-limit-requests")
+            remaining = _int_header(headers, "x-ratelimit-remaining-requests")
+            if limit:
+                self.requests_per_day = limit
+            if remaining is not None and self.requests_per_day:
+                self.day_requests = max(self.day_requests, self.requests_per_day - remaining)
+
+            limit = _int_header(headers, "x-ratelimit-limit-tokens")
+            remaining = _int_header(headers, "x-ratelimit-remaining-tokens")
+            if limit:
+                self.tokens_per_minute = limit
+            if remaining is not None and self.tokens_per_minute:
+                unseen = self.tokens_per_minute - remaining - self._window_tokens(time.monotonic())
+                if unseen > 0:
+                    # Tokens spent by another client on the same key
+                    self.window.append([time.monotonic(), unseen])
+
+    def low(self) -> bool:
+        """True once the day's usage has reached the part of the quota kept for cleaning"""
+        if not self.tokens_per_day:
+            return False
+        with self.lock:
+            return self._day_tokens_left() <= self.tokens_per_day * self.metadata_reserve
+
+    def summary(self) -> str:
+        """One-line report of the budget used and left, for the end of a run"""
+        with self.lock:
+            parts = [f"{self.run_tokens} tokens used this run"]
+            if self.tokens_per_day:
+                parts.append(f"{max(0, self._day_tokens_left())}/{self.tokens_per_day} daily tokens left")
+            if self.requests_per_day:
+                parts.append(f"{max(0, self.requests_per_day - self.day_requests)}/{self.requests_per_day} daily requests left")
+            parts.append(f"{self.counters['delayed']} requests delayed ({self.counters['waited']:.1f}s)")
+            parts.append(f"{self.counters['refused']} refused")
+        return "Groq budget: " + ", ".join(parts)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    def _day_tokens_left(self):
+        return self.tokens_per_day - self.day_tokens - self.reserved_tokens
+
+    def _check_day(self, estimate, priority):
+        """Raise BudgetExceeded if the daily quota can't take the request (lock held)"""
+        if self.day != today():
+            # A new day: the daily quotas start over
+            self.day, self.day_requests, self.day_tokens = today(), 0, 0
+        reason = None
+        if self.requests_per_day and self.day_requests >= self.requests_per_day:
+            reason = f"all {self.requests_per_day} daily requests used"
+        elif self.tokens_per_day:
+            reserve = self.tokens_per_day * self.metadata_reserve if priority != "clean" else 0
+            if self._day_tokens_left() - estimate < reserve:
+                reason = (f"{self.day_tokens}/{self.tokens_per_day} daily tokens used"
+                          + (", the rest is kept for cleaning" if reserve else ""))
+        if reason:
+            self.counters["refused"] += 1
+            raise BudgetExceeded(f"Groq {priority} request refused: {reason}")
+
+    def _minute_delay(self, estimate, priority):
+        """Seconds until the minute window has room for the request; 0 if it has now (lock held)"""
+        now = time.monotonic()
+        while self.window and now - self.window[0][0] >= 60:
+            self.window.popleft()
+        # Metadata waits while any cleaning request is waiting
+        if any(self.waiting[p] for p in PRIORITIES[:PRIORITIES.index(priority)]):
+            return 0.2
+        if not self.window:
+            return 0  # a request larger than the whole minute quota still gets through alone
+        too_many = self.requests_per_minute and len(self.window) + 1 > self.requests_per_minute
+        too_large = self.tokens_per_minute and self._window_tokens(now) + estimate > self.tokens_per_minute
+        if not (too_many or too_large):
+            return 0
+        return max(0.05, self.window[0][0] + 60 - now)
+
+    def _window_tokens(self, now):
+        return sum(tokens for sent_at, tokens in self.window if now - sent_at < 60)
+
+    def _save_day(self):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO usage (day, requests, tokens) VALUES (?, ?, ?)",
+            (self.day, self.day_requests, self.day_tokens),
+        )
+        self.conn.commit()
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,75 @@
+"""
+Disk cache of synthesized speech chunks
+
+*   Every chunk of speech (a sentence, in chunked and streaming mode) is
+    stored as an MP3 file named after a hash of the voice, the speaking rate
+    and the text, so the same sentence in the same voice is only requested
+    from Edge TTS once
+*   Files are written under a temporary name and then renamed, so an
+    interrupted run never leaves a half-written chunk behind
+*   Hits and misses are counted for the run report
+
+The files live in ``tts_cache/`` in the project root, two hex digits of the
+hash per subfolder; deleting the folder just empties the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from .paths import ROOT_DIR
+
+DEFAULT_CACHE_FOLDER = ROOT_DIR / "tts_cache"
+
+
+def chunk_key(voice: str, rate: str, text: str) -> str:
+    """Hash identifying the speech of ``text`` in ``voice`` at ``rate``"""
+    return hashlib.sha256(json.dumps([voice, rate, text]).encode("utf-8")).hexdigest()
+
+
+class ChunkCache:
+    """MP3 chunks on disk, keyed by chunk_key()"""
+
+    def __init__(self, folder: str | Path = DEFAULT_CACHE_FOLDER, enabled: bool = True):
+        self.folder = Path(folder)
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        return self.folder / key[:2] / f"{key}.mp3"
+
+    def get(self, voice: str, rate: str, text: str) -> bytes | None:
+        """The cached audio of ``text``, or None"""
+        if not self.enabled:
+            return None
+        try:
+            audio = self.path(chunk_key(voice, rate, text)).read_bytes()
+        except FileNotFoundError:
+            audio = None
+        with self.lock:
+            if audio:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return audio or None
+
+    def put(self, voice: str, rate: str, text: str, audio: bytes) -> None:
+        if not self.enabled or not audio:
+            return
+        path = self.path(chunk_key(voice, rate, text))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(audio)
+        os.replace(temporary, path)
+
+    def summary(self) -> str:
+        with self.lock:
+            total = self.hits + self.misses
+            share = self.hits / total if total else 0.0
+            return f"TTS chunk cache: {self.hits} hits, {self.misses} misses ({share:.0%} of chunks not re-synthesized)"
@@ -0,0 +1,349 @@
+"""
+Edge TTS connections kept open between synthesis jobs
+
+edge_tts.Communicate opens a new TLS websocket for every text it speaks, and
+for short texts (titles, the sentences of chunked and streaming mode) the
+handshake is a large share of the time.  The service accepts several
+synthesis turns on one websocket, so TTSSession keeps its connections:
+
+*   A job takes an idle connection when there is one that was used in the
+    last ``keep_alive`` seconds, and opens a new one otherwise; jobs running
+    at the same time each get their own
+*   A kept connection the service has closed in the meantime is replaced by
+    a fresh one and the job is sent again.  If kept connections keep turning
+    out closed, the session stops keeping them
+*   When the session can't speak to the service itself (an edge-tts version
+    whose helpers don't pass the check in edge_tts_protocol.py, a refused
+    handshake, a reply it doesn't understand), the job falls back to a plain
+    edge_tts.Communicate
+*   Handshakes, their time and the jobs run on a warm connection are counted
+    for the run report
+
+aiohttp objects belong to one event loop, so each loop gets its own
+connections; close() closes those of the running loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+from .word_timings import TICKS_PER_SECOND
+
+# Bits per second of the MP3s Edge TTS sends (audio-24khz-48kbitrate-mono-mp3), for
+# the offsets of word boundaries in texts spoken over several turns
+MP3_BITRATE = 48_000
+
+# Texts are sent in parts of at most this many bytes, as edge_tts does
+MAX_TURN_BYTES = 4096
+
+# Kept connections found closed in a row, with none reused successfully, before
+# the service is taken not to allow reuse
+MAX_STALE = 3
+
+
+class _Stale(Exception):
+    """A kept connection turned out to be closed before the service answered"""
+
+
+class _Connection:
+    def __init__(self, websocket, boundary):
+        self.websocket = websocket
+        self.boundary = boundary
+        self.last_used = time.monotonic()
+        self.reused = False
+
+    async def close(self):
+        if not self.websocket.closed:
+            await self.websocket.close()
+
+
+class _Pool:
+    """The connections of one event loop"""
+
+    def __init__(self, connect_timeout):
+        import aiohttp
+
+        self.http = aiohttp.ClientSession(trust_env=True,
+                                          timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout))
+        self.idle = []
+
+
+class TTSSession:
+    """Speaks texts with Edge TTS over websockets that are reused from job to job"""
+
+    def __init__(self, keep_alive=20.0, connect_timeout=10, receive_timeout=60, url=None):
+        self.keep_alive = keep_alive  # seconds an idle connection is kept; 0 opens one per job
+        self.connect_timeout = connect_timeout
+        self.receive_timeout = receive_timeout
+        self.url = url  # the service's websocket URL, edge_tts's by default
+        self.lock = threading.Lock()
+        self.pools = {}  # event loop -> _Pool
+        self.protocol = None  # edge_tts's helpers, once imported
+        self.disabled = False  # set when the session has to leave every job to Communicate
+        self.stale_in_a_row = 0
+        self.jobs = 0
+        self.reused = 0
+        self.opened = 0
+        self.handshake_seconds = 0.0
+        self.stale = 0
+        self.fallbacks = 0
+
+    async def stream(self, text, voice, rate="+0%", boundary="SentenceBoundary"):
+        """Like edge_tts.Communicate(text, voice, rate=rate, boundary=boundary).stream():
+        yields {"type": "audio", "data"} and boundary chunks with offsets in ticks"""
+        self._count("jobs")
+        if self.disabled or not self._load_protocol():
+            async for chunk in self._fallback(text, voice, rate, boundary):
+                yield chunk
+            return
+
+        protocol = self.protocol
+        config = protocol["TTSConfig"](voice, rate, "+0%", "+0Hz", boundary)
+        texts = list(protocol["split_text_by_byte_length"](
+            protocol["escape"](protocol["remove_incompatible_characters"](text)), MAX_TURN_BYTES))
+        pool = self._pool()
+        answered = False
+        for fresh in (False, True):
+            try:
+                connection = await self._acquire(pool, boundary, fresh)
+            except protocol["WSServerHandshakeError"] as e:
+                if e.status >= 500:
+                    raise  # the service is failing, not refusing the session
+                print(f"⚠ Edge TTS refused a kept-alive session ({e.status}), using a connection per job")
+                self.disabled = True
+                break
+            try:
+                async for chunk in self._speak(connection, config, texts):
+                    answered = True
+                    yield chunk
+            except _Stale:
+                await connection.close()
+                self._stale()
+                continue
+            except (protocol["UnknownResponse"], protocol["UnexpectedResponse"]) as e:
+                await connection.close()
+                if answered:
+                    raise
+                print(f"⚠ Edge TTS session got an unexpected reply ({e}), using a connection per job")
+                self.disabled = True
+                break
+            except BaseException:
+                # Cancelled or failed halfway through a turn: the connection's state is unknown
+                await connection.close()
+                raise
+            await self._release(pool, connection)
+            return
+        async for chunk in self._fallback(text, voice, rate, boundary):
+            yield chunk
+
+    async def close(self):
+        """Close the connections of the running event loop"""
+        with self.lock:
+            pool = self.pools.pop(asyncio.get_running_loop(), None)
+        if pool is None:
+            return
+        for connection in pool.idle:
+            await connection.close()
+        await pool.http.close()
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "jobs": self.jobs,
+                "reused": self.reused,
+                "handshakes": self.opened,
+                "handshake_seconds": self.handshake_seconds,
+                "stale": self.stale,
+                "fallbacks": self.fallbacks,
+            }
+
+    def summary(self):
+        m = self.metrics()
+        average = m["handshake_seconds"] / m["handshakes"] if m["handshakes"] else 0.0
+        line = (f"TTS session: {m['jobs']} jobs, {m['reused']} on a warm connection, "
+                f"{m['handshakes']} handshakes averaging {average:.2f}s")
+        if m["reused"] and average:
+            line += f" (~{m['reused'] * average:.1f}s of handshakes saved)"
+        if m["stale"]:
+            line += f", {m['stale']} kept connection(s) found closed"
+        if m["fallbacks"]:
+            line += f", {m['fallbacks']} job(s) on a connection of their own"
+        return line
+
+    # ------------------------------------------------------------------
+    def _count(self, name, amount=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _load_protocol(self):
+        """edge_tts's helpers for speaking over a websocket of our own; False if this version lacks them"""
+        if self.protocol is not None:
+            return True
+        from . import edge_tts_protocol
+
+        if edge_tts_protocol.PROTOCOL is None:
+            with self.lock:
+                warn, self.disabled = not self.disabled, True
+            if warn:
+                print(f"⚠ This edge-tts version can't keep TTS connections open ({edge_tts_protocol.PROBLEM}), "
+                      f"using a connection per job")
+            return False
+        self.protocol = edge_tts_protocol.PROTOCOL
+        return True
+
+    def _pool(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            pool = self.pools.get(loop)
+            if pool is None:
+                pool = self.pools[loop] = _Pool(self.connect_timeout)
+            return pool
+
+    async def _acquire(self, pool, boundary, fresh):
+        """An idle connection for ``boundary`` events (unless ``fresh``), or a new one"""
+        now = time.monotonic()
+        expired = [c for c in pool.idle if c.websocket.closed or now - c.last_used > self.keep_alive]
+        for connection in expired:
+            pool.idle.remove(connection)
+            await connection.close()
+        if not fresh:
+            for connection in reversed(pool.idle):
+                if connection.boundary == boundary:
+                    pool.idle.remove(connection)
+                    connection.reused = True
+                    return connection
+        return await self._open(pool, boundary)
+
+    async def _open(self, pool, boundary):
+        protocol = self.protocol
+        DRM = protocol["DRM"]
+
+        def connect():
+            url = self.url or (f"{protocol['WSS_URL']}&ConnectionId={protocol['connect_id']()}"
+                               f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}"
+                               f"&Sec-MS-GEC-Version={protocol['SEC_MS_GEC_VERSION']}")
+            options = {"compress": 15, "receive_timeout": self.receive_timeout,
+                       "headers": DRM.headers_with_muid(protocol["WSS_HEADERS"])}
+            if url.startswith("wss:"):
+                options["ssl"] = protocol["_SSL_CTX"]
+            return pool.http.ws_connect(url, **options)
+
+        started = time.monotonic()
+        try:
+            websocket = await connect()
+        except protocol["WSServerHandshakeError"] as e:
+            if e.status != 403:
+                raise
+            # The service's clock check, which edge_tts also answers with one retry
+            DRM.handle_client_response_error(e)
+            websocket = await connect()
+        with self.lock:
+            self.opened += 1
+            self.handshake_seconds += time.monotonic() - started
+
+        word_boundary = boundary == "WordBoundary"
+        await websocket.send_str(
+            f"X-Timestamp:{protocol['date_to_string']()}\r\n"
+            "Content-Type:application/json; charset=utf-8\r\n"
+            "Path:speech.config\r\n\r\n"
+            '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+            f'"sentenceBoundaryEnabled":"{str(not word_boundary).lower()}",'
+            f'"wordBoundaryEnabled":"{str(word_boundary).lower()}"'
+            '},"outputFormat":"audio-24khz-48kbitrate-mono-mp3"}}}}\r\n'
+        )
+        return _Connection(websocket, boundary)
+
+    async def _release(self, pool, connection):
+        if connection.reused:
+            with self.lock:
+                self.reused += 1
+                self.stale_in_a_row = 0
+        if self.keep_alive <= 0:
+            await connection.close()
+            return
+        connection.last_used = time.monotonic()
+        pool.idle.append(connection)
+
+    def _stale(self):
+        with self.lock:
+            self.stale += 1
+            self.stale_in_a_row += 1
+            give_up = self.stale_in_a_row >= MAX_STALE and not self.reused
+        if give_up and self.keep_alive > 0:
+            print("⚠ Edge TTS closes every kept connection, opening one per job instead")
+            self.keep_alive = 0
+
+    async def _speak(self, connection, config, texts):
+        """One synthesis turn per part of the text on ``connection``"""
+        import aiohttp
+
+        protocol = self.protocol
+        websocket = connection.websocket
+        answered = False
+        compensation = 0  # ticks of audio sent in the earlier turns
+        sent_bytes = 0
+        for text in texts:
+            request = protocol["ssml_headers_plus_data"](protocol["connect_id"](), protocol["date_to_string"](),
+                                                         protocol["mkssml"](config, text))
+            try:
+                await websocket.send_str(request)
+            except (ConnectionError, aiohttp.ClientError) as e:
+                if connection.reused and not answered:
+                    raise _Stale() from e
+                raise
+            turn_bytes = 0
+            while True:
+                message = await websocket.receive()
+                if message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED):
+                    if connection.reused and not answered:
+                        raise _Stale()
+                    raise protocol["WebSocketError"]("Edge TTS closed the connection mid-turn")
+                if message.type == aiohttp.WSMsgType.ERROR:
+                    raise protocol["WebSocketError"](message.data or "Unknown error")
+                answered = True
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    data = message.data.encode("utf-8")
+                    headers, body = protocol["get_headers_and_data"](data, data.find(b"\r\n\r\n"))
+                    path = headers.get(b"Path")
+                    if path == b"turn.end":
+                        break
+                    if path == b"audio.metadata":
+                        for meta in json.loads(body)["Metadata"]:
+                            if meta["Type"] in ("WordBoundary", "SentenceBoundary"):
+                                yield {"type": meta["Type"], "offset": meta["Data"]["Offset"] + compensation,
+                                       "duration": meta["Data"]["Duration"],
+                                       "text": protocol["unescape"](meta["Data"]["text"]["Text"])}
+                            elif meta["Type"] != "SessionEnd":
+                                raise protocol["UnknownResponse"](f"Unknown metadata type: {meta['Type']}")
+                    elif path not in (b"response", b"turn.start"):
+                        raise protocol["UnknownResponse"]("Unknown path received")
+                elif message.type == aiohttp.WSMsgType.BINARY:
+                    if len(message.data) < 2:
+                        raise protocol["UnexpectedResponse"]("Binary message without a header length")
+                    headers, body = protocol["get_headers_and_data"](
+                        message.data, int.from_bytes(message.data[:2], "big"))
+                    if headers.get(b"Path") != b"audio":
+                        raise protocol["UnexpectedResponse"]("Binary message that isn't audio")
+                    if body:
+                        turn_bytes += len(body)
+                        yield {"type": "audio", "data": body}
+            if not turn_bytes:
+                raise protocol["NoAudioReceived"]("No audio was received for the text")
+            sent_bytes += turn_bytes
+            compensation = sent_bytes * 8 * TICKS_PER_SECOND // MP3_BITRATE
+
+    async def _fallback(self, text, voice, rate, boundary):
+        """The job on a connection of its own, through edge_tts.Communicate"""
+        import edge_tts
+
+        self._count("fallbacks")
+        try:
+            communicate = edge_tts.Communicate(text, voice, rate=rate, boundary=boundary)
+        except TypeError:
+            # edge-tts before 7.0 sends word boundaries without being asked
+            communicate = edge_tts.Communicate(text, voice, rate=rate)
+        async for chunk in communicate.stream():
+            yield chunk
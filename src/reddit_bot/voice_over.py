@@ -0,0 +1,381 @@
+"""
+Convert saved Reddit posts to AI voice audio files
+Uses Microsoft Edge TTS (completely free, no API key needed)
+
+Posts are read from the post store (see post_store.py) and each record gets
+its audio_path filled in.  Up to MAX_PARALLEL posts are synthesized at once,
+and a failed post is retried up to TTS_RETRIES times; each post's file name
+comes from its number and title, so the order the jobs finish in doesn't
+matter.  edge_tts is only imported when the first post is converted.
+
+Every Edge TTS call goes through one circuit breaker (see circuit_breaker.py):
+a call that takes far longer than usual is given up, and while the service
+keeps failing the remaining posts fail at once.  They keep an empty
+audio_path, so the next run voices them, and the text logs stay where they
+are until every post has its audio.
+
+Edge TTS is spoken to through one TTSSession (see tts_session.py), which
+keeps its websockets open from one job to the next instead of paying a TLS
+handshake per post or sentence.  Code outside an event loop of its own
+(the scraper's pipeline threads) runs the coroutines with run(), whose
+per-thread loop keeps those connections between posts; shutdown() closes
+them.
+
+With WORD_TIMINGS on, a whole post is streamed from Edge TTS: the audio is
+written as it arrives, and the WordBoundary events that come with it are
+saved as ``<name>.words.json`` next to the MP3 (see word_timings.py), for
+the subtitles to be timed by.
+
+With CHUNKED on, a post is spoken sentence by sentence, CHUNK_PARALLEL
+sentences at a time, and the MP3 parts are joined without re-encoding.  Each
+sentence is cached on disk (see tts_cache.py), so a retry only requests the
+sentences that failed and an edited post only the sentences that changed.
+
+Whole posts go to the audio store (see audio_store.py), keyed by their text,
+voice and synthesis settings: a post voiced before with the same text is
+linked instead of synthesized, and identical posts being voiced at the same
+time share one synthesis.  The files in OUTPUT_FOLDER are links to the store,
+listed in its manifest.json.
+"""
+import asyncio
+import re
+import time
+from pathlib import Path
+import glob
+import os
+import shutil
+import threading
+
+from .audio_store import AudioStore, audio_key
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .post_store import PostStore, split_gender, split_title_and_body
+from .sentence_stream import split_sentences
+from .tts_cache import ChunkCache
+from .tts_session import TTSSession
+from .word_timings import timings_path, word_from_boundary, write_timings
+
+# Configuration
+INPUT_FOLDER = "get-audio"  # Folder the scraper writes its text logs to
+OUTPUT_FOLDER = "audio_posts"
+ARCHIVE_FOLDER = "old-posts"  # Folder to move the voiced text logs to
+MAX_PARALLEL = 4  # Posts synthesized at once
+TTS_RETRIES = 2  # Retries of a post whose synthesis failed
+WORD_TIMINGS = True  # Stream whole posts and save each word's timing next to the MP3
+CHUNKED = False  # Synthesize posts sentence by sentence, with every sentence cached
+CHUNK_PARALLEL = 4  # Sentences of one post synthesized at once in chunked mode
+RATE = "+0%"  # Speaking rate; part of the chunk cache and audio store keys
+VOICE = "en-US-AriaNeural"  # Female voice (natural sounding)
+# Other good voices:
+# "en-US-GuyNeural" - Male
+# "en-US-JennyNeural" - Female
+# "en-GB-SoniaNeural" - British Female
+# "en-AU-NatashaNeural" - Australian Female
+
+# Voice for the speaker's gender, as tagged by the AI cleaning
+VOICES = {
+    "male": "en-US-GuyNeural",
+    "female": "en-US-JennyNeural",
+}
+
+# Shared by every post voiced in this process.  Timeouts are per 1000 characters
+# of text, so a long post gets more time than a title; the scraper replaces it
+# with one built from its configuration.
+tts_breaker = CircuitBreaker("Edge TTS", failure_threshold=5, cooldown=30.0, min_timeout=15.0, max_timeout=180.0)
+
+# Sentences spoken in chunked and streaming mode
+chunk_cache = ChunkCache()
+
+# Connections to Edge TTS, kept open between jobs; the scraper replaces it
+# with one built from its configuration
+tts_session = TTSSession()
+
+# The event loops run() created, one per thread, for shutdown() to close
+_thread = threading.local()
+_loops = []
+_loops_lock = threading.Lock()
+
+# Whole posts, by text, voice and synthesis settings
+audio_store = AudioStore()
+
+# (event loop, audio key) -> the task synthesizing that audio, so identical
+# posts voiced at the same time are only synthesized once
+_in_flight = {}
+
+def voice_for(gender):
+    return VOICES.get(gender, VOICE)
+
+def extract_voice_and_text(text):
+    """Pick the voice from a <<MALE>>/<<FEMALE>> marker and remove the markers so they never get spoken"""
+    gender, text = split_gender(text)
+    return voice_for(gender), text
+
+def spoken_text(record):
+    """The text read out for a post: its title, then the body (without saying "Title:")"""
+    title, body = split_title_and_body(record['cleaned_text'])
+    return f"{title}. {' '.join(body)}"
+
+def audio_path(record, output_folder=OUTPUT_FOLDER):
+    """Where the audio of ``record`` is written"""
+    title, _ = split_title_and_body(record['cleaned_text'])
+    # Create safe filename from title
+    safe_title = re.sub(r'[^\w\s-]', '', title)[:50]
+    return Path(output_folder) / f"post_{record['number']:02d}_{safe_title}.mp3"
+
+def post_audio_key(text, voice, mode=None):
+    """Audio store key of a post spoken as ``text``; ``mode`` defaults to the current synthesis mode"""
+    return audio_key(voice, RATE, mode or ("chunked" if CHUNKED else "whole"), text)
+
+async def text_to_speech(text, output_file, voice=VOICE, label=""):
+    """Convert text to speech using Edge TTS.  Raises CircuitOpen while the
+    service is down and asyncio.TimeoutError when it takes too long."""
+    if CHUNKED:
+        return await text_to_speech_chunked(text, output_file, voice, label=label)
+
+    await tts_breaker.call(stream_to_file, text, output_file, voice, WORD_TIMINGS,
+                           size=len(text) / 1000, label=label)
+
+async def stream_to_file(text, output_file, voice=VOICE, timings=True):
+    """Speak ``text`` into ``output_file`` as the audio arrives, and with ``timings``
+    save its word timings next to it"""
+    boundary = "WordBoundary" if timings else "SentenceBoundary"
+    words = []
+    with open(output_file, "wb") as audio:
+        async for chunk in tts_session.stream(text, voice, RATE, boundary):
+            if chunk["type"] == "audio":
+                audio.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                words.append(word_from_boundary(chunk))
+    if timings:
+        write_timings(timings_path(output_file), words)
+
+async def text_to_speech_chunked(text, output_file, voice=VOICE, max_parallel=CHUNK_PARALLEL, label=""):
+    """text_to_speech one sentence at a time, ``max_parallel`` sentences at once.
+    Every sentence that was spoken stays cached even when others fail."""
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def speak(sentence):
+        async with semaphore:
+            return await synthesize(sentence, voice, label)
+
+    parts = await asyncio.gather(*(speak(sentence) for sentence in split_sentences(text) or [text]),
+                                 return_exceptions=True)
+    for part in parts:
+        if isinstance(part, BaseException):
+            raise part
+    # MP3 frames are self-contained, so the parts play back as one file
+    Path(output_file).write_bytes(b"".join(parts))
+
+async def synthesize(text, voice=VOICE, label=""):
+    """Speak ``text`` with Edge TTS and return the MP3 bytes, from the chunk cache if it was spoken before"""
+    audio = chunk_cache.get(voice, RATE, text)
+    if audio is not None:
+        return audio
+
+    async def collect():
+        audio = bytearray()
+        async for chunk in tts_session.stream(text, voice, RATE):
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+        return bytes(audio)
+
+    audio = await tts_breaker.call(collect, size=len(text) / 1000, label=label)
+    chunk_cache.put(voice, RATE, text, audio)
+    return audio
+
+async def speak_sentences(sentences, voice, max_parallel=4):
+    """Voice sentences while they are still being produced and return the joined MP3.
+
+    ``sentences`` is a blocking iterator (e.g. a streamed AI reply split by
+    SentenceSplitter); each sentence is synthesized as soon as it arrives, up
+    to ``max_parallel`` at a time.  ``voice()`` is called when the first
+    sentence is there, so it can depend on what the stream has revealed."""
+    semaphore = asyncio.Semaphore(max_parallel)
+    iterator = iter(sentences)
+    tasks = []
+    chosen = None
+
+    async def speak(text):
+        async with semaphore:
+            return await synthesize(text, chosen)
+
+    while True:
+        # Waiting for the next sentence must not hold up the ones being synthesized
+        sentence = await asyncio.to_thread(next, iterator, None)
+        if sentence is None:
+            break
+        if chosen is None:
+            chosen = voice()
+        tasks.append(asyncio.create_task(speak(sentence)))
+    # MP3 frames are self-contained, so the parts play back as one file
+    return b"".join(await asyncio.gather(*tasks))
+
+async def store_audio(key, text, voice=VOICE, retries=TTS_RETRIES, label=""):
+    """Synthesize ``text`` into the audio store under ``key`` unless it is there already.
+    Returns True if it was synthesized (or joined a synthesis of the same audio under way).
+    A failed synthesis is retried up to ``retries`` times, unless the breaker is open."""
+    if audio_store.has(key, words=WORD_TIMINGS and not CHUNKED):
+        audio_store.note_reused()
+        return False
+    loop = asyncio.get_running_loop()
+    task = _in_flight.get((loop, key))
+    if task is None:
+        task = loop.create_task(_synthesize_into_store(key, text, voice, retries, label))
+        _in_flight[(loop, key)] = task
+        task.add_done_callback(lambda _: _in_flight.pop((loop, key), None))
+    # One waiter being cancelled mustn't cancel the synthesis the others wait for
+    await asyncio.shield(task)
+    return True
+
+async def _synthesize_into_store(key, text, voice, retries, label):
+    temporary = audio_store.temporary_path(key)
+    try:
+        for attempt in range(retries + 1):
+            try:
+                await text_to_speech(text, str(temporary), voice=voice, label=label)
+                break
+            except CircuitOpen:
+                raise
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                delay = 2 ** attempt
+                print(f"⏳ TTS of {label or 'a post'} failed ({e or type(e).__name__}), "
+                      f"retrying in {delay}s (attempt {attempt + 1}/{retries})")
+                await asyncio.sleep(delay)
+        audio_store.commit(key, temporary)
+    finally:
+        temporary.unlink(missing_ok=True)
+        timings_path(temporary).unlink(missing_ok=True)
+
+def save_audio(record, audio, output_folder=OUTPUT_FOLDER, mode="streamed"):
+    """Store already synthesized ``audio`` of ``record`` and return its friendly path"""
+    key = post_audio_key(spoken_text(record), voice_for(record.get('gender')), mode)
+    audio_store.put(key, audio)
+    return audio_store.publish(key, audio_path(record, output_folder), record['id'])
+
+async def convert_post(record, output_folder=OUTPUT_FOLDER, store=None, retries=TTS_RETRIES):
+    """Voice one post record and return the audio path (also saved to ``store``).
+    Audio stored earlier for the same text and voice is reused without calling Edge TTS."""
+    text, voice = spoken_text(record), voice_for(record['gender'])
+    key = post_audio_key(text, voice)
+    if not await store_audio(key, text, voice, retries, f"post {record['number']}"):
+        print(f"♻ Post {record['number']} was voiced before with the same text and voice, reusing its audio")
+    output_file = audio_store.publish(key, audio_path(record, output_folder), record['id'])
+    record['audio_path'] = str(output_file)
+    if store is not None:
+        store.update(record['id'], audio_path=record['audio_path'])
+    return output_file
+
+async def convert_pending(store, output_folder=OUTPUT_FOLDER, max_parallel=MAX_PARALLEL, retries=TTS_RETRIES):
+    """Convert every post in ``store`` that has no audio yet, ``max_parallel`` at a time"""
+    Path(output_folder).mkdir(exist_ok=True)
+    records = store.pending('audio')
+    if not records:
+        print("❌ No posts waiting for audio!")
+        return 0
+
+    max_parallel = max(1, max_parallel)
+    print(f"🎙️ Total posts to convert: {len(records)} ({max_parallel} at a time)\n")
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def convert(i, record):
+        async with semaphore:
+            print(f"Converting post {i}/{len(records)} with {voice_for(record['gender'])}: {record['title'][:50]}...")
+            try:
+                output_file = await convert_post(record, output_folder, store, retries)
+            except CircuitOpen as e:
+                print(f"⏸ Post {i} left for the next run: {e}")
+                return False
+            except Exception as e:
+                print(f"✗ Error converting post {i}: {e or type(e).__name__}")
+                return False
+            print(f"✓ Saved post {i} to: {output_file}")
+            return True
+
+    started = time.monotonic()
+    try:
+        converted = sum(await asyncio.gather(*(convert(i, record) for i, record in enumerate(records, 1))))
+    finally:
+        await tts_session.close()
+    minutes = (time.monotonic() - started) / 60
+    rate = f", {converted / minutes:.1f} posts/minute" if minutes > 0 else ""
+    print(f"\n✅ Done! {converted} posts converted to audio in '{output_folder}' folder{rate}")
+    print(audio_store.summary())
+    if CHUNKED:
+        print(chunk_cache.summary())
+    print(tts_session.summary())
+    if tts_breaker.troubled():
+        print(tts_breaker.summary())
+    return converted
+
+def run(coro):
+    """Run ``coro`` on this thread's own event loop, which stays open so the TTS
+    session's connections are kept for the next post; see shutdown()"""
+    loop = getattr(_thread, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _thread.loop = asyncio.new_event_loop()
+        with _loops_lock:
+            _loops.append(loop)
+    return loop.run_until_complete(coro)
+
+def shutdown():
+    """Close the TTS session's connections and the event loops of run().
+    Call once the threads that used run() are done."""
+    with _loops_lock:
+        loops = list(_loops)
+        _loops.clear()
+    for loop in loops:
+        loop.run_until_complete(tts_session.close())
+        loop.close()
+
+def archive_logs(input_folder=INPUT_FOLDER, archive_folder=ARCHIVE_FOLDER):
+    """Move the scraper's text logs from ``input_folder`` to ``archive_folder``.
+    Returns {absolute path before: absolute path after} for the files moved."""
+    moved = {}
+    text_files = glob.glob(os.path.join(input_folder, "*.txt"))
+    if not text_files:
+        return moved
+
+    # Create old-posts folder if it doesn't exist
+    Path(archive_folder).mkdir(exist_ok=True)
+
+    print(f"\n📦 Moving processed files to '{archive_folder}' folder...")
+    for text_file in text_files:
+        filename = os.path.basename(text_file)
+        destination = os.path.join(archive_folder, filename)
+
+        # If file already exists in archive, add a number to avoid overwriting
+        if os.path.exists(destination):
+            base, ext = os.path.splitext(filename)
+            counter = 1
+            while os.path.exists(destination):
+                destination = os.path.join(archive_folder, f"{base}_{counter}{ext}")
+                counter += 1
+
+        shutil.move(text_file, destination)
+        moved[os.path.abspath(text_file)] = os.path.abspath(destination)
+        print(f"   ✓ Moved: {filename} → {archive_folder}/")
+    return moved
+
+def generate_audio(store=None, output_folder=OUTPUT_FOLDER, input_folder=INPUT_FOLDER, archive_folder=ARCHIVE_FOLDER,
+                   max_parallel=MAX_PARALLEL, retries=TTS_RETRIES):
+    """Voice every post still waiting for audio, then archive the text logs.
+    Opens the default post store when ``store`` is None.  Returns where the
+    archived logs went (see archive_logs), empty if they stayed put."""
+    archived = {}
+    own_store = store is None
+    if own_store:
+        store = PostStore()
+    try:
+        converted = asyncio.run(convert_pending(store, output_folder, max_parallel, retries))
+        waiting = len(store.pending('audio'))
+        if waiting:
+            # Archiving now would file away posts that were never voiced
+            print(f"\n⚠ {waiting} post(s) still have no audio; text logs stay in '{input_folder}/' until the next run voices them")
+        elif converted:
+            archived = archive_logs(input_folder, archive_folder)
+            print(f"\n✅ All done! Audio files in '{output_folder}/', text files archived in '{archive_folder}/'")
+    finally:
+        if own_store:
+            store.close()
+    return archived
@@ -0,0 +1,50 @@
+"""
+Per-word timing files written next to the voiced MP3s
+
+Edge TTS reports a WordBoundary event for every spoken word, with its offset
+and duration in the audio.  voice_over.py saves them as ``<name>.words.json``
+beside ``<name>.mp3``:
+
+    {"unit": "ms", "words": [[0, 412, "Title"], [450, 230, "of"], ...]}
+
+and subtitles.py reads them back to place its cues where the words are
+actually spoken.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Edge TTS offsets and durations are in 100-nanosecond ticks
+TICKS_PER_SECOND = 10_000_000
+
+# (offset, duration, text), in seconds
+Word = Tuple[float, float, str]
+
+
+def timings_path(audio_path: str | Path) -> Path:
+    """The timing file that belongs to ``audio_path``"""
+    return Path(audio_path).with_suffix(".words.json")
+
+
+def word_from_boundary(chunk: dict) -> Word:
+    """A Word from an edge_tts WordBoundary chunk"""
+    return (chunk["offset"] / TICKS_PER_SECOND, chunk["duration"] / TICKS_PER_SECOND, chunk["text"])
+
+
+def write_timings(path: str | Path, words: List[Word]) -> None:
+    rows = [[round(offset * 1000), round(duration * 1000), text] for offset, duration, text in words]
+    Path(path).write_text(json.dumps({"unit": "ms", "words": rows}, ensure_ascii=False, separators=(",", ":")),
+                          encoding="utf-8")
+
+
+def read_timings(audio_path: str | Path) -> Optional[List[Word]]:
+    """The word timings saved for ``audio_path``, or None if there are none"""
+    try:
+        data = json.loads(timings_path(audio_path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    words = [(offset / 1000, duration / 1000, text) for offset, duration, text in data.get("words", [])]
+    return words or None
@@ -0,0 +1,79 @@
+import pytest
+
+from reddit_bot.normalize import detect_gender, normalize_text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("im sure", "I'm sure"),
+    ("Im sure", "I'm sure"),
+    ("Dont go", "Don't go"),
+    ("idk what to do", "I don't know what to do"),
+    ("my bf said", "my boyfriend said"),
+])
+def test_contractions_and_texting(text, expected):
+    assert normalize_text(text)[0] == expected
+
+
+@pytest.mark.parametrize("text", [
+    "The IM system crashed.",
+    "My SIS account expired.",
+    "I CANT believe it.",
+])
+def test_capitalised_words_are_left_alone(text):
+    assert normalize_text(text) == (text, 0)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I (21M) asked", "I (21 male) asked"),
+    ("I 21M asked", "I 21 male asked"),
+    ("I am 30F and", "I am 30 female and"),
+    ("my 30F wife", "my 30 female wife"),
+    ("she (19 f) said", "she (19 female) said"),
+    ("me [M21]", "me [21 male]"),
+])
+def test_ages_next_to_a_person(text, expected):
+    assert normalize_text(text)[0] == expected
+
+
+@pytest.mark.parametrize("text", [
+    "I moved here 25M ago.",
+    "We raised 25M last year.",
+    "He won the 50 m dash.",
+    "I rated it 5 f.",
+])
+def test_numbers_that_are_not_ages(text):
+    assert normalize_text(text) == (text, 0)
+
+
+@pytest.mark.parametrize("text, gender", [
+    ("I (21M) asked", "male"),
+    ("I'm [F19] and", "female"),
+    ("I 21M asked", "male"),
+    ("I am 30M and my wife left.", "male"),
+    ("I, 24F, said", "female"),
+    ("I moved here 25M ago.", ""),
+    ("my 30F wife said", ""),
+])
+def test_detect_gender_from_speaker_age(text, gender):
+    assert detect_gender(text) == gender
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("i think so", "I think so"),
+    ("and i asked her", "and I asked her"),
+    ("i'm here", "I'm here"),
+    ("my wife and i went", "my wife and I went"),
+])
+def test_lowercase_pronoun_i(text, expected):
+    assert normalize_text(text)[0] == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Press i to insert.",
+    "Choose option i or ii.",
+    "See part i, then part ii.",
+    "It was fine, i.e. quiet.",
+])
+def test_lone_i_that_is_not_the_pronoun(text):
+    # Not rewritten, and so not counted towards the noise score either
+    assert normalize_text(text) == (text, 0)